@@ -0,0 +1,121 @@
+# DatasetPaper/code/align_slides.py
+
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from utils import ensure_dir, setup_logging
+from artifact_cache import get_cache
+from load_data import load_dataset
+from paths import DATA_DIR
+
+DEFAULT_WINDOW = 3       # neighbouring slides searched on each side
+MIN_SCORE = 0.05         # below this the pair shares (almost) no vocabulary
+MARGIN = 0.05            # how much better a neighbour must score to flag a swap
+
+# ------------------------------------------------------
+# TF-IDF over both sides (slide OCR text and narration) so they share
+# one vocabulary and IDF; rows are L2-normalised, so a sparse product
+# of the two matrices is the cosine similarity
+# ------------------------------------------------------
+def build_vectorizer():
+    return TfidfVectorizer(
+        lowercase=True,
+        stop_words="english",
+        sublinear_tf=True,
+        token_pattern=r"(?u)\b[a-zA-Z][a-zA-Z0-9\-]+\b",
+        dtype=np.float32,
+    )
+
+def align_lecture(similarity, window=DEFAULT_WINDOW, min_score=MIN_SCORE, margin=MARGIN):
+    # similarity[i, j]: narration i vs slide image j (one lecture)
+    n = similarity.shape[0]
+    idx = np.arange(n)
+    band = np.abs(idx[:, None] - idx[None, :]) <= window
+    masked = np.where(band, similarity, -np.inf)
+
+    score = similarity[idx, idx]
+    best = masked.argmax(axis=1)
+    best_score = masked[idx, best]
+    rank = (masked > score[:, None]).sum(axis=1) + 1
+
+    flag = np.full(n, "ok", dtype=object)
+    flag[score < min_score] = "low_similarity"
+    flag[(best != idx) & (best_score - score > margin)] = "misaligned"
+    return score, best, best_score, rank, flag
+
+def score_alignment(lectures, window=DEFAULT_WINDOW, min_score=MIN_SCORE, margin=MARGIN):
+    # lectures: {lecture_id: (slide_ids, narration_texts, ocr_texts)}
+    vectorizer = build_vectorizer()
+    vectorizer.fit(
+        [t for _, texts, _ in lectures.values() for t in texts]
+        + [t for _, _, ocr in lectures.values() for t in ocr]
+    )
+
+    frames = []
+    for lecture_id, (slide_ids, texts, ocr) in lectures.items():
+        if not slide_ids:
+            continue
+        narration = vectorizer.transform(texts)
+        slides = vectorizer.transform(ocr)
+        similarity = (narration @ slides.T).toarray()
+
+        score, best, best_score, rank, flag = align_lecture(similarity, window, min_score, margin)
+        slide_ids = np.asarray(slide_ids, dtype=object)
+        frames.append(pd.DataFrame({
+            "lecture": lecture_id,
+            "slide_id": slide_ids,
+            "score": score,
+            "best_slide": slide_ids[best],
+            "best_score": best_score,
+            "rank": rank,
+            "flag": flag,
+        }))
+
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=["lecture", "slide_id", "score", "best_slide", "best_score", "rank", "flag"]
+    )
+
+def log_alignment_summary(df):
+    counts = df["flag"].value_counts().to_dict()
+    logging.info(
+        f"[alignment] {len(df)} pairs: {counts.get('ok', 0)} ok, "
+        f"{counts.get('misaligned', 0)} misaligned, {counts.get('low_similarity', 0)} low similarity; "
+        f"mean score {df['score'].mean():.3f}"
+    )
+    return counts
+
+# ------------------------------------------------------
+# Standalone: score every pair of the dataset
+# ------------------------------------------------------
+def align_slides(window=DEFAULT_WINDOW, out_path=DATA_DIR / "alignment_scores.csv"):
+    data = load_dataset(ocr=True)
+
+    lectures = {}
+    for record in data.records():
+        ids, texts, ocr_texts = lectures.setdefault(record["lecture"], ([], [], []))
+        ids.append(record["slide_id"])
+        texts.append(record["text"])
+        ocr_texts.append(record["ocr_text"])
+
+    df = score_alignment(lectures, window=window)
+    ensure_dir(DATA_DIR)
+    df.to_csv(out_path, index=False)
+
+    counts = log_alignment_summary(df)
+    get_cache().log_stats("alignment")
+    print(f"✔ Alignment scored: {counts.get('misaligned', 0)} likely misaligned pairs "
+          f"(see {out_path}).")
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score slide-image / narration alignment")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW,
+                        help="slides searched on each side for a better match")
+    args = parser.parse_args()
+
+    setup_logging()
+    align_slides(window=args.window)
@@ -0,0 +1,217 @@
+# DatasetPaper/code/artifact_cache.py
+
+import os
+import pickle
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+from paths import OUTPUT_DIR
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+CACHE_DIR = OUTPUT_DIR / "cache"
+DEFAULT_MAX_BYTES = int(os.environ.get("MEDI_SLATE_CACHE_BYTES", 512 * 1024 * 1024))
+
+# Evict down to this fraction of the budget so we don't evict on every put
+LOW_WATER = 0.9
+
+# ------------------------------------------------------
+# Content hashing
+# ------------------------------------------------------
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def make_key(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = repr(part).encode("utf-8")
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+# ------------------------------------------------------
+# Cross-process lock on a sidecar file
+# ------------------------------------------------------
+@contextmanager
+def file_lock(path):
+    with open(path, "a+b") as fh:
+        if os.name == "nt":
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+# ------------------------------------------------------
+# Artifact cache
+#
+# Entries live at <root>/<namespace>/<key[:2]>/<key>. Recency is the file
+# mtime (touched on every hit), writes go through a temp file + os.replace,
+# and usage accounting/eviction run under a cross-process file lock so
+# parallel workers can share one cache directory.
+# ------------------------------------------------------
+class ArtifactCache:
+
+    def __init__(self, root=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.lock_path = self.root / ".lock"
+        self.usage_path = self.root / ".usage"
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, namespace, key):
+        return self.root / namespace / key[:2] / key
+
+    # ---------------- read / write ----------------
+    def get(self, namespace, key):
+        path = self._path(namespace, key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._stats_lock:
+                self.misses += 1
+            return None
+        with self._stats_lock:
+            self.hits += 1
+        return data
+
+    def put(self, namespace, key, data):
+        path = self._path(namespace, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            with file_lock(self.lock_path):
+                existed = path.exists()
+                old_size = path.stat().st_size if existed else 0
+                os.replace(tmp, path)
+                self._add_usage(len(data) - old_size)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def get_or_create(self, namespace, key, create):
+        data = self.get(namespace, key)
+        if data is None:
+            data = create()
+            self.put(namespace, key, data)
+        return data
+
+    def get_or_compute(self, namespace, key, compute):
+        # Same as get_or_create, for picklable Python objects
+        data = self.get(namespace, key)
+        if data is not None:
+            return pickle.loads(data)
+        value = compute()
+        self.put(namespace, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        return value
+
+    # ---------------- size accounting ----------------
+    def _read_usage(self):
+        try:
+            return int(self.usage_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return self._scan_usage()
+
+    def _scan_usage(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _add_usage(self, delta):
+        # Caller holds the file lock
+        usage = self._read_usage() + delta
+        if usage > self.max_bytes:
+            usage = self._evict(int(self.max_bytes * LOW_WATER))
+        self.usage_path.write_text(str(usage))
+
+    def _entries(self):
+        for ns in self.root.iterdir():
+            if not ns.is_dir():
+                continue
+            for shard in ns.iterdir():
+                for entry in os.scandir(shard):
+                    if entry.name.startswith(".tmp-"):
+                        continue
+                    st = entry.stat()
+                    yield entry.path, st.st_size, st.st_mtime
+
+    def _evict(self, target_bytes):
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        usage = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if usage <= target_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Already gone, or held open by a reader on Windows
+                continue
+            usage -= size
+            with self._stats_lock:
+                self.evictions += 1
+        return usage
+
+    # ---------------- reporting ----------------
+    def record(self, hits=0, misses=0):
+        # Fold in counters reported back by worker processes
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += misses
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "bytes": self._read_usage(),
+            "max_bytes": self.max_bytes,
+        }
+
+    def log_stats(self, stage):
+        s = self.stats()
+        logging.info(
+            f"[cache] {stage}: hits={s['hits']} misses={s['misses']} "
+            f"hit_rate={s['hit_rate']:.1%} evictions={s['evictions']} "
+            f"size={s['bytes'] / 2**20:.1f}/{s['max_bytes'] / 2**20:.0f} MiB"
+        )
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+def get_cache():
+    # One instance per process so hit/miss counters accumulate across a stage
+    # (and across pipeline stages running in parallel threads)
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = ArtifactCache()
+    return _CACHE
@@ -1,12 +1,17 @@
 # DatasetPaper/code/build_gallery.py
 
+import io
+import logging
 import matplotlib.pyplot as plt
 from PIL import Image
 from load_data import load_dataset
-from utils import save_fig
+from artifact_cache import get_cache
+from bulk_io import read_many
+from utils import save_fig, cached_thumbnail, setup_logging, RANDOM_SEED
+from paths import FIGURE_DIR
 import random
 
-def build_gallery():
+def build_gallery(seed=RANDOM_SEED):
     data = load_dataset()
 
     # Flatten all slides
@@ -14,20 +19,29 @@ def build_gallery():
     for slides in data.values():
         all_slides.extend(slides)
 
-    # Sample 12 slides
-    random.shuffle(all_slides)
+    # Sample 12 slides (seeded, so the figure is reproducible)
+    random.Random(seed).shuffle(all_slides)
     sample = all_slides[:12]
 
     fig, axes = plt.subplots(4, 3, figsize=(12, 16))
 
-    for ax, slide in zip(axes.flatten(), sample):
-        img = Image.open(slide["image_path"])
-        ax.imshow(img)
+    images = read_many(
+        [slide["image_path"] for slide in sample],
+        lambda p: Image.open(io.BytesIO(cached_thumbnail(p, 800))),
+        on_error=lambda p, exc: logging.warning(f"[gallery] skipped {p} ({exc})"),
+    )
+
+    # A corrupt image leaves its tile blank instead of aborting the figure
+    for ax, slide, img in zip(axes.flatten(), sample, images):
+        if img is not None:
+            ax.imshow(img)
         ax.set_title(slide["slide_id"])
         ax.axis("off")
 
-    save_fig("../figures/fig_gallery.png")
+    save_fig(FIGURE_DIR / "fig_gallery.png")
+    get_cache().log_stats("gallery")
     print("✔ Gallery generated.")
 
 if __name__ == "__main__":
+    setup_logging()
     build_gallery()
@@ -0,0 +1,219 @@
+# DatasetPaper/code/build_splits.py
+
+import io
+import json
+import random
+import argparse
+import tarfile
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from load_data import load_dataset, parse_lecture_num
+from artifact_cache import get_cache
+from utils import ensure_dir, tokenize, cached_thumbnail, setup_logging, RANDOM_SEED
+from paths import OUTPUT_DIR, STORE_PATH
+
+SPLIT_DIR = OUTPUT_DIR / "splits"
+SHARD_DIR = OUTPUT_DIR / "shards"
+
+SPLIT_NAMES = ("train", "val", "test")
+DEFAULT_RATIOS = (0.8, 0.1, 0.1)
+
+# ------------------------------------------------------
+# Flatten the dataset into deterministically ordered records
+# ------------------------------------------------------
+def slide_key(lecture_num, slide_num):
+    return f"lec{lecture_num:03d}_slide{slide_num:04d}"
+
+def flatten_dataset(data):
+    records = []
+    for lecture_id, slides in data.items():
+        lecture_num = parse_lecture_num(lecture_id)
+        for slide in slides:
+            records.append({
+                "key": slide_key(lecture_num, slide["slide_num"]),
+                "lecture": lecture_id,
+                "lecture_num": lecture_num,
+                "slide_id": slide["slide_id"],
+                "slide_num": slide["slide_num"],
+                "image_path": slide["image_path"],
+                "text": slide["text"],
+                "num_tokens": len(tokenize(slide["text"])),
+            })
+
+    # Never depend on filesystem order: the seed alone decides the split
+    records.sort(key=lambda r: (r["lecture_num"], r["slide_num"]))
+    return records
+
+def _allocate(items, ratios):
+    # Cumulative rounding so the split sizes always add up to len(items)
+    total = sum(ratios)
+    bounds, acc = [], 0.0
+    for r in ratios:
+        acc += r
+        bounds.append(round(len(items) * acc / total))
+
+    parts, start = [], 0
+    for end in bounds:
+        parts.append(items[start:end])
+        start = end
+    return parts
+
+# ------------------------------------------------------
+# Split strategies
+# ------------------------------------------------------
+def split_by_lecture(records, ratios=DEFAULT_RATIOS, seed=RANDOM_SEED):
+    # Whole lectures go to one split, so no lecture leaks across splits
+    lecture_nums = sorted({r["lecture_num"] for r in records})
+    random.Random(seed).shuffle(lecture_nums)
+
+    splits = {}
+    for name, part in zip(SPLIT_NAMES, _allocate(lecture_nums, ratios)):
+        chosen = set(part)
+        splits[name] = [r for r in records if r["lecture_num"] in chosen]
+    return splits
+
+def split_by_slide(records, ratios=DEFAULT_RATIOS, seed=RANDOM_SEED):
+    shuffled = list(records)
+    random.Random(seed).shuffle(shuffled)
+    return dict(zip(SPLIT_NAMES, _allocate(shuffled, ratios)))
+
+def split_stratified(records, ratios=DEFAULT_RATIOS, seed=RANDOM_SEED, n_bins=5):
+    # Bin slides by token-length quantile, then split every bin with the
+    # same ratios so each split sees the same length distribution
+    by_length = sorted(records, key=lambda r: (r["num_tokens"], r["key"]))
+    bin_size = max(1, -(-len(by_length) // n_bins))
+    rng = random.Random(seed)
+
+    splits = {name: [] for name in SPLIT_NAMES}
+    for i in range(0, len(by_length), bin_size):
+        bin_records = by_length[i:i + bin_size]
+        rng.shuffle(bin_records)
+        for name, part in zip(SPLIT_NAMES, _allocate(bin_records, ratios)):
+            splits[name].extend(part)
+
+    for name in SPLIT_NAMES:
+        splits[name].sort(key=lambda r: r["key"])
+    return splits
+
+SPLIT_MODES = {
+    "lecture": split_by_lecture,
+    "slide": split_by_slide,
+    "stratified": split_stratified,
+}
+
+def check_leakage(splits, mode):
+    seen = {}
+    for name, records in splits.items():
+        for r in records:
+            unit = r["lecture"] if mode == "lecture" else r["key"]
+            if seen.setdefault(unit, name) != name:
+                raise ValueError(f"{unit} appears in both '{seen[unit]}' and '{name}'")
+
+def save_split_manifest(splits, mode, seed, ratios, path):
+    ensure_dir(Path(path).parent)
+    manifest = {
+        "mode": mode,
+        "seed": seed,
+        "ratios": list(ratios),
+        "splits": {name: [r["key"] for r in recs] for name, recs in splits.items()},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+# ------------------------------------------------------
+# WebDataset-style tar shards
+# ------------------------------------------------------
+def _add_member(tar, name, payload):
+    info = tarfile.TarInfo(name)
+    info.size = len(payload)
+    info.mtime = 0  # byte-identical shards for identical inputs
+    tar.addfile(info, io.BytesIO(payload))
+
+def write_shard(shard_path, records, image_size):
+    shard_path = Path(shard_path)
+    cache = get_cache()
+    hits, misses = cache.hits, cache.misses
+    tmp_path = shard_path.with_suffix(".tar.tmp")
+
+    with tarfile.open(tmp_path, "w") as tar:
+        for r in records:
+            meta = {k: r[k] for k in ("lecture", "slide_id", "slide_num", "num_tokens")}
+            _add_member(tar, f"{r['key']}.jpg", cached_thumbnail(r["image_path"], image_size, quality=90))
+            _add_member(tar, f"{r['key']}.txt", r["text"].encode("utf-8"))
+            _add_member(tar, f"{r['key']}.json", json.dumps(meta).encode("utf-8"))
+
+    tmp_path.replace(shard_path)
+    return str(shard_path), len(records), cache.hits - hits, cache.misses - misses
+
+def export_shards(splits, out_dir=SHARD_DIR, shard_size=256, image_size=512, workers=None):
+    ensure_dir(out_dir)
+
+    jobs = []
+    for name, records in splits.items():
+        for idx, start in enumerate(range(0, len(records), shard_size)):
+            shard_path = Path(out_dir) / f"{name}-{idx:06d}.tar"
+            jobs.append((shard_path, records[start:start + shard_size]))
+
+    # Shards of an earlier export (other shard size, fewer records) would
+    # still match a "train-*.tar" glob next to the new ones: drop every
+    # shard and leftover temp file that is not part of this export
+    keep = {p.name for p, _ in jobs}
+    for path in Path(out_dir).iterdir():
+        stale = path.name.endswith(".tar.tmp") or (
+            path.suffix == ".tar" and path.name.rsplit("-", 1)[0] in set(SPLIT_NAMES) | set(splits)
+            and path.name not in keep
+        )
+        if stale:
+            path.unlink()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(write_shard, p, recs, image_size) for p, recs in jobs]
+        written = [f.result() for f in futures]
+
+    cache = get_cache()
+    for _, _, hits, misses in written:
+        cache.record(hits, misses)
+    cache.log_stats("export_shards")
+
+    with open(Path(out_dir) / "shards.json", "w", encoding="utf-8") as f:
+        json.dump({Path(p).name: n for p, n, _, _ in written}, f, indent=2)
+
+    return written
+
+# ------------------------------------------------------
+# Entry point
+# ------------------------------------------------------
+def build_splits(mode="lecture", seed=RANDOM_SEED, ratios=DEFAULT_RATIOS,
+                 export=True, shard_size=256, image_size=512, workers=None, store=None):
+    records = flatten_dataset(load_dataset(store=store))
+    splits = SPLIT_MODES[mode](records, ratios=ratios, seed=seed)
+    check_leakage(splits, mode)
+
+    save_split_manifest(splits, mode, seed, ratios, SPLIT_DIR / f"split_{mode}_seed{seed}.json")
+
+    if export:
+        export_shards(splits, SHARD_DIR / f"{mode}_seed{seed}",
+                      shard_size=shard_size, image_size=image_size, workers=workers)
+
+    sizes = ", ".join(f"{name}={len(recs)}" for name, recs in splits.items())
+    print(f"✔ Splits generated ({mode}, seed={seed}): {sizes}")
+    return splits
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seeded train/val/test splits and tar shard export")
+    parser.add_argument("--mode", choices=sorted(SPLIT_MODES), default="lecture")
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED)
+    parser.add_argument("--ratios", type=float, nargs=3, default=DEFAULT_RATIOS)
+    parser.add_argument("--shard-size", type=int, default=256)
+    parser.add_argument("--image-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-export", action="store_true")
+    parser.add_argument("--store", nargs="?", const=str(STORE_PATH), default=None,
+                        help="read the slides from the SQLite store (dataset_store.py build)")
+    args = parser.parse_args()
+
+    setup_logging()
+    build_splits(args.mode, args.seed, tuple(args.ratios), not args.no_export,
+                 args.shard_size, args.image_size, args.workers, store=args.store)
@@ -0,0 +1,119 @@
+# DatasetPaper/code/bulk_io.py
+
+import os
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from paths import OUTPUT_DIR
+
+# Per-file latency (not bandwidth) dominates on NFS, so many small reads in
+# flight at once is what helps. Threads are enough: file reads and PIL
+# decodes release the GIL.
+DEFAULT_CONCURRENCY = int(os.environ.get("MEDI_SLATE_IO_WORKERS", 32))
+
+# ------------------------------------------------------
+# Readers
+# ------------------------------------------------------
+def read_text_file(path, encoding="utf-8"):
+    with open(path, "r", encoding=encoding) as f:
+        return f.read()
+
+def read_bytes_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def decode_image(path):
+    img = Image.open(prefer_derivative(path))
+    img.load()  # force the decode inside the worker thread
+    return img.convert("RGB") if img.mode == "P" else img
+
+def _guarded(reader, on_error):
+    # Per-file failures go to on_error(path, exc) and yield None instead of
+    # aborting the whole bulk read
+    def read(path):
+        try:
+            return reader(path)
+        except Exception as exc:
+            on_error(path, exc)
+            return None
+    return read
+
+# ------------------------------------------------------
+# Bulk, order-preserving reads
+# ------------------------------------------------------
+def read_many(paths, reader, concurrency=DEFAULT_CONCURRENCY, on_error=None):
+    # Results come back in the order of `paths`, whatever order they finish in
+    if on_error is not None:
+        reader = _guarded(reader, on_error)
+    paths = list(paths)
+    if concurrency <= 1 or len(paths) <= 1:
+        return [reader(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(paths))) as pool:
+        return list(pool.map(reader, paths))
+
+def iter_prefetched(paths, reader, concurrency=DEFAULT_CONCURRENCY, on_error=None):
+    # Streaming variant: at most `concurrency` reads in flight, so memory
+    # stays bounded when the results are large (decoded images)
+    if on_error is not None:
+        reader = _guarded(reader, on_error)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        window = deque()
+        for path in paths:
+            window.append(pool.submit(reader, path))
+            if len(window) >= concurrency:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+def read_texts(paths, encoding="utf-8", concurrency=DEFAULT_CONCURRENCY, on_error=None):
+    return read_many(paths, lambda p: read_text_file(p, encoding), concurrency, on_error)
+
+def read_bytes(paths, concurrency=DEFAULT_CONCURRENCY, on_error=None):
+    return read_many(paths, read_bytes_file, concurrency, on_error)
+
+def load_images(paths, concurrency=DEFAULT_CONCURRENCY, on_error=None):
+    return read_many(paths, decode_image, concurrency, on_error)
+
+# ------------------------------------------------------
+# Image derivatives (see transcode_images.py): a compact, SSIM-verified
+# copy of each slide under ../outputs/derived/<lecture>/, read instead of
+# the original JPG whenever it is at least as new
+# ------------------------------------------------------
+DERIVED_DIR = OUTPUT_DIR / "derived"
+DERIVED_SUFFIXES = (".webp", ".png")
+
+def derivative_path(image_path, suffix, root=DERIVED_DIR):
+    image_path = Path(image_path)
+    return Path(root) / image_path.parent.parent.name / f"{image_path.stem}{suffix}"
+
+def prefer_derivative(image_path, root=DERIVED_DIR):
+    try:
+        source_mtime = os.stat(image_path).st_mtime_ns
+    except OSError:
+        return image_path
+    for suffix in DERIVED_SUFFIXES:
+        path = derivative_path(image_path, suffix, root)
+        try:
+            if os.stat(path).st_mtime_ns >= source_mtime:
+                return str(path)
+        except OSError:
+            continue
+    return image_path
+
+# ------------------------------------------------------
+# Directory listings (one round-trip per directory, not per file)
+# ------------------------------------------------------
+def list_files(directory, suffix):
+    # Case-insensitive suffix match: exported slides are "SlideN.JPG"
+    directory = Path(directory)
+    if not directory.is_dir():
+        return {}
+    suffix = suffix.lower()
+    return {
+        Path(entry.path).stem: Path(entry.path)
+        for entry in os.scandir(directory)
+        if entry.is_file() and entry.name.lower().endswith(suffix)
+    }
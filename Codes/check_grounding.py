@@ -0,0 +1,175 @@
+# DatasetPaper/code/check_grounding.py
+
+import re
+import time
+import logging
+import argparse
+import unicodedata
+import pandas as pd
+
+from utils import ensure_dir, setup_logging
+from load_data import load_dataset
+from model_outputs import MODEL_OUTPUT_ROOT, load_model_outputs, iter_entries, claims
+from repair_outputs import REPAIRED_FILE, load_repaired
+from paths import DATA_DIR, TABLE_DIR, STORE_PATH
+from table_writer import TableSpec, Column, write_table
+
+NGRAM = 3          # longest n-gram indexed per slide
+THRESHOLD = 0.8    # share of a claim's n-grams that must occur in the narration
+
+GROUNDING_TABLE = TableSpec("table_grounding", [
+    Column("model", "Model", align="l"),
+    Column("claims", "Claims", align="r"),
+    Column("term_rate", "Terms not in narration", fmt="{:.1%}", align="r"),
+    Column("evidence_rate", "Evidence not in narration", fmt="{:.1%}", align="r"),
+    Column("triple_evidence_rate", "Triple evidence not in narration", fmt="{:.1%}", align="r"),
+    Column("hallucination_rate", "Overall", fmt="{:.1%}", align="r"),
+])
+
+# ------------------------------------------------------
+# Normalisation shared by narration and claims: NFKC, lowercase, curly
+# quotes / dashes / hyphenation reduced to word boundaries, and a crude
+# plural fold so "frequencies" still matches "frequency"-style terms
+# ------------------------------------------------------
+WORD_RE = re.compile(r"\w+")
+
+def _fold(word):
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-3] + "y" if word.endswith("ies") else word[:-1]
+    return word
+
+def normalize_tokens(text):
+    text = unicodedata.normalize("NFKC", text).lower()
+    return [_fold(w) for w in WORD_RE.findall(text)]
+
+def ngrams(tokens, n):
+    return [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+
+# ------------------------------------------------------
+# Per-slide index: every 1..NGRAM-gram of the narration in one hash set,
+# so a claim costs O(len(claim)) set lookups whatever the slide length
+# ------------------------------------------------------
+class SlideIndex:
+    __slots__ = ("grams",)
+
+    def __init__(self, text, max_n=NGRAM):
+        tokens = normalize_tokens(text)
+        self.grams = set()
+        for n in range(1, max_n + 1):
+            self.grams.update(ngrams(tokens, n))
+
+    def coverage(self, claim, max_n=NGRAM):
+        # Fuzzy containment: share of the claim's n-grams found in the
+        # narration (1.0 = verbatim up to normalisation; paraphrased or
+        # invented spans lose the n-grams they touch)
+        tokens = normalize_tokens(claim)
+        if not tokens:
+            return None
+        grams = ngrams(tokens, min(max_n, len(tokens)))
+        return sum(g in self.grams for g in grams) / len(grams)
+
+def build_indexes(data, max_n=NGRAM):
+    return {
+        (r["lecture"], r["slide_id"]): SlideIndex(r["text"], max_n)
+        for r in data.records()
+    }
+
+# ------------------------------------------------------
+# Checking
+# ------------------------------------------------------
+def check_claims(outputs, indexes, threshold=THRESHOLD, max_n=NGRAM, repaired=None):
+    # repaired: optional {(lecture, slide_id, model, task): parsed} used
+    # instead of the stored `parsed` (see repair_outputs.py)
+    rows, unmatched = [], set()
+    for lecture, slide_id, model, task, entry in iter_entries(outputs):
+        index = indexes.get((lecture, slide_id))
+        if index is None:
+            unmatched.add((lecture, slide_id))
+            continue
+        parsed = entry.get("parsed")
+        if repaired is not None:
+            parsed = repaired.get((lecture, slide_id, model, task), parsed)
+        for kind, text in claims(task, parsed):
+            score = index.coverage(text, max_n)
+            if score is None:
+                continue
+            rows.append((model, lecture, slide_id, kind, text, score, score >= threshold))
+
+    if unmatched:
+        logging.warning(f"[grounding] {len(unmatched)} output slides have no narration; skipped")
+    return pd.DataFrame(rows, columns=[
+        "model", "lecture", "slide_id", "kind", "claim", "coverage", "grounded"
+    ])
+
+def hallucination_rates(claims_df, by=("model", "lecture", "kind")):
+    grouped = claims_df.groupby(list(by), sort=False)["grounded"]
+    df = grouped.agg(claims="size", grounded="sum").reset_index()
+    df["ungrounded"] = df["claims"] - df["grounded"]
+    df["hallucination_rate"] = df["ungrounded"] / df["claims"]
+    return df
+
+def model_summary(claims_df):
+    overall = hallucination_rates(claims_df, by=("model",)).set_index("model")
+    by_kind = hallucination_rates(claims_df, by=("model", "kind")).pivot(
+        index="model", columns="kind", values="hallucination_rate"
+    )
+    by_kind = by_kind.reindex(columns=["term", "evidence", "triple_evidence"])
+    return [
+        {
+            "model": model,
+            "claims": int(overall.at[model, "claims"]),
+            **{f"{kind}_rate": by_kind.at[model, kind] for kind in by_kind.columns},
+            "hallucination_rate": overall.at[model, "hallucination_rate"],
+        }
+        for model in overall.index
+    ]
+
+def check_grounding(root=MODEL_OUTPUT_ROOT, threshold=THRESHOLD, out_dir=DATA_DIR,
+                    table_dir=TABLE_DIR, repaired_path=None, store=None):
+    t0 = time.perf_counter()
+    data = load_dataset(store=store)
+    outputs = load_model_outputs(root)
+    repaired = load_repaired(repaired_path) if repaired_path else None
+    indexes = build_indexes(data)
+    t1 = time.perf_counter()
+
+    claims_df = check_claims(outputs, indexes, threshold, repaired=repaired)
+    per_lecture = hallucination_rates(claims_df)
+    summary = model_summary(claims_df)
+    t2 = time.perf_counter()
+
+    ensure_dir(out_dir)
+    claims_df.to_csv(f"{out_dir}/grounding_claims.csv", index=False)
+    per_lecture.to_csv(f"{out_dir}/grounding_per_lecture.csv", index=False)
+    write_table(GROUNDING_TABLE, summary, table_dir, formats=("tex", "md"))
+
+    logging.info(
+        f"[grounding] {len(claims_df)} claims from {len(outputs)} output files checked "
+        f"against {len(indexes)} slides: load+index {t1 - t0:.2f}s, match {t2 - t1:.2f}s"
+    )
+    for row in summary:
+        logging.info(
+            f"[grounding] {row['model']}: {row['hallucination_rate']:.1%} of "
+            f"{row['claims']} claims not found in the narration"
+        )
+    print(f"✔ Grounding checked: {len(claims_df)} claims (see {out_dir}/grounding_per_lecture.csv).")
+    return per_lecture
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check model concepts / evidence against the slide narration"
+    )
+    parser.add_argument("--root", default=str(MODEL_OUTPUT_ROOT), help="model output directory")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="n-gram coverage at or above which a claim counts as grounded")
+    parser.add_argument("--repaired", action="store_true",
+                        help=f"check the re-parsed responses in {REPAIRED_FILE} "
+                             "(run repair_outputs.py first)")
+    parser.add_argument("--store", nargs="?", const=str(STORE_PATH), default=None,
+                        help="read the slides from the SQLite store (dataset_store.py build)")
+    args = parser.parse_args()
+
+    setup_logging()
+    check_grounding(args.root, args.threshold,
+                    repaired_path=REPAIRED_FILE if args.repaired else None, store=args.store)
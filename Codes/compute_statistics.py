@@ -1,89 +1,99 @@
 # DatasetPaper/code/compute_statistics.py
 
-import pandas as pd
-from collections import Counter
+import json
+import argparse
 from utils import (
-    ensure_dir, tokenize, sentence_split, count_technical_terms,
-    generate_wordcloud
+    ensure_dir, tokenize, sentence_split, generate_wordcloud, setup_logging,
+    CT_TERMS
 )
-from load_data import load_dataset, parse_lecture_num, parse_slide_num
+from artifact_cache import get_cache
+from load_data import load_dataset, parse_lecture_num
+from stats_kernel import TokenCount, SentenceCount, TermCounts, Vocabulary, FrequencySketch
+from stats_snapshots import collect_statistics
+from paths import DATA_DIR, FIGURE_DIR, STORE_PATH
 
-def compute_statistics():
-    data = load_dataset()
-
-    per_slide = []
-    per_lecture = []
-
-    global_vocab = Counter()
-    combined_text = ""
+def compute_statistics(approximate=False, store=None):
+    data = load_dataset(store=store)
 
     # ----------------------------------------------
-    # Compute per-slide + per-lecture statistics
+    # Compute per-slide + per-lecture statistics (single pass per lecture,
+    # reusing the snapshot of every lecture whose texts are unchanged)
     # ----------------------------------------------
-    for lecture_id, slides in data.items():
-
-        lecture_num = parse_lecture_num(lecture_id)
-        lecture_token_count = 0
-        lecture_vocab = Counter()
-
-        for slide in slides:
-            text = slide["text"]
-            tokens = tokenize(text)
-            sentences = sentence_split(text)
-            tech_terms = count_technical_terms(text)
-
-            global_vocab.update(tokens)
-            lecture_vocab.update(tokens)
-            combined_text += " " + text
-
-            per_slide.append({
-                "lecture": lecture_id,
-                "lecture_num": lecture_num,
-                "slide_id": slide["slide_id"],
-                "slide_num": slide["slide_num"],
-                "num_tokens": len(tokens),
-                "num_sentences": len(sentences),
-                **tech_terms
-            })
-
-            lecture_token_count += len(tokens)
+    def make_accumulators():
+        accumulators = [
+            TokenCount("num_tokens"),
+            SentenceCount(sentence_split, "num_sentences"),
+            TermCounts(CT_TERMS),
+            Vocabulary(approximate=approximate),
+        ]
+        if approximate:
+            accumulators.append(FrequencySketch())
+        return accumulators
+
+    texts_by_path = {slide["text_path"]: slide["text"] for slide in data.records()}
+    slide_metrics, lecture_metrics, accumulators = collect_statistics(
+        {lecture_id: [s["text_path"] for s in slides] for lecture_id, slides in data.items()},
+        "statistics-approx" if approximate else "statistics",
+        make_accumulators,
+        tokenizer=tokenize,
+        load_texts=lambda paths: [texts_by_path[p] for p in paths],
+    )
+    vocab = accumulators[3]
 
-        per_lecture.append({
-            "lecture": lecture_id,
-            "lecture_num": lecture_num,
-            "num_slides": len(slides),
-            "num_tokens": lecture_token_count,
-            "vocab_size": len(lecture_vocab),
-        })
+    combined_text = "".join(" " + slide["text"] for slide in data.records())
 
     # ----------------------------------------------
     # Convert to sorted DataFrames
     # ----------------------------------------------
-    df_slide = pd.DataFrame(per_slide).sort_values(
-        ["lecture_num", "slide_num"]
-    )
-    df_lecture = pd.DataFrame(per_lecture).sort_values(
-        ["lecture_num"]
-    )
+    df_slide = data.to_frame()
+    for column in ["num_tokens", "num_sentences", *CT_TERMS]:
+        df_slide[column] = slide_metrics[column].to_numpy()
+    df_slide = df_slide.sort_values(["lecture_num", "slide_num"])
+
+    df_lecture = lecture_metrics.reset_index()
+    df_lecture.insert(1, "lecture_num", df_lecture["lecture"].map(parse_lecture_num))
+    df_lecture = df_lecture[
+        ["lecture", "lecture_num", "num_slides", "num_tokens", "vocab_size"]
+    ].sort_values(["lecture_num"])
 
     # ----------------------------------------------
     # Save outputs
     # ----------------------------------------------
-    ensure_dir("../data")
-    df_slide.to_csv("../data/per_slide_stats.csv", index=False)
-    df_lecture.to_csv("../data/per_lecture_stats.csv", index=False)
-
-    with open("../data/vocabulary_stats.json", "w", encoding="utf-8") as f:
-        import json
-        json.dump(dict(global_vocab), f, indent=2)
+    ensure_dir(DATA_DIR)
+    df_slide.to_csv(DATA_DIR / "per_slide_stats.csv", index=False)
+    df_lecture.to_csv(DATA_DIR / "per_lecture_stats.csv", index=False)
+
+    with open(DATA_DIR / "vocabulary_stats.json", "w", encoding="utf-8") as f:
+        if approximate:
+            # Bounded output: sketch estimates + heavy hitters, with error bounds
+            freqs = accumulators[4]
+            json.dump({
+                "approximate": True,
+                "vocab_size": vocab.corpus_size(),
+                "vocab_size_rel_error": vocab.relative_error,
+                "count_error_bound": freqs.error_bound,
+                "count_error_delta": freqs.heavy.sketch.delta,
+                "top_terms": dict(freqs.most_common()),
+            }, f, indent=2)
+        else:
+            json.dump(dict(vocab.corpus_counts()), f, indent=2)
 
     # ----------------------------------------------
     # Generate word cloud
     # ----------------------------------------------
-    generate_wordcloud(combined_text, "../figures/fig_wordcloud.png")
+    generate_wordcloud(combined_text, FIGURE_DIR / "fig_wordcloud.png")
+    get_cache().log_stats("statistics")
 
     print("✔ Statistics computed successfully.")
 
 
 if __name__ == "__main__":
-    compute_statistics()
+    parser = argparse.ArgumentParser(description="Per-slide and per-lecture statistics")
+    parser.add_argument("--approximate", action="store_true",
+                        help="sketch-based vocabulary statistics (bounded memory and output)")
+    parser.add_argument("--store", nargs="?", const=str(STORE_PATH), default=None,
+                        help="read the slides from the SQLite store (dataset_store.py build)")
+    args = parser.parse_args()
+
+    setup_logging()
+    compute_statistics(approximate=args.approximate, store=args.store)
@@ -0,0 +1,349 @@
+# DatasetPaper/code/dataset_store.py
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import argparse
+from pathlib import Path
+
+import pandas as pd
+from PIL import Image
+
+from artifact_cache import make_key
+from bulk_io import read_many, prefer_derivative
+from load_data import load_dataset, parse_lecture_num
+from model_outputs import (
+    load_model_outputs, list_output_files, iter_entries, concept_items, triple_items
+)
+from paths import STORE_PATH, DATASET_ROOT, MODEL_OUTPUT_ROOT
+from slide_table import SlideTable
+from utils import tokenize, sentence_split, setup_logging
+
+# ------------------------------------------------------
+# Schema: one row per lecture / slide, per-slide stats and image metadata
+# keyed by the slide row, and the model concepts / triples flattened to
+# one row per item. Terms compare case-insensitively (COLLATE NOCASE), so
+# the term index serves "concept = 'sinogram'" lookups directly. The meta
+# table holds the fingerprints of the files the store was built from.
+# ------------------------------------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lectures (
+    lecture      TEXT PRIMARY KEY,
+    lecture_num  INTEGER NOT NULL,
+    num_slides   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS slides (
+    id           INTEGER PRIMARY KEY,
+    lecture      TEXT NOT NULL REFERENCES lectures(lecture),
+    slide_id     TEXT NOT NULL,
+    slide_num    INTEGER NOT NULL,
+    image_path   TEXT NOT NULL,
+    text_path    TEXT NOT NULL,
+    text         TEXT NOT NULL,
+    UNIQUE (lecture, slide_id)
+);
+CREATE TABLE IF NOT EXISTS slide_stats (
+    slide          INTEGER PRIMARY KEY REFERENCES slides(id),
+    num_tokens     INTEGER NOT NULL,
+    num_sentences  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS images (
+    slide         INTEGER PRIMARY KEY REFERENCES slides(id),
+    bytes         INTEGER,
+    width         INTEGER,
+    height        INTEGER,
+    format        TEXT,
+    derived_path  TEXT
+);
+CREATE TABLE IF NOT EXISTS concepts (
+    id        INTEGER PRIMARY KEY,
+    slide     INTEGER NOT NULL REFERENCES slides(id),
+    model     TEXT NOT NULL,
+    term      TEXT NOT NULL COLLATE NOCASE,
+    category  TEXT COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS triples (
+    id          INTEGER PRIMARY KEY,
+    slide       INTEGER NOT NULL REFERENCES slides(id),
+    model       TEXT NOT NULL,
+    subject     TEXT NOT NULL COLLATE NOCASE,
+    predicate   TEXT NOT NULL COLLATE NOCASE,
+    object      TEXT NOT NULL COLLATE NOCASE,
+    confidence  REAL,
+    modalities  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_slides_lecture ON slides(lecture, slide_num);
+CREATE INDEX IF NOT EXISTS idx_stats_tokens ON slide_stats(num_tokens);
+CREATE INDEX IF NOT EXISTS idx_concepts_term ON concepts(term, model);
+CREATE INDEX IF NOT EXISTS idx_concepts_slide ON concepts(slide);
+CREATE INDEX IF NOT EXISTS idx_triples_slide ON triples(slide);
+CREATE INDEX IF NOT EXISTS idx_triples_subject ON triples(subject, predicate);
+CREATE INDEX IF NOT EXISTS idx_triples_object ON triples(object, predicate);
+"""
+
+TABLES = ("triples", "concepts", "images", "slide_stats", "slides", "lectures", "meta")
+
+def connect(path=STORE_PATH):
+    # WAL: readers keep working (on the previous snapshot) while a build
+    # rewrites the tables
+    path = os.fspath(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+# ------------------------------------------------------
+# Freshness: stat-only fingerprints (names, sizes, mtimes) of the lecture
+# folders and the model outputs, recorded at build time and compared on
+# open, so a store is never served after the files it came from changed
+# ------------------------------------------------------
+def dataset_fingerprint(root=DATASET_ROOT):
+    entries = []
+    for lecture in sorted(d for d in Path(root).iterdir() if d.is_dir()):
+        for sub in ("Images", "Texts"):
+            folder = lecture / sub
+            if folder.is_dir():
+                for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+                    st = entry.stat()
+                    entries.append((lecture.name, sub, entry.name, st.st_size, st.st_mtime_ns))
+    return make_key("dataset", entries)
+
+def outputs_fingerprint(root=MODEL_OUTPUT_ROOT):
+    entries = []
+    for path in list_output_files(root):
+        st = os.stat(path)
+        entries.append((path.parent.name, path.name, st.st_size, st.st_mtime_ns))
+    return make_key("outputs", entries)
+
+# ------------------------------------------------------
+# Build: everything is gathered first, then written in one transaction
+# with executemany per table
+# ------------------------------------------------------
+def _image_info(path):
+    # Header only: PIL reads the size without decoding the pixels
+    with Image.open(path) as img:
+        width, height, fmt = img.width, img.height, img.format
+    derived = prefer_derivative(path)
+    return (os.path.getsize(path), width, height, fmt,
+            str(derived) if str(derived) != str(path) else None)
+
+def _slide_rows(data):
+    slide_rows, stats_rows = [], []
+    for row, record in enumerate(data.records(), start=1):
+        text = record["text"]
+        slide_rows.append((row, record["lecture"], record["slide_id"], record["slide_num"],
+                           record["image_path"], record["text_path"], text))
+        stats_rows.append((row, len(tokenize(text)), len(sentence_split(text))))
+    return slide_rows, stats_rows
+
+def _output_rows(outputs, slide_ids, repaired=None):
+    concepts, triples, unmatched = [], [], set()
+    for lecture, slide_id, model, task, entry in iter_entries(outputs):
+        slide = slide_ids.get((lecture, slide_id))
+        if slide is None:
+            unmatched.add((lecture, slide_id))
+            continue
+        parsed = entry.get("parsed")
+        if repaired is not None:
+            parsed = repaired.get((lecture, slide_id, model, task), parsed)
+        if task == "concepts":
+            concepts += [
+                (slide, model, c["term"].strip(),
+                 c["category"] if isinstance(c.get("category"), str) else None)
+                for c in concept_items(parsed)
+                if isinstance(c.get("term"), str) and c["term"].strip()
+            ]
+        elif task == "triples":
+            for t in triple_items(parsed):
+                if not all(isinstance(t.get(k), str) for k in ("s", "p", "o")):
+                    continue
+                try:
+                    confidence = float(t["confidence"]) if t.get("confidence") is not None else None
+                except (TypeError, ValueError):
+                    confidence = None
+                modalities = t.get("modalities")
+                triples.append((slide, model, t["s"], t["p"], t["o"], confidence,
+                                json.dumps(modalities) if modalities is not None else None))
+    if unmatched:
+        logging.warning(f"[store] {len(unmatched)} output slides have no dataset slide; skipped")
+    return concepts, triples
+
+def build_store(path=STORE_PATH, with_outputs=True, repaired=None):
+    t0 = time.perf_counter()
+    # Fingerprinted before reading, so an edit during the build leaves the
+    # store stale rather than looking fresh
+    meta = {"dataset": dataset_fingerprint(), "built": time.strftime("%Y-%m-%d %H:%M:%S")}
+    if with_outputs:
+        meta["outputs"] = outputs_fingerprint()
+    data = load_dataset()
+    slide_rows, stats_rows = _slide_rows(data)
+    image_rows = read_many(
+        [r[4] for r in slide_rows], _image_info,
+        on_error=lambda p, exc: logging.warning(f"[store] no image metadata for {p} ({exc})"),
+    )
+    image_rows = [(r[0], *info) for r, info in zip(slide_rows, image_rows) if info is not None]
+
+    concepts, triples = [], []
+    if with_outputs:
+        slide_ids = {(r[1], r[2]): r[0] for r in slide_rows}
+        concepts, triples = _output_rows(load_model_outputs(), slide_ids, repaired)
+    t1 = time.perf_counter()
+
+    conn = connect(path)
+    try:
+        with conn:
+            for table in TABLES:
+                conn.execute(f"DELETE FROM {table}")
+            conn.executemany("INSERT INTO lectures VALUES (?, ?, ?)", [
+                (lid, parse_lecture_num(lid), len(slides)) for lid, slides in data.items()
+            ])
+            conn.executemany("INSERT INTO slides VALUES (?, ?, ?, ?, ?, ?, ?)", slide_rows)
+            conn.executemany("INSERT INTO slide_stats VALUES (?, ?, ?)", stats_rows)
+            conn.executemany("INSERT INTO images VALUES (?, ?, ?, ?, ?, ?)", image_rows)
+            conn.executemany("INSERT INTO concepts (slide, model, term, category) "
+                             "VALUES (?, ?, ?, ?)", concepts)
+            conn.executemany("INSERT INTO triples (slide, model, subject, predicate, object, "
+                             "confidence, modalities) VALUES (?, ?, ?, ?, ?, ?, ?)", triples)
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    t2 = time.perf_counter()
+
+    counts = {"lectures": len(data), "slides": len(slide_rows), "images": len(image_rows),
+              "concepts": len(concepts), "triples": len(triples)}
+    logging.info(f"[store] {counts} -> {path}: gather {t1 - t0:.2f}s, insert {t2 - t1:.2f}s")
+    return counts
+
+# ------------------------------------------------------
+# Read API
+# ------------------------------------------------------
+class DatasetStore:
+    def __init__(self, path=STORE_PATH, check_fresh=True):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; run dataset_store.py build first")
+        self.path = path
+        self.conn = connect(path)
+        if check_fresh:
+            stale = self.stale_parts()
+            if stale:
+                self.close()
+                raise RuntimeError(f"{path} is out of date ({' and '.join(stale)} changed since "
+                                   f"it was built); rerun dataset_store.py build")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def stale_parts(self):
+        # What changed on disk since the build (a store without fingerprints
+        # predates them and counts as stale)
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        stale = []
+        if meta.get("dataset") != dataset_fingerprint():
+            stale.append("the lecture files")
+        if "outputs" in meta and meta["outputs"] != outputs_fingerprint():
+            stale.append("the model outputs")
+        return stale
+
+    def query(self, sql, params=()):
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def lectures(self):
+        return self.query("SELECT * FROM lectures ORDER BY lecture_num")
+
+    def slide_table(self):
+        # Same SlideTable load_dataset() returns, from two ordered scans
+        lectures = self.conn.execute(
+            "SELECT lecture, lecture_num, num_slides FROM lectures ORDER BY lecture_num"
+        ).fetchall()
+        rows = self.conn.execute(
+            "SELECT s.slide_id, s.slide_num, s.image_path, s.text_path, s.text "
+            "FROM slides s JOIN lectures l USING (lecture) ORDER BY l.lecture_num, s.slide_num"
+        ).fetchall()
+        columns = list(zip(*rows)) if rows else [[]] * 5
+        return SlideTable([l[0] for l in lectures], [l[1] for l in lectures],
+                          [l[2] for l in lectures], *columns)
+
+    def slide_stats(self, lecture=None):
+        sql = ("SELECT s.lecture, s.slide_id, s.slide_num, t.num_tokens, t.num_sentences "
+               "FROM slides s JOIN slide_stats t ON t.slide = s.id")
+        if lecture is not None:
+            return self.query(sql + " WHERE s.lecture = ? ORDER BY s.slide_num", (lecture,))
+        return self.query(sql + " ORDER BY s.id")
+
+    def concepts(self, term=None, model=None):
+        where, params = [], []
+        if term is not None:
+            where.append("c.term = ?")
+            params.append(term)
+        if model is not None:
+            where.append("c.model = ?")
+            params.append(model)
+        return self.query(
+            "SELECT s.lecture, s.slide_id, c.model, c.term, c.category "
+            "FROM concepts c JOIN slides s ON s.id = c.slide"
+            + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY c.slide",
+            params,
+        )
+
+    def slides_with_concept(self, term, model=None, min_tokens=0):
+        # e.g. slides with > 500 tokens whose InternVL concepts include
+        # "sinogram": slides_with_concept("sinogram", "OpenGVLab__InternVL3-14B", 501)
+        return self.query(
+            "SELECT DISTINCT s.lecture, s.slide_id, t.num_tokens "
+            "FROM concepts c JOIN slides s ON s.id = c.slide "
+            "JOIN slide_stats t ON t.slide = c.slide "
+            "WHERE c.term = :term AND (:model IS NULL OR c.model = :model) "
+            "AND t.num_tokens >= :min_tokens ORDER BY s.id",
+            {"term": term, "model": model, "min_tokens": min_tokens},
+        )
+
+    def models(self):
+        return [m for (m,) in self.conn.execute(
+            "SELECT DISTINCT model FROM concepts UNION SELECT DISTINCT model FROM triples"
+        )]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consolidated SQLite store of the dataset")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="(re)build the store from the dataset files")
+    build.add_argument("--no-outputs", action="store_true", help="skip the model outputs")
+    build.add_argument("--repaired", action="store_true",
+                       help="store the re-parsed responses (run repair_outputs.py first)")
+    query = sub.add_parser("query", help="run one SQL query and print the result")
+    query.add_argument("sql")
+    query.add_argument("--stale-ok", action="store_true",
+                       help="query the store even if the files changed since the build")
+    parser.add_argument("--db", default=str(STORE_PATH), help="database file")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.command == "build":
+        repaired = None
+        if args.repaired:
+            from repair_outputs import REPAIRED_FILE, load_repaired
+            repaired = load_repaired(REPAIRED_FILE)
+        counts = build_store(args.db, with_outputs=not args.no_outputs, repaired=repaired)
+        print(f"✔ Store built: {', '.join(f'{v} {k}' for k, v in counts.items())} ({args.db}).")
+    else:
+        with DatasetStore(args.db, check_fresh=not args.stale_ok) as store:
+            t0 = time.perf_counter()
+            df = store.query(args.sql)
+            print(df.to_string(index=False))
+            print(f"({len(df)} rows, {1000 * (time.perf_counter() - t0):.1f} ms)")
@@ -0,0 +1,145 @@
+# DatasetPaper/code/doc_term.py
+
+import os
+import re
+import pickle
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from paths import OUTPUT_DIR
+
+TERM_COUNT_CACHE = OUTPUT_DIR / "term_counts.pkl"
+
+# Same token pattern as the alignment TF-IDF: lowercase words of 2+
+# characters starting with a letter, hyphenated terms ("k-space") kept whole
+TERM_RE = re.compile(r"\b[a-z][a-z0-9\-]+\b")
+
+def terms(text, stop_words=ENGLISH_STOP_WORDS):
+    return [t for t in TERM_RE.findall(text.lower()) if t not in stop_words]
+
+# The token pattern and stop-word list the cached counts were made with
+TOKENIZER_KEY = hashlib.blake2b(
+    "\n".join([TERM_RE.pattern, *sorted(ENGLISH_STOP_WORDS)]).encode("utf-8"), digest_size=16
+).hexdigest()
+
+# ------------------------------------------------------
+# Per-slide term counts, cached by text hash: the matrix for a new or
+# edited lecture only tokenizes its own slides. The cache file records
+# TOKENIZER_KEY and is discarded when the tokenizer changed.
+# ------------------------------------------------------
+def _text_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+class TermCountCache:
+    def __init__(self, path=TERM_COUNT_CACHE):
+        self.path = Path(path)
+        try:
+            with open(self.path, "rb") as f:
+                saved = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            saved = None
+        if isinstance(saved, dict) and saved.get("tokenizer") == TOKENIZER_KEY:
+            self.counts = saved["counts"]
+        else:
+            self.counts = {}
+        self.new = 0
+
+    def get(self, text):
+        # -> (terms, counts) of one slide
+        h = _text_hash(text)
+        entry = self.counts.get(h)
+        if entry is None:
+            found, counts = np.unique(np.array(terms(text), dtype=object), return_counts=True)
+            entry = self.counts[h] = (tuple(found), counts.astype(np.int32))
+            self.new += 1
+        return entry
+
+    def save(self):
+        if not self.new:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({"tokenizer": TOKENIZER_KEY, "counts": self.counts}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+        self.new = 0
+
+# ------------------------------------------------------
+# Document-term matrix: one CSR float32 row per slide
+# ------------------------------------------------------
+class DocTermMatrix:
+    def __init__(self, matrix, vocabulary, lectures, lecture_idx, slide_ids):
+        self.matrix = matrix              # slides x terms, raw counts
+        self.vocabulary = vocabulary      # column -> term
+        self.lectures = lectures          # lecture ids, in table order
+        self.lecture_idx = lecture_idx    # row -> index into lectures
+        self.slide_ids = slide_ids
+
+    def lecture_matrix(self):
+        # lectures x terms: every lecture's counts in one sparse product
+        n_rows = self.matrix.shape[0]
+        indicator = sp.csr_matrix(
+            (np.ones(n_rows, dtype=np.float32), (self.lecture_idx, np.arange(n_rows))),
+            shape=(len(self.lectures), n_rows),
+        )
+        return (indicator @ self.matrix).tocsr()
+
+    def restrict(self, min_df=1, max_df=1.0):
+        # Keep terms in at least min_df slides and at most max_df of them
+        df = np.bincount(self.matrix.indices, minlength=self.matrix.shape[1])
+        keep = (df >= min_df) & (df <= max_df * self.matrix.shape[0])
+        return DocTermMatrix(self.matrix[:, keep], [t for t, k in zip(self.vocabulary, keep) if k],
+                             self.lectures, self.lecture_idx, self.slide_ids)
+
+    def project(self, vocabulary):
+        # Columns re-indexed to another vocabulary (terms it lacks are dropped)
+        position = {t: i for i, t in enumerate(vocabulary)}
+        cols = np.array([position.get(t, -1) for t in self.vocabulary], dtype=np.int64)
+        coo = self.matrix.tocoo()
+        known = cols[coo.col] >= 0
+        matrix = sp.csr_matrix(
+            (coo.data[known], (coo.row[known], cols[coo.col[known]])),
+            shape=(self.matrix.shape[0], len(vocabulary)), dtype=np.float32,
+        )
+        return DocTermMatrix(matrix, list(vocabulary), self.lectures, self.lecture_idx,
+                             self.slide_ids)
+
+def build_doc_term_matrix(data, cache_path=TERM_COUNT_CACHE):
+    # data: SlideTable (load_data.load_dataset)
+    cache = TermCountCache(cache_path)
+    vocab = {}
+    indptr, indices, values = [0], [], []
+    for row in range(data.num_slides):
+        found, counts = cache.get(data.texts[row])
+        indices.extend(vocab.setdefault(t, len(vocab)) for t in found)
+        values.append(counts)
+        indptr.append(len(indices))
+    tokenized = cache.new
+    cache.save()
+
+    # Columns in alphabetical order, so the matrix is the same whatever
+    # order the slides were first seen in
+    vocabulary = sorted(vocab)
+    order = np.empty(len(vocab), dtype=np.int64)
+    order[[vocab[t] for t in vocabulary]] = np.arange(len(vocabulary))
+    matrix = sp.csr_matrix(
+        (np.concatenate(values).astype(np.float32) if values else np.zeros(0, np.float32),
+         order[np.asarray(indices, dtype=np.int64)], np.asarray(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, len(vocabulary)),
+    )
+    matrix.sort_indices()
+
+    logging.info(
+        f"[doc-term] {matrix.shape[0]} slides x {matrix.shape[1]} terms, {matrix.nnz} non-zeros "
+        f"({tokenized} slides tokenized)"
+    )
+    return DocTermMatrix(matrix, vocabulary, list(data.lecture_ids),
+                         np.asarray(data.lecture_idx),
+                         [data.slide_ids[r] for r in range(data.num_slides)])
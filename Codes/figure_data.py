@@ -0,0 +1,141 @@
+# DatasetPaper/code/figure_data.py
+
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+
+# ------------------------------------------------------
+# Figure data: everything a plot needs, computed once with NumPy
+# and stored as a small .npz. Renderers below only draw these arrays,
+# so restyling a figure never touches the per-slide data again.
+# ------------------------------------------------------
+KDE_GRID_SIZE = 512
+
+def histogram_data(values, bins=40, kde=False, grid_size=KDE_GRID_SIZE):
+    values = np.asarray(values, dtype=np.float64)
+    counts, edges = np.histogram(values, bins=bins)
+    data = {"counts": counts.astype(np.int64), "edges": edges, "n": np.int64(values.size)}
+    if kde:
+        grid, density = kde_fft(values, grid_size=grid_size)
+        # Scale density to the count axis, like seaborn's histplot(kde=True)
+        data["kde_x"] = grid
+        data["kde_y"] = density * values.size * (edges[1] - edges[0])
+    return data
+
+def kde_fft(values, grid_size=KDE_GRID_SIZE, bandwidth=None, cut=0.0):
+    """Gaussian KDE on a fixed grid: linear binning + one FFT convolution.
+
+    O(n + g log g) instead of O(n * g); bandwidth defaults to Scott's rule.
+    The curve is returned over [min - cut*h, max + cut*h].
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.size < 2 or np.ptp(values) == 0:
+        return np.zeros(0), np.zeros(0)
+
+    h = bandwidth or values.std(ddof=1) * values.size ** (-1 / 5)
+    # Pad the grid by 4 bandwidths so no kernel mass wraps around
+    lo, hi = values.min() - 4 * h, values.max() + 4 * h
+    grid = np.linspace(lo, hi, grid_size)
+    dx = grid[1] - grid[0]
+
+    # Linear binning: split each sample's weight between its two grid neighbours
+    pos = (values - lo) / dx
+    left = np.floor(pos).astype(np.int64)
+    frac = pos - left
+    weights = np.bincount(left, 1 - frac, minlength=grid_size)
+    weights += np.bincount(left + 1, frac, minlength=grid_size + 1)[:grid_size]
+
+    offsets = np.arange(-grid_size + 1, grid_size) * dx
+    kernel = np.exp(-0.5 * (offsets / h) ** 2) / (h * np.sqrt(2 * np.pi))
+
+    size = 1 << int(np.ceil(np.log2(weights.size + kernel.size - 1)))
+    conv = np.fft.irfft(np.fft.rfft(weights, size) * np.fft.rfft(kernel, size), size)
+    density = np.clip(conv[grid_size - 1:2 * grid_size - 1], 0, None) / values.size
+
+    keep = (grid >= values.min() - cut * h) & (grid <= values.max() + cut * h)
+    return grid[keep], density[keep]
+
+def bar_data(labels, values):
+    return {
+        "labels": np.asarray([str(label) for label in labels]),
+        "values": np.asarray(values, dtype=np.float64),
+    }
+
+# ------------------------------------------------------
+# .npz storage (atomic, so a half-written file is never drawn)
+# ------------------------------------------------------
+def save_figure_data(path, data):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".npz")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, **data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def load_figure_data(path):
+    with np.load(path, allow_pickle=False) as npz:
+        return {key: npz[key] for key in npz.files}
+
+# ------------------------------------------------------
+# Renderers (draw only; no statistics in here). They use Figure objects
+# rather than pyplot's global state so stages can render in parallel.
+# ------------------------------------------------------
+def draw_hist(data, title, xlabel, path, color="steelblue", figsize=(10, 6), dpi=None):
+    edges = data["edges"]
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    ax.bar(edges[:-1], data["counts"], width=np.diff(edges), align="edge",
+           color=color, alpha=0.6 if "kde_x" in data else 1.0)
+    if "kde_x" in data and data["kde_x"].size:
+        ax.plot(data["kde_x"], data["kde_y"], color=color)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Count")
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi or "figure")
+
+def draw_bar(data, title, path, color=None, rotation=60, ha="right",
+             figsize=(12, 6), ylabel=None, dpi=None):
+    labels, values = data["labels"], data["values"]
+    if isinstance(color, str) and color in matplotlib.colormaps:
+        color = matplotlib.colormaps[color](np.linspace(0, 1, max(len(values), 1)))
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    ax.bar(labels, values, color=color)
+    ax.tick_params(axis="x", labelrotation=rotation)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment(ha)
+    ax.set_title(title)
+    if ylabel:
+        ax.set_ylabel(ylabel)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi or "figure")
+
+def draw_heatmap(matrix, row_labels, col_labels, title, path, cmap="viridis",
+                 figsize=(12, 8), xlabel=None, ylabel=None, colorbar_label=None, dpi=None):
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    im = ax.imshow(matrix, aspect="auto", cmap=cmap, interpolation="nearest")
+    ax.set_xticks(np.arange(len(col_labels)))
+    ax.set_xticklabels(col_labels, rotation=90)
+    ax.set_yticks(np.arange(len(row_labels)))
+    ax.set_yticklabels(row_labels)
+    cbar = fig.colorbar(im, ax=ax)
+    if colorbar_label:
+        cbar.set_label(colorbar_label)
+    ax.set_title(title)
+    if xlabel:
+        ax.set_xlabel(xlabel)
+    if ylabel:
+        ax.set_ylabel(ylabel)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi or "figure")
@@ -1,69 +1,87 @@
 # DatasetPaper/code/generate_figures.py
 
+import argparse
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from utils import save_fig, ensure_dir
+from utils import ensure_dir, CT_TERMS
+from paths import DATA_DIR, FIGURE_DIR
+from figure_data import (
+    histogram_data, bar_data, save_figure_data, load_figure_data, draw_hist, draw_bar
+)
 
-def generate_all_figures():
-    ensure_dir("../figures")
+FIGURE_DATA_DIR = DATA_DIR / "figure_data"
+
+# --------------------------------------------------
+# Figure data: histograms, KDE curves and bar values computed once
+# from the statistics CSVs and stored as .npz
+# --------------------------------------------------
+def compute_figure_data():
+    df_lec = pd.read_csv(DATA_DIR / "per_lecture_stats.csv")
+    df_slide = pd.read_csv(DATA_DIR / "per_slide_stats.csv")
+
+    tech_cols = [c for c in CT_TERMS if c in df_slide.columns]
+    term_counts = df_slide[tech_cols].sum()
+
+    figure_data = {
+        "slides_per_lecture": bar_data(df_lec["lecture"], df_lec["num_slides"]),
+        "token_distribution": histogram_data(df_slide["num_tokens"], bins=40, kde=True),
+        "topic_distribution": bar_data(term_counts.index, term_counts.values),
+        "sentence_distribution": histogram_data(df_slide["num_sentences"], bins=30, kde=True),
+        "tokens_per_lecture": bar_data(df_lec["lecture"], df_lec["num_tokens"]),
+    }
+    for name, data in figure_data.items():
+        save_figure_data(FIGURE_DATA_DIR / f"{name}.npz", data)
 
-    df_lec = pd.read_csv("../data/per_lecture_stats.csv")
-    df_slide = pd.read_csv("../data/per_slide_stats.csv")
+def load(name):
+    return load_figure_data(FIGURE_DATA_DIR / f"{name}.npz")
+
+# --------------------------------------------------
+# Rendering only draws the precomputed arrays
+# --------------------------------------------------
+def generate_all_figures():
+    ensure_dir(FIGURE_DIR)
 
     # --------------------------------------------------
     # Figure 1: Slides per lecture
     # --------------------------------------------------
-    plt.figure(figsize=(12,5))
-    sns.barplot(x="lecture_num", y="num_slides", data=df_lec, palette="viridis")
-    plt.xticks(df_lec["lecture_num"], df_lec["lecture"], rotation=90)
-    plt.title("Slides per Lecture")
-    save_fig("../figures/fig_slides_per_lecture.png")
+    draw_bar(load("slides_per_lecture"), "Slides per Lecture",
+             FIGURE_DIR / "fig_slides_per_lecture.png",
+             color="viridis", rotation=90, ha="center", figsize=(12,5), dpi=300)
 
     # --------------------------------------------------
     # Figure 2: Token distribution
     # --------------------------------------------------
-    plt.figure(figsize=(10,5))
-    sns.histplot(df_slide["num_tokens"], bins=40, kde=True, color="blue")
-    plt.title("Token Distribution per Slide")
-    save_fig("../figures/fig_token_distribution.png")
+    draw_hist(load("token_distribution"), "Token Distribution per Slide", "num_tokens",
+              FIGURE_DIR / "fig_token_distribution.png", color="blue", figsize=(10,5), dpi=300)
 
     # --------------------------------------------------
     # Figure 3: Technical term distribution
     # --------------------------------------------------
-    tech_cols = [
-        c for c in df_slide.columns 
-        if c in ["ct","sinogram","radon","attenuation","convolution","fourier",
-                 "reconstruction","artifact","noise","dose","projection",
-                 "transform","detector","collimator","beam"]
-    ]
-
-    term_counts = df_slide[tech_cols].sum()
-
-    plt.figure(figsize=(14,6))
-    sns.barplot(x=term_counts.index, y=term_counts.values)
-    plt.title("Technical Term Frequency")
-    plt.xticks(rotation=90)
-    save_fig("../figures/fig_topic_distribution.png")
+    draw_bar(load("topic_distribution"), "Technical Term Frequency",
+             FIGURE_DIR / "fig_topic_distribution.png",
+             rotation=90, ha="center", figsize=(14,6), dpi=300)
 
     # --------------------------------------------------
     # Figure 4: Sentence count distribution
     # --------------------------------------------------
-    plt.figure(figsize=(10,5))
-    sns.histplot(df_slide["num_sentences"], bins=30, kde=True, color="green")
-    plt.title("Sentence Count Distribution per Slide")
-    save_fig("../figures/fig_sentence_distribution.png")
+    draw_hist(load("sentence_distribution"), "Sentence Count Distribution per Slide",
+              "num_sentences", FIGURE_DIR / "fig_sentence_distribution.png",
+              color="green", figsize=(10,5), dpi=300)
 
     # --------------------------------------------------
     # Figure 5: Tokens per lecture
     # --------------------------------------------------
-    plt.figure(figsize=(10,5))
-    sns.barplot(x="lecture_num", y="num_tokens", data=df_lec)
-    plt.xticks(df_lec["lecture_num"], df_lec["lecture"], rotation=90)
-    plt.title("Tokens per Lecture")
-    save_fig("../figures/fig_tokens_per_lecture.png")
+    draw_bar(load("tokens_per_lecture"), "Tokens per Lecture",
+             FIGURE_DIR / "fig_tokens_per_lecture.png",
+             rotation=90, ha="center", figsize=(10,5), dpi=300)
 
     print("✔ All figures generated successfully.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dataset figures")
+    parser.add_argument("--render-only", action="store_true",
+                        help="redraw from the saved figure data (skip the CSVs)")
+    args = parser.parse_args()
+
+    if not args.render_only:
+        compute_figure_data()
     generate_all_figures()
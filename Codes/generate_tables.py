@@ -1,32 +1,72 @@
 # DatasetPaper/code/generate_tables.py
 
-import pandas as pd
-from utils import ensure_dir
+import csv
+from utils import ensure_dir, setup_logging
+from paths import DATA_DIR, TABLE_DIR
+from table_writer import TableSpec, Column, write_table
 
-def generate_tables():
-    ensure_dir("../data/tables")
+# --------------------------------------------------
+# Table specs (same layout as the builder's tables)
+# --------------------------------------------------
+SUMMARY_TABLE = TableSpec("table_summary", [
+    Column("statistic", "Statistic", align="l"),
+    Column("value", "Value"),
+])
+
+PER_LECTURE_TABLE = TableSpec("table_per_lecture", [
+    Column("lecture", "Lecture", align="l"),
+    Column("num_slides", "Slides"),
+    Column("num_tokens", "Tokens"),
+    Column("vocab_size", "Vocabulary Size"),
+])
+
+PER_SLIDE_TABLE = TableSpec("table_per_slide", [
+    Column("lecture", "Lecture", align="l"),
+    Column("slide_id", "Slide", align="l"),
+    Column("num_tokens", "Tokens", align="r"),
+    Column("num_sentences", "Sentences", align="r"),
+])
+
+def read_rows(path):
+    # Stream CSV rows; no DataFrame in the loop
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
 
-    df_lec = pd.read_csv("../data/per_lecture_stats.csv")
+def generate_tables():
+    ensure_dir(TABLE_DIR)
 
     # --------------------------------------------------
     # Table 1: Dataset summary
     # --------------------------------------------------
-    summary = pd.DataFrame({
-        "Total Lectures": [df_lec.shape[0]],
-        "Total Slides": [df_lec["num_slides"].sum()],
-        "Total Tokens": [df_lec["num_tokens"].sum()],
-        "Avg Slides per Lecture": [df_lec["num_slides"].mean()],
-        "Avg Tokens per Lecture": [df_lec["num_tokens"].mean()]
-    })
+    lectures = slides = tokens = 0
+    for row in read_rows(DATA_DIR / "per_lecture_stats.csv"):
+        lectures += 1
+        slides += int(row["num_slides"])
+        tokens += int(row["num_tokens"])
 
-    summary.to_latex("../data/tables/table_summary.tex", index=False)
+    summary_rows = [
+        {"statistic": "Total Lectures", "value": lectures},
+        {"statistic": "Total Slides", "value": slides},
+        {"statistic": "Total Tokens", "value": tokens},
+        {"statistic": "Avg Slides per Lecture", "value": f"{slides / max(lectures, 1):.2f}"},
+        {"statistic": "Avg Tokens per Lecture", "value": f"{tokens / max(lectures, 1):.2f}"},
+    ]
+    write_table(SUMMARY_TABLE, summary_rows, TABLE_DIR)
 
     # --------------------------------------------------
     # Table 2: Per-lecture stats
     # --------------------------------------------------
-    df_lec.to_latex("../data/tables/table_per_lecture.tex", index=False)
+    write_table(PER_LECTURE_TABLE, lambda: read_rows(DATA_DIR / "per_lecture_stats.csv"),
+                TABLE_DIR, formats=("tex", "csv", "md"))
+
+    # --------------------------------------------------
+    # Table 3: Per-slide stats (streamed; too long for LaTeX)
+    # --------------------------------------------------
+    write_table(PER_SLIDE_TABLE, lambda: read_rows(DATA_DIR / "per_slide_stats.csv"),
+                TABLE_DIR, formats=("csv", "md"))
 
     print("✔ Tables generated.")
 
 if __name__ == "__main__":
+    setup_logging()
     generate_tables()
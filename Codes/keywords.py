@@ -0,0 +1,156 @@
+# DatasetPaper/code/keywords.py
+
+import math
+import time
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from matplotlib.figure import Figure
+
+from utils import ensure_dir, setup_logging
+from load_data import load_dataset
+from doc_term import build_doc_term_matrix
+from paths import DATA_DIR, TABLE_DIR, FIGURE_DIR, STORE_PATH
+from table_writer import TableSpec, Column, write_table
+
+METHODS = ("tfidf", "log-odds")
+TOP_K = 10
+MIN_DF = 2         # a term must occur on at least this many slides
+PRIOR_SIZE = 1000  # pseudo-counts of the informative Dirichlet prior
+
+KEYWORD_TABLE = TableSpec("table_keywords", [
+    Column("lecture", "Lecture", align="l"),
+    Column("keywords", "Distinctive terms", align="l"),
+])
+
+# ------------------------------------------------------
+# Scores for every (lecture, term) pair at once, from the lectures x terms
+# count matrix: no per-lecture loop
+# ------------------------------------------------------
+def tfidf_scores(counts):
+    # Term frequency within the lecture x unsmoothed idf across lectures:
+    # with a couple of dozen lectures, a term every lecture uses ("like",
+    # "course", "imaging") must score 0, not just a little less
+    counts = sp.csr_matrix(counts, dtype=np.float64)
+    n_docs = counts.shape[0]
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log(n_docs / np.maximum(df, 1))
+    lengths = np.asarray(counts.sum(axis=1)).ravel()
+    tf = sp.diags(1 / np.maximum(lengths, 1)) @ counts
+    return tf.multiply(idf).toarray()
+
+def log_odds_scores(counts, prior_size=PRIOR_SIZE):
+    # Log-odds ratio of each lecture against the rest of the corpus with an
+    # informative Dirichlet prior (Monroe, Colaresi & Quinn 2008), as a
+    # z-score: frequent terms need a large difference, rare ones a huge one
+    y = np.asarray(sp.csr_matrix(counts).toarray(), dtype=np.float64)
+    total = y.sum(axis=0)
+    alpha = prior_size * total / max(total.sum(), 1)
+    alpha0 = alpha.sum()
+
+    n = y.sum(axis=1, keepdims=True)
+    rest = total - y
+    n_rest = n.sum() - n
+    delta = (np.log((y + alpha) / (n + alpha0 - y - alpha))
+             - np.log((rest + alpha) / (n_rest + alpha0 - rest - alpha)))
+    variance = 1 / (y + alpha) + 1 / (rest + alpha)
+    z = delta / np.sqrt(variance)
+    # A term a lecture never uses is not one of its keywords
+    return np.where(y > 0, z, -np.inf)
+
+SCORERS = {"tfidf": tfidf_scores, "log-odds": log_odds_scores}
+
+def top_terms(scores, vocabulary, k=TOP_K):
+    # Top-k columns of every row with one argpartition + argsort
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(-scores, part, axis=1).argsort(axis=1, kind="stable")
+    cols = np.take_along_axis(part, order, axis=1)
+    top_scores = np.take_along_axis(scores, cols, axis=1)
+    return [
+        [(vocabulary[c], float(s)) for c, s in zip(row_cols, row_scores) if s > 0 and np.isfinite(s)]
+        for row_cols, row_scores in zip(cols, top_scores)
+    ]
+
+def lecture_keywords(dtm, method="tfidf", k=TOP_K, min_df=MIN_DF):
+    pruned = dtm.restrict(min_df=min_df)
+    scores = SCORERS[method](pruned.lecture_matrix())
+    return dict(zip(pruned.lectures, top_terms(scores, pruned.vocabulary, k)))
+
+# ------------------------------------------------------
+# Word-cloud grid: one panel per lecture, sized by keyword score
+# ------------------------------------------------------
+def draw_wordcloud_grid(keywords, path, cols=4, panel=(400, 260), dpi=150):
+    try:
+        from wordcloud import WordCloud
+    except ImportError as exc:
+        raise RuntimeError("Word clouds need the wordcloud package (pip install wordcloud)") from exc
+
+    rows = math.ceil(len(keywords) / cols)
+    fig = Figure(figsize=(cols * panel[0] / 100, rows * (panel[1] + 40) / 100))
+    axes = np.atleast_1d(fig.subplots(rows, cols)).ravel()
+    for ax, (lecture, terms) in zip(axes, keywords.items()):
+        if terms:
+            wc = WordCloud(width=panel[0], height=panel[1], background_color="white",
+                           random_state=0)
+            ax.imshow(wc.generate_from_frequencies(dict(terms)).to_image())
+        ax.set_title(lecture, fontsize=10)
+    for ax in axes:
+        ax.axis("off")
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+
+def extract_keywords(method="tfidf", k=TOP_K, min_df=MIN_DF, out_dir=DATA_DIR,
+                     table_dir=TABLE_DIR, figure_dir=FIGURE_DIR, wordclouds=True, store=None):
+    t0 = time.perf_counter()
+    dtm = build_doc_term_matrix(load_dataset(store=store))
+    t1 = time.perf_counter()
+    keywords = lecture_keywords(dtm, method, k, min_df)
+    t2 = time.perf_counter()
+
+    ensure_dir(out_dir)
+    pd.DataFrame(
+        [(lecture, rank, term, score)
+         for lecture, terms in keywords.items()
+         for rank, (term, score) in enumerate(terms, start=1)],
+        columns=["lecture", "rank", "term", "score"],
+    ).to_csv(f"{out_dir}/lecture_keywords.csv", index=False)
+    write_table(KEYWORD_TABLE, [
+        {"lecture": lecture, "keywords": ", ".join(term for term, _ in terms)}
+        for lecture, terms in keywords.items()
+    ], table_dir, formats=("tex", "md"))
+
+    if wordclouds:
+        ensure_dir(figure_dir)
+        draw_wordcloud_grid(keywords, f"{figure_dir}/fig_keyword_wordclouds.png")
+    t3 = time.perf_counter()
+
+    logging.info(
+        f"[keywords] {method} over {len(keywords)} lectures: matrix {t1 - t0:.2f}s, "
+        f"scores {t2 - t1:.3f}s, outputs {t3 - t2:.2f}s"
+    )
+    for lecture, terms in keywords.items():
+        logging.info(f"[keywords] {lecture}: {', '.join(t for t, _ in terms)}")
+    print(f"✔ Top-{k} {method} keywords for {len(keywords)} lectures "
+          f"(see {out_dir}/lecture_keywords.csv).")
+    return keywords
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distinctive keywords per lecture")
+    parser.add_argument("--method", choices=METHODS, default="tfidf",
+                        help="tfidf, or log-odds with an informative Dirichlet prior")
+    parser.add_argument("--top", type=int, default=TOP_K, help="keywords per lecture")
+    parser.add_argument("--min-df", type=int, default=MIN_DF,
+                        help="ignore terms on fewer slides than this")
+    parser.add_argument("--no-wordclouds", action="store_true", help="skip the word-cloud grid")
+    parser.add_argument("--store", nargs="?", const=str(STORE_PATH), default=None,
+                        help="read the slides from the SQLite store (dataset_store.py build)")
+    args = parser.parse_args()
+
+    setup_logging()
+    extract_keywords(args.method, args.top, args.min_df, wordclouds=not args.no_wordclouds,
+                     store=args.store)
@@ -1,9 +1,11 @@
 # DatasetPaper/code/load_data.py
 
-from pathlib import Path
-from utils import ensure_dir, load_text, clean_text
-
-DATASET_ROOT = Path("../Lectures")
+import logging
+from utils import ensure_dir, clean_text
+from bulk_io import read_texts, list_files, DEFAULT_CONCURRENCY
+from slide_table import SlideTable
+from ocr import ocr_many
+from paths import DATASET_ROOT
 
 # ------------------------------------------------------
 # Numeric sorting helpers
@@ -19,8 +21,18 @@ def parse_slide_num(name):
 # ------------------------------------------------------
 # Load dataset with numeric ordering
 # ------------------------------------------------------
-def load_dataset():
-    lectures = {}
+def load_dataset(concurrency=DEFAULT_CONCURRENCY, ocr=False, ocr_workers=None, store=None):
+    # store: read the slides from the SQLite store (dataset_store.py) instead
+    # of listing and reading the lecture folders
+    if store is not None:
+        if ocr:
+            raise ValueError("the store has no OCR layer; load from the files for ocr=True")
+        from dataset_store import DatasetStore
+        with DatasetStore(store) as db:
+            return db.slide_table()
+
+    lecture_ids, lecture_sizes = [], []
+    slide_ids, slide_nums, image_paths, text_paths = [], [], [], []
 
     lecture_dirs = sorted(
         [d for d in DATASET_ROOT.iterdir() if d.is_dir()],
@@ -28,37 +40,40 @@ def load_dataset():
     )
 
     for lecture_dir in lecture_dirs:
-        lecture_id = lecture_dir.name
-        images_dir = lecture_dir / "Images"
-        texts_dir = lecture_dir / "Texts"
-
-        slides = []
+        images = list_files(lecture_dir / "Images", ".jpg")
+        texts = list_files(lecture_dir / "Texts", ".txt")
+        size = 0
 
-        text_files = sorted(
-            texts_dir.glob("*.txt"),
-            key=lambda p: parse_slide_num(p.stem)
-        )
+        for slide_id in sorted(texts, key=parse_slide_num):
+            img_file = images.get(slide_id)  # e.g., "Slide3"
 
-        for txt_file in text_files:
-            slide_id = txt_file.stem  # e.g., "Slide 3"
-            img_file = images_dir / f"{slide_id}.jpg"
-
-            if not img_file.exists():
+            if img_file is None:
                 continue
 
-            text = clean_text(load_text(txt_file))
-
-            slides.append({
-                "slide_id": slide_id,
-                "slide_num": parse_slide_num(slide_id),
-                "image_path": str(img_file),
-                "text_path": str(txt_file),
-                "text": text
-            })
-
-        lectures[lecture_id] = slides
-
-    return lectures
+            slide_ids.append(slide_id)
+            slide_nums.append(parse_slide_num(slide_id))
+            image_paths.append(str(img_file))
+            text_paths.append(str(texts[slide_id]))
+            size += 1
+
+        lecture_ids.append(lecture_dir.name)
+        lecture_sizes.append(size)
+
+    # Read every text file through the bounded thread pool in one go
+    texts = [clean_text(raw) for raw in read_texts(text_paths, concurrency=concurrency)]
+
+    # Optional OCR layer: stored per image hash, so only new slides are OCR'd
+    ocr_texts = None
+    if ocr:
+        ocr_texts = [clean_text(t) for t in ocr_many(
+            image_paths, workers=ocr_workers, concurrency=concurrency,
+            on_error=lambda p, exc: logging.warning(f"[ocr] skipped {p} ({exc})"),
+        )]
+
+    return SlideTable(
+        lecture_ids, [parse_lecture_num(lid) for lid in lecture_ids], lecture_sizes,
+        slide_ids, slide_nums, image_paths, text_paths, texts, ocr_texts
+    )
 
 
 if __name__ == "__main__":
@@ -14,49 +14,136 @@ This single script performs ALL dataset preparation steps:
 8. Generate pipeline diagram
 9. Save logs
 
+The steps are registered as stages of a DAG (see pipeline_dag.py):
+independent stages run concurrently, and the pipeline diagram is drawn
+from the same graph with the measured stage timings.
+
 Run:
-    python medi_slate_builder.py
+    python medi_slate_builder.py [--approximate] [--align] [--resume] [--workers N] [--watch]
+                                 [--max-memory SIZE]
+
+With --watch the script keeps running after the build and, on every edit
+under Lectures/, recomputes only the touched lectures and redraws only the
+outputs whose data changed.
+
+With --max-memory (e.g. 1G) lectures are processed in bounded batches,
+stages run one at a time, image decodes are capped and the peak RSS is
+reported at the end.
 """
 
+import io
 import os
 import re
+import sys
 import json
+import time
 import random
 import logging
+import argparse
+import threading
 from pathlib import Path
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
+import numpy as np
+from matplotlib.figure import Figure
 from PIL import Image
-from graphviz import Digraph
+
+from artifact_cache import get_cache, file_digest
+from bulk_io import read_texts, iter_prefetched, list_files, DEFAULT_CONCURRENCY
+from pipeline_dag import Pipeline
+from figure_data import (
+    histogram_data, bar_data, save_figure_data, load_figure_data, draw_hist, draw_bar
+)
+from stats_kernel import TokenCount, SentenceCount, KeywordHits, Vocabulary, FrequencySketch
+from stats_snapshots import collect_statistics, update_snapshots, merge_snapshots
+from table_writer import TableSpec, Column, write_table
+from paths import ROOT, OUTPUT_DIR
+from utils import cached_thumbnail, wordcloud_png
 
 # ============================================================
 # CONFIG
 # ============================================================
 
-DATASET_ROOT = Path("..")  # correct
-OUTPUT_ROOT = Path("../outputs")
+DATASET_ROOT = ROOT
+OUTPUT_ROOT = OUTPUT_DIR
 
 FIG_DIR = OUTPUT_ROOT / "figures"
 TABLE_DIR = OUTPUT_ROOT / "tables"
 GALLERY_DIR = OUTPUT_ROOT / "gallery"
+FIGURE_DATA_DIR = OUTPUT_ROOT / "figure_data"
 LOG_FILE = OUTPUT_ROOT / "pipeline.log"
 
-# create all directories
-for d in [OUTPUT_ROOT, FIG_DIR, TABLE_DIR, GALLERY_DIR]:
-    d.mkdir(parents=True, exist_ok=True)
+PIPELINE_TIMINGS = OUTPUT_ROOT / "pipeline_timings.json"
+CHECKPOINT_DIR = OUTPUT_ROOT / "checkpoints"
+FAILURE_REPORT = OUTPUT_ROOT / "failures.json"
+ALIGNMENT_FILE = OUTPUT_ROOT / "alignment_scores.csv"
+
+RANDOM_SEED = 42
+
+# ============================================================
+# MEMORY BUDGET (--max-memory)
+# ============================================================
+
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+def parse_size(text):
+    # "1G", "512M", "750000K" or plain bytes
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*", text.upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size {text!r} (e.g. 1G, 512M)")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+class MemoryBudget:
+    # Derived limits for a bounded-memory build. The baseline (interpreter,
+    # NumPy, pandas, matplotlib) is roughly 150 MB; the rest is shared by
+    # one batch of lecture texts and their Counters (about 20x the raw text
+    # once tokenized) and the decoded images in flight (a 1280x720 slide
+    # plus its thumbnail is about 8 MB).
+    BASELINE = 150 << 20
+    TEXT_EXPANSION = 20
+    IMAGE_BYTES = 8 << 20
+
+    def __init__(self, limit):
+        self.limit = limit
+        spare = max(limit - self.BASELINE, 32 << 20)
+        self.batch_bytes = max(256 << 10, spare // (2 * self.TEXT_EXPANSION))
+        self.image_decodes = int(max(1, min(DEFAULT_CONCURRENCY, spare // (8 * self.IMAGE_BYTES))))
+
+    def __repr__(self):
+        return (f"MemoryBudget({self.limit >> 20} MB: text batches of "
+                f"{self.batch_bytes >> 10} KB, {self.image_decodes} image decodes)")
+
+def peak_rss():
+    # (this process, largest child process) peak resident set sizes in
+    # bytes, or None where the resource module is missing (Windows).
+    # RUSAGE_SELF leaves out the ProcessPool workers (alignment, OCR);
+    # RUSAGE_CHILDREN is the largest finished child, but on Linux a forked
+    # child starts from the parent's high-water mark (even the `dot`
+    # subprocess reports it), so the two are shown side by side rather
+    # than added up, and the budget is checked against this process.
+    try:
+        import resource
+    except ImportError:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024
+    return tuple(resource.getrusage(who).ru_maxrss * scale
+                 for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
 
 # ============================================================
 # LOGGING
 # ============================================================
 
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
-logging.info("=== Starting MEDI-SLATE Build Script ===")
+def setup_output_dirs():
+    # create all directories
+    for d in [OUTPUT_ROOT, FIG_DIR, TABLE_DIR, GALLERY_DIR, FIGURE_DATA_DIR]:
+        d.mkdir(parents=True, exist_ok=True)
+
+    logging.basicConfig(
+        filename=LOG_FILE,
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(threadName)s - %(message)s"
+    )
 
 # ============================================================
 # GENERAL MEDICAL IMAGING KEYWORD LIST
@@ -106,9 +193,8 @@ def clean_text(text):
 def tokenize(text):
     return text.lower().split()
 
-def count_imaging_terms(text):
-    tokens = tokenize(text)
-    return sum(token in IMAGING_TERMS for token in tokens)
+def split_sentences(text):
+    return [s for s in re.split(r"[.!?]", text) if s.strip()]
 
 def numeric_sort_key(path):
     nums = re.findall(r"\d+", str(path))
@@ -126,244 +212,623 @@ def load_dataset():
 
     lectures = sorted(lectures_folder.glob("Lecture *"), key=numeric_sort_key)
     dataset = []
-
     for lecture in lectures:
-        images = sorted((lecture / "Images").glob("*.jpg"), key=numeric_sort_key)
-        texts  = sorted((lecture / "Texts").glob("*.txt"), key=numeric_sort_key)
-
-        for img, txt in zip(images, texts):
-            text = clean_text(Path(txt).read_text(encoding="utf-8"))
-            dataset.append({
-                "lecture": lecture.name,
-                "image": str(img),
-                "text": text
-            })
+        dataset.extend(load_lecture(lecture))
 
     logging.info(f"Loaded dataset with {len(dataset)} slide-text pairs")
     return dataset, lectures
 
-dataset, lectures = load_dataset()
+def load_lecture(lecture):
+    # Case-insensitive suffixes: the exported slides are "SlideN.JPG"
+    images = sorted(list_files(lecture / "Images", ".jpg").values(), key=numeric_sort_key)
+    texts  = sorted(list_files(lecture / "Texts", ".txt").values(), key=numeric_sort_key)
+
+    # Texts are read lazily by the statistics stage, and only for lectures
+    # whose snapshot is stale (see stats_snapshots.py)
+    return [
+        {"lecture": lecture.name, "image": str(img), "text_path": str(txt)}
+        for img, txt in zip(images, texts)
+    ]
 
 # ============================================================
 # STATISTICS
 # ============================================================
 
-def compute_statistics():
-    per_slide = []
-    per_lecture = {}
-    vocabulary = Counter()
-    imaging_keyword_counts = Counter()
-
+def load_texts(paths, on_error=None, unreadable=""):
+    # Text files are read through a bounded thread pool, in path order;
+    # an unreadable file (when on_error is given) comes back as `unreadable`
+    return [unreadable if raw is None else clean_text(raw)
+            for raw in read_texts(paths, on_error=on_error)]
+
+def make_accumulators(approximate=False):
+    accumulators = [
+        TokenCount("tokens"),
+        SentenceCount(split_sentences, "sentences"),
+        Vocabulary(slide_column="vocab_size", approximate=approximate),
+        KeywordHits(IMAGING_TERMS, column="imaging_terms"),
+    ]
+    if approximate:
+        accumulators.append(FrequencySketch())
+    return accumulators
+
+def lecture_text_paths(dataset):
+    lecture_texts = {}
     for item in dataset:
-        lecture_name = item["lecture"]
-        text = item["text"]
-
-        tokens = tokenize(text)
-        sentences = [s for s in re.split(r"[.!?]", text) if s.strip()]
-        vocab = set(tokens)
-
-        imaging_count = count_imaging_terms(text)
-
-        per_slide.append({
-            "lecture": lecture_name,
-            "tokens": len(tokens),
-            "sentences": len(sentences),
-            "vocab_size": len(vocab),
-            "imaging_terms": imaging_count
-        })
-
-        vocabulary.update(tokens)
-        imaging_keyword_counts.update([t for t in tokens if t in IMAGING_TERMS])
-
-        if lecture_name not in per_lecture:
-            per_lecture[lecture_name] = {
-                "slides": 0,
-                "tokens": 0,
-                "vocab": set(),
-            }
-
-        per_lecture[lecture_name]["slides"] += 1
-        per_lecture[lecture_name]["tokens"] += len(tokens)
-        per_lecture[lecture_name]["vocab"].update(vocab)
-
-    for lec in per_lecture:
-        per_lecture[lec]["vocab_size"] = len(per_lecture[lec]["vocab"])
-        del per_lecture[lec]["vocab"]
+        lecture_texts.setdefault(item["lecture"], []).append(item["text_path"])
+    return lecture_texts
+
+def snapshot_options(approximate=False, on_error=None):
+    # Everything collect_statistics / update_snapshots need besides the lectures
+    return dict(
+        namespace="builder-approx" if approximate else "builder",
+        make_accumulators=lambda: make_accumulators(approximate),
+        tokenizer=tokenize,
+        load_texts=lambda paths: load_texts(paths, on_error, unreadable=None),
+        count_column="slides",
+    )
 
-    return per_slide, per_lecture, vocabulary, imaging_keyword_counts
+def compute_statistics(dataset, approximate=False, on_error=None, budget=None):
+    # One pass per changed lecture fills every metric (see stats_kernel.py);
+    # unchanged lectures come from their snapshots and corpus totals are a
+    # merge of the per-lecture state (in bounded batches under a budget)
+    merged = collect_statistics(lecture_text_paths(dataset),
+                                **snapshot_options(approximate, on_error),
+                                batch_bytes=budget.batch_bytes if budget else None)
+    return summarize_statistics(merged, approximate)
+
+def summarize_statistics(merged, approximate=False):
+    per_slide, per_lecture, accumulators = merged
+    vocab, imaging = accumulators[2], accumulators[3]
+
+    if approximate:
+        # Only the heavy hitters are kept; vocabulary size comes from HLL
+        freqs = accumulators[4]
+        vocabulary = Counter(dict(freqs.most_common()))
+        vocab_summary = {
+            "size": vocab.corpus_size(),
+            "rel_error": vocab.relative_error,
+            "freq_error": freqs.error_bound,
+        }
+    else:
+        vocabulary = vocab.corpus_counts()
+        vocab_summary = {"size": len(vocabulary), "rel_error": 0.0, "freq_error": 0.0}
 
-per_slide, per_lecture, vocabulary, imaging_keyword_counts = compute_statistics()
+    return per_slide, per_lecture, vocabulary, imaging.counts, vocab_summary
 
 # ============================================================
 # SAVE TABLES
 # ============================================================
 
-def save_tables():
+def save_tables(stats, approximate=False):
+    per_slide, per_lecture, _, _, vocab_summary = stats
     total_slides = len(per_slide)
-    total_tokens = sum(s["tokens"] for s in per_slide)
-    total_vocab = len(vocabulary)
-
-    summary_tex = TABLE_DIR / "table_summary.tex"
-    summary_tex.write_text(
-        "\\begin{tabular}{lc}\n"
-        "\\toprule\n"
-        "Statistic & Value \\\\\n"
-        "\\midrule\n"
-        f"Total Slides & {total_slides} \\\\\n"
-        f"Total Tokens & {total_tokens} \\\\\n"
-        f"Vocabulary Size & {total_vocab} \\\\\n"
-        "\\bottomrule\n"
-        "\\end{tabular}"
-    )
+    total_tokens = int(per_slide["tokens"].sum())
+    total_vocab = vocab_summary["size"]
+
+    # Approximate mode reports the sketch error bounds next to the estimates
+    vocab_header = "Vocabulary Size"
+    summary_rows = [
+        {"statistic": "Total Slides", "value": total_slides},
+        {"statistic": "Total Tokens", "value": total_tokens},
+        {"statistic": "Vocabulary Size", "value": total_vocab},
+    ]
+    if approximate:
+        error = f"($\\pm${vocab_summary['rel_error']:.1%})".replace("%", "\\%")
+        vocab_header = f"Vocabulary Size {error}"
+        summary_rows[2]["value"] = f"{total_vocab} {error}"
+        summary_rows.append({
+            "statistic": "Top-Term Count Error",
+            "value": f"$\\leq${vocab_summary['freq_error']:.0f}",
+        })
 
-    perlec_tex = TABLE_DIR / "table_per_lecture.tex"
-    with perlec_tex.open("w") as f:
-        f.write("\\begin{tabular}{lccc}\n")
-        f.write("\\toprule\nLecture & Slides & Tokens & Vocabulary Size \\\\\n\\midrule\n")
-        for lec, stats in per_lecture.items():
-            f.write(f"{lec} & {stats['slides']} & {stats['tokens']} & {stats['vocab_size']} \\\\\n")
-        f.write("\\bottomrule\n\\end{tabular}")
+    summary_spec = TableSpec("table_summary", [
+        Column("statistic", "Statistic", align="l"),
+        Column("value", "Value", raw=True),
+    ])
+    write_table(summary_spec, summary_rows, TABLE_DIR)
 
-save_tables()
+    perlec_spec = TableSpec("table_per_lecture", [
+        Column("lecture", "Lecture", align="l"),
+        Column("slides", "Slides"),
+        Column("tokens", "Tokens"),
+        Column("vocab_size", vocab_header),
+    ])
+    write_table(perlec_spec, per_lecture.reset_index().to_dict("records"), TABLE_DIR)
 
 # ============================================================
 # FIGURES
 # ============================================================
 
-def plot_hist(data, title, xlabel, filename):
-    plt.figure(figsize=(10,6))
-    plt.hist(data, bins=40, color="steelblue")
-    plt.title(title)
-    plt.xlabel(xlabel)
-    plt.ylabel("Count")
-    plt.tight_layout()
-    plt.savefig(FIG_DIR / filename)
-    plt.close()
-
-def generate_figures():
-
-    plot_hist(
-        [s["tokens"] for s in per_slide],
-        "Token Distribution per Slide",
-        "Tokens",
-        "fig_token_distribution.png"
-    )
+FIGURE_DATA_NAMES = [
+    "token_distribution", "sentence_distribution",
+    "tokens_per_lecture", "slides_per_lecture", "topic_distribution",
+]
+FIGURE_FILES = [
+    "fig_token_distribution.png", "fig_sentence_distribution.png",
+    "fig_tokens_per_lecture.png", "fig_slides_per_lecture.png", "fig_topic_distribution.png",
+]
 
-    plot_hist(
-        [s["sentences"] for s in per_slide],
-        "Sentence Distribution per Slide",
-        "Sentences",
-        "fig_sentence_distribution.png"
-    )
+def figure_data_arrays(stats):
+    per_slide, per_lecture, _, imaging_keyword_counts, _ = stats
+    common_terms = imaging_keyword_counts.most_common(20)
+    return {
+        "token_distribution": histogram_data(per_slide["tokens"].to_numpy(), bins=40),
+        "sentence_distribution": histogram_data(per_slide["sentences"].to_numpy(), bins=40),
+        "tokens_per_lecture": bar_data(per_lecture.index, per_lecture["tokens"]),
+        "slides_per_lecture": bar_data(per_lecture.index, per_lecture["slides"]),
+        "topic_distribution": bar_data(
+            [term for term, _ in common_terms], [count for _, count in common_terms]
+        ),
+    }
+
+def compute_figure_data(stats):
+    # All binning / KDE / bar values in one NumPy pass; saved as .npz so the
+    # renderers below never go back to the per-slide data
+    figure_data = figure_data_arrays(stats)
+    for name, data in figure_data.items():
+        save_figure_data(FIGURE_DATA_DIR / f"{name}.npz", data)
+    logging.info(f"Saved {len(figure_data)} figure data files to {FIGURE_DATA_DIR}")
+    return FIGURE_DATA_DIR
+
+def plot_hist(data_dir, name, title, xlabel, filename):
+    draw_hist(load_figure_data(data_dir / f"{name}.npz"), title, xlabel, FIG_DIR / filename)
+
+def generate_figures(data_dir, names=FIGURE_DATA_NAMES):
+    # names: which figures to draw (the watcher redraws only changed ones)
+
+    if "token_distribution" in names:
+        plot_hist(
+            data_dir,
+            "token_distribution",
+            "Token Distribution per Slide",
+            "Tokens",
+            "fig_token_distribution.png"
+        )
+
+    if "sentence_distribution" in names:
+        plot_hist(
+            data_dir,
+            "sentence_distribution",
+            "Sentence Distribution per Slide",
+            "Sentences",
+            "fig_sentence_distribution.png"
+        )
 
     # tokens per lecture
-    plt.figure(figsize=(12,6))
-    lectures_list = list(per_lecture.keys())
-    tokens_list = [per_lecture[l]["tokens"] for l in lectures_list]
-    plt.bar(lectures_list, tokens_list, color="seagreen")
-    plt.xticks(rotation=60, ha="right")
-    plt.title("Token Count per Lecture")
-    plt.tight_layout()
-    plt.savefig(FIG_DIR / "fig_tokens_per_lecture.png")
-    plt.close()
+    if "tokens_per_lecture" in names:
+        draw_bar(
+            load_figure_data(data_dir / "tokens_per_lecture.npz"),
+            "Token Count per Lecture",
+            FIG_DIR / "fig_tokens_per_lecture.png",
+            color="seagreen",
+        )
 
     # slides per lecture
-    plt.figure(figsize=(12,6))
-    slides_list = [per_lecture[l]["slides"] for l in lectures_list]
-    plt.bar(lectures_list, slides_list, color="purple")
-    plt.xticks(rotation=60, ha="right")
-    plt.title("Slides per Lecture")
-    plt.tight_layout()
-    plt.savefig(FIG_DIR / "fig_slides_per_lecture.png")
-    plt.close()
-
+    if "slides_per_lecture" in names:
+        draw_bar(
+            load_figure_data(data_dir / "slides_per_lecture.npz"),
+            "Slides per Lecture",
+            FIG_DIR / "fig_slides_per_lecture.png",
+            color="purple",
+        )
+
+    if "topic_distribution" in names:
+        plot_topics(data_dir)
+
+def plot_topics(data_dir):
     # imaging terminology distribution (Safe Fallback)
-    plt.figure(figsize=(12,8))
-    common_terms = imaging_keyword_counts.most_common(20)
-
-    if len(common_terms) == 0:
-        plt.bar(["no-imaging-terms-found"], [1], color="gray")
-        plt.title("No Recognized Imaging Terms Detected")
-        plt.ylabel("Count")
+    topics = load_figure_data(data_dir / "topic_distribution.npz")
+    if topics["values"].size == 0:
+        draw_bar(
+            bar_data(["no-imaging-terms-found"], [1]),
+            "No Recognized Imaging Terms Detected",
+            FIG_DIR / "fig_topic_distribution.png",
+            color="gray",
+            rotation=0,
+            ha="center",
+            figsize=(12,8),
+            ylabel="Count",
+        )
     else:
-        labels, values = zip(*common_terms)
-        plt.bar(labels, values)
-        plt.xticks(rotation=75, ha="right")
-        plt.title("Top Imaging Terms in the Dataset")
-
-    plt.tight_layout()
-    plt.savefig(FIG_DIR / "fig_topic_distribution.png")
-    plt.close()
-
-    # word cloud
-    wc = WordCloud(width=1600, height=900, background_color="white").generate(
-        " ".join(vocabulary.keys())
-    )
-    wc.to_file(str(FIG_DIR / "fig_wordcloud.png"))
-
-generate_figures()
+        draw_bar(
+            topics,
+            "Top Imaging Terms in the Dataset",
+            FIG_DIR / "fig_topic_distribution.png",
+            rotation=75,
+            figsize=(12,8),
+        )
+
+def generate_wordcloud(stats):
+    vocabulary = stats[2]
+    write_wordcloud(" ".join(vocabulary.keys()))
+
+def write_wordcloud(text, path=FIG_DIR / "fig_wordcloud.png"):
+    # word cloud (layout is cached while the vocabulary is unchanged)
+    Path(path).write_bytes(wordcloud_png(text))
 
 # ============================================================
 # GALLERY
 # ============================================================
-def build_gallery(n=25):
+def build_gallery(dataset, n=25, on_error=None, decodes=DEFAULT_CONCURRENCY):
     all_images = [item["image"] for item in dataset]
-    chosen = random.sample(all_images, min(n, len(all_images)))
+    chosen = random.Random(RANDOM_SEED).sample(all_images, min(n, len(all_images)))
 
     cols = 5
     rows = (len(chosen) + cols - 1) // cols
 
-    fig, axes = plt.subplots(rows, cols, figsize=(20,12))
-    axes = axes.flatten()
+    # Figure object rather than pyplot: this stage runs alongside the figures
+    fig = Figure(figsize=(20,12))
+    axes = fig.subplots(rows, cols, squeeze=False).flatten()
 
-    for ax, img_path in zip(axes, chosen):
-        img = Image.open(img_path)
-        ax.imshow(img)
+    # At most `decodes` thumbnails are decoded at a time; each one is drawn
+    # and released before the next is taken
+    images = iter_prefetched(
+        chosen, lambda p: Image.open(io.BytesIO(cached_thumbnail(p, 800))),
+        concurrency=decodes, on_error=on_error,
+    )
+
+    # A slide that failed to decode (recorded via on_error) leaves a blank tile
+    for ax, img in zip(axes, images):
+        if img is not None:
+            ax.imshow(img)
+            img.close()
         ax.axis("off")
 
     for ax in axes[len(chosen):]:
         ax.axis("off")
 
-    plt.tight_layout()
-    plt.savefig(GALLERY_DIR / "fig_gallery.png")   # <-- FIXED
-    plt.close()
+    fig.tight_layout()
+    fig.savefig(GALLERY_DIR / "fig_gallery.png")   # <-- FIXED
+    fig.clear()
+
+# ============================================================
+# SLIDE-TEXT ALIGNMENT (optional: needs Tesseract for the OCR side)
+# ============================================================
+
+def score_slide_alignment(dataset, on_error=None):
+    from ocr import ocr_many
+    from align_slides import score_alignment, log_alignment_summary
 
+    ocr = ocr_many([item["image"] for item in dataset], on_error=on_error)
+    texts = load_texts([item["text_path"] for item in dataset], on_error)
 
-build_gallery()
+    lectures = {}
+    for item, text, ocr_text in zip(dataset, texts, ocr):
+        ids, narration, slide_text = lectures.setdefault(item["lecture"], ([], [], []))
+        ids.append(Path(item["image"]).stem)
+        narration.append(text)
+        slide_text.append(ocr_text)
+
+    df = score_alignment(lectures)
+    df.to_csv(ALIGNMENT_FILE, index=False)
+    log_alignment_summary(df)
 
 # ============================================================
 # PIPELINE DIAGRAM
 # ============================================================
 
-def build_pipeline_diagram():
-
-    dot = Digraph(comment="MEDI-SLATE Pipeline", format="png")
+def dataset_fingerprint():
+    # Stat-only fingerprint of every slide file (names, sizes, mtimes)
+    entries = []
+    for lecture in sorted((DATASET_ROOT / "Lectures").glob("Lecture *"), key=numeric_sort_key):
+        for sub in ("Images", "Texts"):
+            folder = lecture / sub
+            if folder.is_dir():
+                for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+                    st = entry.stat()
+                    entries.append((lecture.name, sub, entry.name, st.st_size, st.st_mtime_ns))
+    return entries
+
+def code_version():
+    # Any edit to the pipeline code invalidates the stage checkpoints
+    return [file_digest(p) for p in sorted(Path(__file__).resolve().parent.glob("*.py"))]
+
+def build_pipeline(approximate=False, align=False, budget=None):
+    # Stage graph; independent stages run concurrently and the pipeline
+    # diagram is drawn from this same graph. Each stage is checkpointed
+    # under a key chained from its inputs, so --resume skips finished work.
+    pipeline = Pipeline("MEDI-SLATE", checkpoint_dir=CHECKPOINT_DIR, version=code_version())
+    failures = pipeline.failures
+
+    pipeline.add("load", load_dataset, label="Load Dataset\n(slide-text pairs)",
+                 inputs=dataset_fingerprint)
+    pipeline.add("stats",
+                 lambda loaded: compute_statistics(loaded[0], approximate, failures.recorder("stats"),
+                                                   budget),
+                 deps=["load"], label="Statistics\n(per-lecture snapshots)",
+                 inputs=lambda: approximate)
+    pipeline.add("tables", lambda stats: save_tables(stats, approximate),
+                 deps=["stats"], label="Tables",
+                 outputs=[TABLE_DIR / "table_summary.tex", TABLE_DIR / "table_per_lecture.tex"])
+    pipeline.add("figure_data", compute_figure_data, deps=["stats"], label="Figure Data\n(.npz)",
+                 outputs=[FIGURE_DATA_DIR / f"{name}.npz" for name in FIGURE_DATA_NAMES])
+    pipeline.add("figures", generate_figures, deps=["figure_data"], label="Figures",
+                 outputs=[FIG_DIR / name for name in FIGURE_FILES])
+    pipeline.add("wordcloud", generate_wordcloud, deps=["stats"], label="Word Cloud",
+                 outputs=[FIG_DIR / "fig_wordcloud.png"])
+    decodes = budget.image_decodes if budget else DEFAULT_CONCURRENCY
+    pipeline.add("gallery",
+                 lambda loaded: build_gallery(loaded[0], on_error=failures.recorder("gallery"),
+                                              decodes=decodes),
+                 deps=["load"], label="Gallery", inputs=lambda: RANDOM_SEED,
+                 outputs=[GALLERY_DIR / "fig_gallery.png"])
+
+    outputs = ["tables", "figures", "wordcloud", "gallery"]
+    if align:
+        pipeline.add("alignment",
+                     lambda loaded: score_slide_alignment(loaded[0], failures.recorder("alignment")),
+                     deps=["load"], label="Slide-Text Alignment\n(OCR + TF-IDF)",
+                     outputs=[ALIGNMENT_FILE])
+        outputs.append("alignment")
+
+    # The diagram waits for the other outputs so it can show their timings
+    # (always redrawn: the timings change every run)
+    pipeline.add("diagram", lambda *_: build_pipeline_diagram(pipeline),
+                 deps=outputs, label="Pipeline Diagram", checkpoint=False)
+    return pipeline
+
+def build_pipeline_diagram(pipeline):
+    pipeline.render_diagram(FIG_DIR / "fig_pipeline_diagram", timings=dict(pipeline.timings))
 
-    dot.node("A", "Classroom\nRecording")
-    dot.node("B", "Slide Export")
-    dot.node("C", "ASR Transcription")
-    dot.node("D", "Text Refinement")
-    dot.node("E", "Slide–Text Alignment")
-    dot.node("F", "Dataset Construction")
-    dot.node("G", "Statistics + Figures")
-    dot.node("H", "Public Release")
-
-    dot.edge("A", "C")
-    dot.edge("A", "B")
-    dot.edge("C", "D")
-    dot.edge("B", "E")
-    dot.edge("D", "E")
-    dot.edge("E", "F")
-    dot.edge("F", "G")
-    dot.edge("G", "H")
+# ============================================================
+# WATCH MODE (optional: needs watchdog)
+# ============================================================
 
-    dot.render(str(FIG_DIR / "fig_pipeline_diagram"), cleanup=True)
+WATCH_DEBOUNCE = 0.3   # seconds without events before a batch of edits is rebuilt
+WATCHED_SUFFIXES = {"Texts": ".txt", "Images": ".jpg"}   # compared lower-cased (SlideN.JPG)
+
+class LectureWatcher:
+    # watchdog event handler: records which (lecture, "Texts"/"Images")
+    # an event touched; called from the observer thread
+    def __init__(self, root):
+        self.root = Path(root)
+        self.pending = set()
+        self.last_event = 0.0
+        self._lock = threading.Lock()
+
+    def classify(self, path):
+        try:
+            parts = Path(path).relative_to(self.root).parts
+        except ValueError:
+            return None
+        if len(parts) != 3 or not parts[0].startswith("Lecture "):
+            return None
+        lecture, sub, name = parts
+        if WATCHED_SUFFIXES.get(sub) != Path(name).suffix.lower():
+            return None   # editor swap files, thumbnails, ...
+        return lecture, sub
+
+    def dispatch(self, event):
+        if event.is_directory:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            change = self.classify(path) if path else None
+            if change:
+                with self._lock:
+                    self.pending.add(change)
+                    self.last_event = time.monotonic()
+
+    def take(self, debounce=WATCH_DEBOUNCE):
+        # The pending batch once no event arrived for `debounce` seconds
+        with self._lock:
+            if not self.pending or time.monotonic() - self.last_event < debounce:
+                return None
+            batch, self.pending = self.pending, set()
+            return batch
+
+def _same_figure_data(a, b):
+    return b is not None and a.keys() == b.keys() and all(
+        np.array_equal(a[k], b[k]) for k in a
+    )
 
-build_pipeline_diagram()
+class WatchSession:
+    # In-memory state of the last build: per-lecture items and snapshots,
+    # the figure data and the word-cloud vocabulary, so an edit costs one
+    # lecture's statistics, a merge and the outputs that actually changed
+    def __init__(self, dataset, approximate=False, on_error=None):
+        self.approximate = approximate
+        self.options = snapshot_options(approximate, on_error)
+        self.on_error = on_error
+        self.items = {}
+        for item in dataset:
+            self.items.setdefault(item["lecture"], []).append(item)
+        self.snapshots = update_snapshots(lecture_text_paths(dataset), **self.options)
+        stats = self.merge()
+        self.figure_data = figure_data_arrays(stats)
+        self.vocabulary = " ".join(stats[2].keys())
+
+        # The word-cloud layout takes seconds: it is redrawn in a separate
+        # process so it never holds up (or contends for the GIL with) the
+        # figures and tables
+        self.background = ProcessPoolExecutor(max_workers=1)
+        self.wordcloud = None
+
+    def merge(self):
+        lectures = sorted(self.items, key=numeric_sort_key)
+        merged = merge_snapshots([self.snapshots[lid] for lid in lectures],
+                                 self.options["make_accumulators"], self.options["count_column"])
+        return summarize_statistics(merged, self.approximate)
+
+    def update(self, batch):
+        t0 = time.perf_counter()
+        lectures = sorted({lid for lid, _ in batch}, key=numeric_sort_key)
+        images_changed = any(sub == "Images" for _, sub in batch)
+
+        # Re-list the touched lectures (slides may have been added or removed)
+        for lid in lectures:
+            folder = DATASET_ROOT / "Lectures" / lid
+            items = load_lecture(folder) if folder.is_dir() else []
+            if items:
+                self.items[lid] = items
+            else:
+                self.items.pop(lid, None)
+                self.snapshots.pop(lid, None)
+        present = [lid for lid in lectures if lid in self.items]
+        self.snapshots.update(update_snapshots(
+            {lid: [item["text_path"] for item in self.items[lid]] for lid in present},
+            **self.options,
+        ))
+        stats = self.merge()
+
+        # Dependent outputs, concurrently; each one only if its data changed
+        figure_data = figure_data_arrays(stats)
+        changed = [name for name in FIGURE_DATA_NAMES
+                   if not _same_figure_data(figure_data[name], self.figure_data.get(name))]
+        for name in changed:
+            save_figure_data(FIGURE_DATA_DIR / f"{name}.npz", figure_data[name])
+        self.figure_data = figure_data
+        vocabulary = " ".join(stats[2].keys())
+
+        if vocabulary != self.vocabulary:
+            self.redraw_wordcloud(vocabulary)
+        self.vocabulary = vocabulary
+
+        jobs = {"tables": lambda: save_tables(stats, self.approximate)}
+        if changed:
+            jobs["figures"] = lambda: generate_figures(FIGURE_DATA_DIR, changed)
+        if images_changed:
+            dataset = [item for lid in sorted(self.items, key=numeric_sort_key)
+                       for item in self.items[lid]]
+            jobs["gallery"] = lambda: build_gallery(dataset, on_error=self.on_error)
+
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = {name: pool.submit(job) for name, job in jobs.items()}
+        for name, future in futures.items():
+            if future.exception() is not None:
+                logging.error(f"[watch] {name} failed: {future.exception()!r}")
+
+        elapsed = time.perf_counter() - t0
+        redrawn = ", ".join(changed) or "no figures"
+        logging.info(f"[watch] {', '.join(lectures)}: rebuilt in {elapsed:.2f}s "
+                     f"({redrawn}; {', '.join(jobs)})")
+        print(f"✔ {', '.join(lectures)} updated in {elapsed:.2f}s ({redrawn} redrawn).")
+
+    def redraw_wordcloud(self, vocabulary):
+        if self.wordcloud is not None:
+            self.wordcloud.cancel()   # superseded, if it has not started yet
+        t0 = time.perf_counter()
+        self.wordcloud = self.background.submit(write_wordcloud, vocabulary)
+
+        def done(future):
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                logging.error(f"[watch] word cloud failed: {future.exception()!r}")
+            else:
+                logging.info(f"[watch] word cloud redrawn {time.perf_counter() - t0:.2f}s after the edit")
+
+        self.wordcloud.add_done_callback(done)
+
+    def close(self):
+        self.background.shutdown(wait=True)
+
+def watch(pipeline, approximate=False, debounce=WATCH_DEBOUNCE):
+    try:
+        from watchdog.observers import Observer
+    except ImportError:
+        raise RuntimeError("--watch needs watchdog (pip install watchdog)") from None
+
+    dataset = pipeline.results["load"][0]
+    session = WatchSession(dataset, approximate, pipeline.failures.recorder("watch"))
+    watcher = LectureWatcher(DATASET_ROOT / "Lectures")
+
+    observer = Observer()
+    observer.schedule(watcher, str(watcher.root), recursive=True)
+    observer.start()
+    logging.info(f"[watch] watching {watcher.root}")
+    print(f"Watching {watcher.root} for changes (Ctrl+C to stop)...")
+    try:
+        while True:
+            batch = watcher.take(debounce)
+            if batch:
+                session.update(batch)
+            else:
+                time.sleep(0.05)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observer.stop()
+        observer.join()
+        session.close()
 
 # ============================================================
-# FINISH
+# MAIN
 # ============================================================
 
-logging.info("=== MEDI-SLATE Build Complete ===")
-print("MEDI-SLATE build completed successfully!")
+def main():
+    parser = argparse.ArgumentParser(description="Build MEDI-SLATE statistics, figures and tables")
+    parser.add_argument(
+        "--approximate", action="store_true",
+        help="bounded-memory vocabulary statistics (HyperLogLog + Count-Min sketch)"
+    )
+    parser.add_argument(
+        "--align", action="store_true",
+        help="also score slide-image / narration alignment (needs Tesseract)"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="reuse checkpoints of stages whose inputs are unchanged since they last completed"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="maximum number of stages running at once (default: all ready stages)"
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="after the build, rebuild affected outputs whenever lecture files change "
+             "(needs watchdog)"
+    )
+    parser.add_argument(
+        "--max-memory", type=parse_size, default=None, metavar="SIZE",
+        help="keep the build within SIZE of RAM (e.g. 1G): lectures in bounded batches, "
+             "one stage at a time, capped image decodes; peak RSS is reported"
+    )
+    args = parser.parse_args()
+
+    setup_output_dirs()
+    logging.info("=== Starting MEDI-SLATE Build Script ===")
+
+    budget = MemoryBudget(args.max_memory) if args.max_memory else None
+    workers = args.workers
+    if budget is not None:
+        # Concurrent stages would add their peaks together
+        workers = workers or 1
+        logging.info(f"Memory budget: {budget}")
+
+    pipeline = build_pipeline(args.approximate, args.align, budget)
+    try:
+        pipeline.run(max_workers=workers, resume=args.resume)
+    finally:
+        # Whatever completed is checkpointed; rerun with --resume to continue
+        pipeline.save_timings(PIPELINE_TIMINGS)
+        pipeline.save_failures(FAILURE_REPORT)
+
+    get_cache().log_stats("build")
+    logging.info("=== MEDI-SLATE Build Complete ===")
+    print("MEDI-SLATE build completed successfully!")
+
+    peak = peak_rss()
+    if peak is not None:
+        own, children = peak
+        message = f"Peak RSS: {own / (1 << 20):.0f} MB"
+        if children:
+            message += f" (largest child process {children / (1 << 20):.0f} MB)"
+    if budget is not None:
+        if peak is None:
+            print("Peak RSS: not available on this platform")
+        else:
+            message += f", budget {budget.limit / (1 << 20):.0f} MB"
+            if own > budget.limit:
+                message += " -- OVER BUDGET"
+                logging.warning(message)
+            else:
+                logging.info(message)
+            print(message)
+    elif peak is not None:
+        logging.info(message)
+
+    if args.watch:
+        watch(pipeline, args.approximate)
+
+if __name__ == "__main__":
+    main()
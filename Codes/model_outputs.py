@@ -0,0 +1,69 @@
+# DatasetPaper/code/model_outputs.py
+
+import json
+from pathlib import Path
+
+from bulk_io import read_many, read_text_file, DEFAULT_CONCURRENCY
+from paths import MODEL_OUTPUT_ROOT
+
+# ------------------------------------------------------
+# Loading: one JSON per slide, {lecture, slide_id, paths, models: {model:
+# {concepts|triples: {source, parsed, raw}}}}. Model or task entries can be
+# null when a run produced nothing.
+# ------------------------------------------------------
+def list_output_files(root=MODEL_OUTPUT_ROOT):
+    return sorted(Path(root).glob("Lecture */Slide*.json"))
+
+def load_model_outputs(root=MODEL_OUTPUT_ROOT, concurrency=DEFAULT_CONCURRENCY):
+    files = list_output_files(root)
+    return read_many(files, lambda p: json.loads(read_text_file(p)), concurrency)
+
+def iter_entries(outputs, task=None):
+    # Yields (lecture, slide_id, model, task, entry) for every non-null entry
+    for slide in outputs:
+        for model, tasks in (slide.get("models") or {}).items():
+            for name, entry in (tasks or {}).items():
+                if entry is None or (task is not None and name != task):
+                    continue
+                yield slide["lecture"], slide["slide_id"], model, name, entry
+
+# ------------------------------------------------------
+# `parsed` comes in several shapes depending on the model and on how
+# much of the response was recovered:
+#   concepts: {term, category} | {concepts: [{term, category}], evidence: [...]}
+#   triples:  {s, p, o, modalities, confidence, evidence} | {triples: [...]}
+# ------------------------------------------------------
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def concept_items(parsed):
+    if not isinstance(parsed, dict):
+        return []
+    if "concepts" in parsed:
+        return [c for c in _as_list(parsed["concepts"]) if isinstance(c, dict)]
+    return [parsed] if "term" in parsed else []
+
+def concept_evidence(parsed):
+    if not isinstance(parsed, dict):
+        return []
+    return [e for e in _as_list(parsed.get("evidence")) if isinstance(e, str)]
+
+def triple_items(parsed):
+    if not isinstance(parsed, dict):
+        return []
+    if "triples" in parsed:
+        return [t for t in _as_list(parsed["triples"]) if isinstance(t, dict)]
+    return [parsed] if {"s", "p", "o"} <= parsed.keys() else []
+
+def claims(task, parsed):
+    # (kind, text) pairs a model asserts are quoted from the narration
+    out = []
+    if task == "concepts":
+        out += [("term", c["term"]) for c in concept_items(parsed) if isinstance(c.get("term"), str)]
+        out += [("evidence", e) for e in concept_evidence(parsed)]
+    elif task == "triples":
+        for t in triple_items(parsed):
+            out += [("triple_evidence", e) for e in _as_list(t.get("evidence")) if isinstance(e, str)]
+    return [(kind, text) for kind, text in out if text.strip()]
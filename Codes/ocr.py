@@ -0,0 +1,177 @@
+# DatasetPaper/code/ocr.py
+
+import io
+import os
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+from artifact_cache import get_cache, make_key, file_digest
+from bulk_io import read_many, DEFAULT_CONCURRENCY
+from paths import OUTPUT_DIR, DATA_DIR
+
+# Optional dependency: pytesseract plus a local Tesseract install
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+OCR_DIR = OUTPUT_DIR / "ocr"
+OCR_LANG = "eng"
+OCR_CONFIG = "--psm 3"
+OCR_MAX_SIDE = 1600   # slides are exported at 1280x720; only larger ones shrink
+OCR_VERSION = 1       # bump to invalidate stored OCR text
+
+def require_ocr():
+    if pytesseract is None:
+        raise RuntimeError(
+            "OCR needs pytesseract and the Tesseract binary "
+            "(pip install pytesseract; see https://github.com/tesseract-ocr/tesseract)"
+        )
+
+# ------------------------------------------------------
+# OCR input: downscaled grayscale PNG, kept in the artifact cache
+# ------------------------------------------------------
+def ocr_input_png(image_path, max_side=OCR_MAX_SIDE):
+    with Image.open(image_path) as img:
+        img = img.convert("L")
+        img.thumbnail((max_side, max_side))
+        buf = io.BytesIO()
+        # Fast deflate: ~3x quicker than the default level, ~15% larger
+        img.save(buf, format="PNG", compress_level=1)
+    return buf.getvalue()
+
+def cached_ocr_input(image_path, digest=None, max_side=OCR_MAX_SIDE):
+    key = make_key(digest or file_digest(image_path), max_side)
+    return get_cache().get_or_create(
+        "ocr-input", key, lambda: ocr_input_png(image_path, max_side)
+    )
+
+# ------------------------------------------------------
+# OCR text store: one file per (image content hash, engine settings).
+# Kept outside the size-capped artifact cache so results are never
+# evicted; a re-run only OCRs new or changed slides.
+# ------------------------------------------------------
+def ocr_key(digest, lang=OCR_LANG, config=OCR_CONFIG, max_side=OCR_MAX_SIDE):
+    return make_key("ocr", OCR_VERSION, digest, lang, config, max_side)
+
+class OCRStore:
+    def __init__(self, root=OCR_DIR):
+        self.root = Path(root)
+
+    def _path(self, key):
+        return self.root / key[:2] / f"{key}.txt"
+
+    def get(self, key):
+        try:
+            return self._path(key).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, text):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+# ------------------------------------------------------
+# Worker side (runs in a separate process)
+# ------------------------------------------------------
+def _init_worker():
+    # One Tesseract thread per process; the pool provides the parallelism
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+def _ocr_job(image_path, digest, key, lang, config, max_side, store_root):
+    cache = get_cache()
+    hits, misses = cache.hits, cache.misses
+
+    png = cached_ocr_input(image_path, digest, max_side)
+    with Image.open(io.BytesIO(png)) as img:
+        text = pytesseract.image_to_string(img, lang=lang, config=config)
+
+    OCRStore(store_root).put(key, text)
+    return text, cache.hits - hits, cache.misses - misses
+
+# ------------------------------------------------------
+# Bulk OCR: stored results are looked up first (threads, cheap); only
+# the misses go to the process pool
+# ------------------------------------------------------
+def ocr_many(image_paths, workers=None, lang=OCR_LANG, config=OCR_CONFIG,
+             max_side=OCR_MAX_SIDE, store_root=OCR_DIR, on_error=None,
+             concurrency=DEFAULT_CONCURRENCY):
+    require_ocr()
+    image_paths = [str(p) for p in image_paths]
+    store = OCRStore(store_root)
+
+    digests = read_many(image_paths, file_digest, concurrency, on_error)
+    keys = [ocr_key(d, lang, config, max_side) if d else None for d in digests]
+    texts = read_many(keys, lambda k: store.get(k) if k else "", concurrency)
+
+    todo = [i for i, text in enumerate(texts) if text is None]
+    logging.info(f"[ocr] {len(texts) - len(todo)} stored, {len(todo)} to OCR")
+
+    if todo:
+        cache = get_cache()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = {
+                pool.submit(_ocr_job, image_paths[i], digests[i], keys[i],
+                            lang, config, max_side, str(store_root)): i
+                for i in todo
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    text, hits, misses = future.result()
+                except Exception as exc:
+                    if on_error is None:
+                        raise
+                    on_error(image_paths[i], exc)
+                    text, hits, misses = "", 0, 0
+                texts[i] = text
+                cache.record(hits, misses)
+
+    return texts
+
+def cached_ocr(image_path, lang=OCR_LANG, config=OCR_CONFIG, max_side=OCR_MAX_SIDE):
+    # Single image, in-process
+    require_ocr()
+    digest = file_digest(image_path)
+    key = ocr_key(digest, lang, config, max_side)
+    store = OCRStore()
+    text = store.get(key)
+    if text is None:
+        png = cached_ocr_input(image_path, digest, max_side)
+        with Image.open(io.BytesIO(png)) as img:
+            text = pytesseract.image_to_string(img, lang=lang, config=config)
+        store.put(key, text)
+    return text
+
+
+if __name__ == "__main__":
+    from utils import ensure_dir, setup_logging
+    from load_data import load_dataset
+
+    parser = argparse.ArgumentParser(description="OCR text layer for the slide images")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="OCR processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    setup_logging()
+    data = load_dataset(ocr=True, ocr_workers=args.workers)
+
+    ensure_dir(DATA_DIR)
+    df = data.to_frame(include_text=True)[["lecture", "slide_id", "ocr_text"]]
+    df.to_csv(DATA_DIR / "slide_ocr.csv", index=False)
+    get_cache().log_stats("ocr")
+    print(f"✔ OCR text for {len(df)} slides.")
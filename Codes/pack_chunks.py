@@ -0,0 +1,295 @@
+# DatasetPaper/code/pack_chunks.py
+
+import os
+import re
+import json
+import pickle
+import hashlib
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from artifact_cache import make_key
+from build_splits import slide_key
+from load_data import load_dataset
+from utils import setup_logging
+from paths import OUTPUT_DIR
+
+CHUNK_DIR = OUTPUT_DIR / "chunks"
+TOKEN_COUNT_DIR = OUTPUT_DIR / "token_counts"
+SEPARATOR = "\n\n"
+
+# ------------------------------------------------------
+# Pluggable tokenizers: anything with a unique `name`, encode(text) -> list
+# and decode(tokens) -> str. Counts are cached per (tokenizer, text hash).
+# ------------------------------------------------------
+class WhitespaceTokenizer:
+    # Same token definition as the statistics (utils.tokenize)
+    name = "whitespace"
+
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+class RegexTokenizer:
+    # Words and single punctuation marks; closer to subword counts than
+    # whitespace splitting, still dependency-free
+    name = "regex"
+    pattern = re.compile(r"\w+|[^\w\s]")
+
+    def encode(self, text):
+        return self.pattern.findall(text)
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+class TiktokenTokenizer:
+    # Optional dependency: exact counts for OpenAI-style BPE vocabularies
+    def __init__(self, encoding="cl100k_base"):
+        import tiktoken
+        self.encoding = tiktoken.get_encoding(encoding)
+        self.name = f"tiktoken-{encoding}"
+
+    def encode(self, text):
+        return self.encoding.encode(text)
+
+    def decode(self, tokens):
+        return self.encoding.decode(tokens)
+
+TOKENIZERS = {
+    "whitespace": WhitespaceTokenizer,
+    "regex": RegexTokenizer,
+    "tiktoken": TiktokenTokenizer,
+}
+
+def get_tokenizer(tokenizer):
+    return TOKENIZERS[tokenizer]() if isinstance(tokenizer, str) else tokenizer
+
+# ------------------------------------------------------
+# Per-slide token counts, persisted per tokenizer and keyed by text hash:
+# packing experiments (budget, overlap, strategy) never recount
+# ------------------------------------------------------
+def _text_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+class TokenCountCache:
+    def __init__(self, tokenizer, root=TOKEN_COUNT_DIR):
+        self.tokenizer = tokenizer
+        self.path = Path(root) / f"{tokenizer.name}.pkl"
+        try:
+            with open(self.path, "rb") as f:
+                self.counts = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.counts = {}
+        self.new = 0
+
+    def count_many(self, texts):
+        hashes = [_text_hash(t) for t in texts]
+        out = np.empty(len(texts), dtype=np.int64)
+        for i, (h, text) in enumerate(zip(hashes, texts)):
+            n = self.counts.get(h)
+            if n is None:
+                n = self.counts[h] = len(self.tokenizer.encode(text))
+                self.new += 1
+            out[i] = n
+        return out
+
+    def save(self):
+        if not self.new:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(self.counts, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+        self.new = 0
+
+# ------------------------------------------------------
+# Segmentation of one lecture into runs of adjacent slides.
+# Both return [(start, end), ...] with sum(counts[start:end]) <= budget
+# (a single slide over budget becomes its own run and is split later).
+# ------------------------------------------------------
+def segment_greedy(counts, budget):
+    runs, start, total = [], 0, 0
+    for i, n in enumerate(counts):
+        if i > start and total + n > budget:
+            runs.append((start, i))
+            start, total = i, 0
+        total += n
+    if len(counts):
+        runs.append((start, len(counts)))
+    return runs
+
+def segment_balanced(counts, budget):
+    # Fewest, evenly filled windows: minimise the squared slack of every
+    # run except the last (text-justification DP over prefix sums)
+    n = len(counts)
+    prefix = np.concatenate([[0], np.cumsum(counts)])
+    cost = np.full(n + 1, np.inf)
+    cost[0] = 0.0
+    back = np.zeros(n + 1, dtype=np.int64)
+    for end in range(1, n + 1):
+        starts = np.arange(end)
+        sizes = prefix[end] - prefix[starts]
+        ok = (sizes <= budget) | (starts == end - 1)
+        slack = 0.0 if end == n else (budget - sizes) ** 2.0
+        total = np.where(ok, cost[starts] + slack, np.inf)
+        back[end] = int(np.argmin(total))
+        cost[end] = total[back[end]]
+
+    runs, end = [], n
+    while end > 0:
+        runs.append((int(back[end]), end))
+        end = back[end]
+    return runs[::-1]
+
+STRATEGIES = {"greedy": segment_greedy, "balanced": segment_balanced}
+
+def overlap_start(counts, start, prev_start, overlap):
+    # Trailing whole slides of the previous run that fit in `overlap` tokens
+    ctx, total = start, 0
+    while ctx > prev_start and total + counts[ctx - 1] <= overlap:
+        ctx -= 1
+        total += int(counts[ctx])
+    return ctx, total
+
+# ------------------------------------------------------
+# Packing
+# ------------------------------------------------------
+def _chunk_id(lecture_num, first, last, settings, keys, part=None):
+    digest = make_key(settings, keys, part)[:8]
+    suffix = f"_p{part:02d}" if part is not None else ""
+    return f"lec{lecture_num:03d}_s{first:04d}-{last:04d}{suffix}_{digest}"
+
+def pack_lecture(slides, counts, tokenizer, budget=2048, overlap=128, strategy="greedy"):
+    # slides: records of one lecture, in slide order; counts: their token counts
+    if overlap >= budget:
+        raise ValueError("overlap must be smaller than the token budget")
+    settings = (tokenizer.name, budget, overlap, strategy)
+    # Every slide is charged the separator that joins it to the previous
+    # one (0 tokens for whitespace / regex, 1 for cl100k "\n\n")
+    sep = len(tokenizer.encode(SEPARATOR))
+    counts = np.asarray(counts) + sep
+    # Room for the overlap is reserved, so context + new slides <= budget
+    runs = STRATEGIES[strategy](counts, budget - overlap)
+
+    prev_start = None
+    for start, end in runs:
+        ctx, ctx_tokens, tail = start, 0, []
+        if prev_start is not None:
+            ctx, ctx_tokens = overlap_start(counts, start, prev_start, overlap)
+            if ctx > prev_start and ctx_tokens < overlap:
+                # Top the overlap up with the tail of the slide before
+                tail = tokenizer.encode(slides[ctx - 1]["text"])[-(overlap - ctx_tokens):]
+        prev_start = start
+
+        chosen = slides[ctx:end]
+        keys = [slide_key(s["lecture_num"], s["slide_num"]) for s in chosen]
+        base = {
+            "lecture": chosen[0]["lecture"],
+            "slides": [s["slide_id"] for s in chosen],
+            "keys": keys,
+            "images": [s["image_path"] for s in chosen],
+            "overlap_slides": start - ctx,
+            "overlap_tokens": ctx_tokens + len(tail),
+        }
+        lecture_num = chosen[0]["lecture_num"]
+        first, last = chosen[0]["slide_num"], chosen[-1]["slide_num"]
+
+        # The first piece of text has no separator before it
+        total = int(counts[ctx:end].sum()) + (len(tail) + sep if tail else 0) - sep
+        if total <= budget:
+            texts = [s["text"] for s in chosen]
+            if tail:
+                base["context_slide"] = slides[ctx - 1]["slide_id"]
+                texts.insert(0, tokenizer.decode(tail))
+            text = SEPARATOR.join(texts)
+            yield {
+                "id": _chunk_id(lecture_num, first, last, settings, keys),
+                **base,
+                # Counted on the joined text: exact for any tokenizer, BPE
+                # merges across the separators included
+                "num_tokens": len(tokenizer.encode(text)),
+                "text": text,
+            }
+            continue
+
+        # One slide alone is over budget: split its tokens into windows
+        # that overlap by `overlap` tokens
+        tokens = tokenizer.encode(chosen[-1]["text"])
+        step = budget - overlap
+        for part, pos in enumerate(range(0, max(len(tokens) - overlap, 1), step)):
+            piece = tokens[pos:pos + budget]
+            yield {
+                "id": _chunk_id(lecture_num, first, last, settings, keys, part),
+                **{**base, "slides": base["slides"][-1:], "keys": keys[-1:],
+                   "images": base["images"][-1:], "overlap_slides": 0,
+                   "overlap_tokens": overlap if part else 0},
+                "part": part,
+                "num_tokens": len(piece),
+                "text": tokenizer.decode(piece),
+            }
+
+def pack_corpus(data=None, tokenizer="whitespace", budget=2048, overlap=128, strategy="greedy"):
+    # Generator over the whole corpus, lecture by lecture
+    data = load_dataset() if data is None else data
+    tokenizer = get_tokenizer(tokenizer)
+    cache = TokenCountCache(tokenizer)
+
+    for lecture_id, slides in data.items():
+        slides = list(slides)
+        if not slides:
+            continue
+        counts = cache.count_many([s["text"] for s in slides])
+        yield from pack_lecture(slides, counts, tokenizer, budget, overlap, strategy)
+
+    logging.info(f"[packing] {tokenizer.name}: {cache.new} slide token counts computed")
+    cache.save()
+
+# ------------------------------------------------------
+# Streaming JSONL output
+# ------------------------------------------------------
+def write_jsonl(chunks, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    n = tokens = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+                n += 1
+                tokens += chunk["num_tokens"]
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return n, tokens
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack slide narrations into token-budgeted chunks")
+    parser.add_argument("--tokenizer", choices=sorted(TOKENIZERS), default="whitespace")
+    parser.add_argument("--budget", type=int, default=2048, help="max tokens per chunk")
+    parser.add_argument("--overlap", type=int, default=128,
+                        help="tokens from the end of one chunk repeated at the start of the next "
+                             "(whole slides where they fit, then the tail of the slide before)")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="greedy")
+    parser.add_argument("--out", default=None, help="JSONL path (default: ../outputs/chunks/...)")
+    args = parser.parse_args()
+
+    setup_logging()
+    out = args.out or CHUNK_DIR / (
+        f"chunks_{args.tokenizer}_b{args.budget}_o{args.overlap}_{args.strategy}.jsonl"
+    )
+    n, tokens = write_jsonl(
+        pack_corpus(None, args.tokenizer, args.budget, args.overlap, args.strategy), out
+    )
+    logging.info(f"[packing] wrote {n} chunks to {out}")
+    print(f"✔ {n} chunks written to {out} (mean fill {tokens / max(n, 1) / args.budget:.1%}).")
@@ -0,0 +1,19 @@
+# DatasetPaper/code/paths.py
+
+from pathlib import Path
+
+# ------------------------------------------------------
+# Every location the scripts read or write, anchored at the repository
+# root (the parent of Codes/) rather than the working directory
+# ------------------------------------------------------
+ROOT = Path(__file__).resolve().parent.parent
+
+DATASET_ROOT = ROOT / "Lectures"
+MODEL_OUTPUT_ROOT = ROOT / "Optional_model_outputs"
+
+DATA_DIR = ROOT / "data"            # CSV / JSON results of the standalone scripts
+TABLE_DIR = DATA_DIR / "tables"
+FIGURE_DIR = ROOT / "figures"
+OUTPUT_DIR = ROOT / "outputs"       # caches, logs and the builder's outputs
+
+STORE_PATH = OUTPUT_DIR / "medi_slate.db"
@@ -0,0 +1,278 @@
+# DatasetPaper/code/pipeline_dag.py
+
+import os
+import json
+import time
+import pickle
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from artifact_cache import make_key, file_lock
+
+# ------------------------------------------------------
+# Pipeline stages as a DAG: each stage names the stages it needs, gets
+# their results as positional arguments, and runs as soon as they are
+# done. The same graph is what the pipeline diagram is drawn from.
+# ------------------------------------------------------
+class Stage:
+    __slots__ = ("name", "func", "deps", "label", "inputs", "outputs", "checkpoint")
+
+    def __init__(self, name, func, deps=(), label=None, inputs=None, outputs=(),
+                 checkpoint=True):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.label = label or name.replace("_", " ").title()
+        self.inputs = inputs          # () -> cheap fingerprint of external inputs
+        self.outputs = tuple(outputs)  # files the stage writes
+        self.checkpoint = checkpoint
+
+# ------------------------------------------------------
+# Per-item failures (a corrupt JPG, an undecodable text file) are recorded
+# against their stage and skipped instead of aborting the build
+# ------------------------------------------------------
+class FailureLog:
+    def __init__(self):
+        self.entries = []
+        self._lock = threading.Lock()
+
+    def record(self, stage, item, exc):
+        entry = {"stage": stage, "item": str(item), "error": f"{type(exc).__name__}: {exc}"}
+        with self._lock:
+            self.entries.append(entry)
+        logging.warning(f"[pipeline] {stage}: skipped {item} ({entry['error']})")
+
+    def recorder(self, stage):
+        # on_error(item, exc) callback for one stage (see bulk_io.read_many)
+        return lambda item, exc: self.record(stage, item, exc)
+
+    def for_stage(self, stage):
+        with self._lock:
+            return [e for e in self.entries if e["stage"] == stage]
+
+    def extend(self, entries):
+        with self._lock:
+            self.entries.extend(entries)
+
+class Pipeline:
+    def __init__(self, name, checkpoint_dir=None, version=None):
+        self.name = name
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        self.version = version  # e.g. a digest of the code defining the stages
+        self.stages = {}
+        self.results = {}
+        self.timings = {}
+        self.failures = FailureLog()
+
+    def add(self, name, func, deps=(), label=None, inputs=None, outputs=(), checkpoint=True):
+        if name in self.stages:
+            raise ValueError(f"duplicate stage: {name}")
+        self.stages[name] = Stage(name, func, deps, label, inputs, outputs, checkpoint)
+        return func
+
+    def stage(self, name, deps=(), **options):
+        # Decorator form of add()
+        return lambda func: self.add(name, func, deps, **options)
+
+    def order(self):
+        # Topological order (Kahn); registration order breaks ties
+        for stage in self.stages.values():
+            missing = [d for d in stage.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"stage {stage.name} depends on unknown stage(s) {missing}")
+
+        remaining = {name: set(stage.deps) for name, stage in self.stages.items()}
+        ordered = []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"dependency cycle among stages {sorted(remaining)}")
+            for name in ready:
+                ordered.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return ordered
+
+    # --------------------------------------------------
+    # Checkpoints
+    #
+    # A stage's key hashes its own input fingerprint with the keys of the
+    # stages it depends on, so a change anywhere upstream invalidates
+    # everything downstream. The result is pickled first and the ".done"
+    # marker (holding the key) is written last, both atomically and under
+    # a per-stage file lock, so a crash or a concurrent build can never
+    # leave a marker pointing at a partial result.
+    # --------------------------------------------------
+    def stage_keys(self):
+        keys = {}
+        for name in self.order():
+            stage = self.stages[name]
+            fingerprint = stage.inputs() if stage.inputs else None
+            keys[name] = make_key(self.name, self.version, name, fingerprint,
+                                  [keys[d] for d in stage.deps])
+        return keys
+
+    def _checkpoint_paths(self, name):
+        base = self.checkpoint_dir / name
+        return base.with_suffix(".pkl"), base.with_suffix(".done"), base.with_suffix(".lock")
+
+    def _load_checkpoint(self, stage, key):
+        if self.checkpoint_dir is None or not stage.checkpoint:
+            return None
+        data_path, done_path, _ = self._checkpoint_paths(stage.name)
+        try:
+            if done_path.read_text(encoding="utf-8") != key:
+                return None
+            with open(data_path, "rb") as f:
+                checkpoint = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if checkpoint.get("key") != key:
+            return None
+        if not all(Path(p).exists() for p in stage.outputs):
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, stage, key, result):
+        if self.checkpoint_dir is None or not stage.checkpoint:
+            return
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        data_path, done_path, lock_path = self._checkpoint_paths(stage.name)
+        checkpoint = {
+            "key": key,
+            "result": result,
+            "failures": self.failures.for_stage(stage.name),
+        }
+        with file_lock(lock_path):
+            _atomic_write(data_path, pickle.dumps(checkpoint, protocol=pickle.HIGHEST_PROTOCOL))
+            _atomic_write(done_path, key.encode("utf-8"))
+
+    # --------------------------------------------------
+    # Execution
+    # --------------------------------------------------
+    def _run_stage(self, stage, key, resume, t0):
+        start = time.perf_counter()
+        checkpoint = self._load_checkpoint(stage, key) if resume else None
+        if checkpoint is not None:
+            result = checkpoint["result"]
+            self.failures.extend(checkpoint["failures"])
+        else:
+            result = stage.func(*(self.results[d] for d in stage.deps))
+            self._save_checkpoint(stage, key, result)
+        end = time.perf_counter()
+
+        resumed = checkpoint is not None
+        self.timings[stage.name] = {
+            "start": start - t0, "end": end - t0, "seconds": end - start, "resumed": resumed,
+        }
+        logging.info(
+            f"[pipeline] {stage.name} {'resumed from checkpoint' if resumed else 'finished'} "
+            f"in {end - start:.2f}s"
+        )
+        return result
+
+    def run(self, max_workers=None, resume=False):
+        # Every completed stage is checkpointed; with resume=True, stages
+        # whose checkpoint matches their current key are loaded, not rerun
+        order = self.order()
+        keys = self.stage_keys()
+        pending = list(order)
+        done = set()
+        t0 = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(order) or 1) as pool:
+            running = {}
+            while pending or running:
+                # Submit every stage whose dependencies have all finished
+                for name in [n for n in pending if all(d in done for d in self.stages[n].deps)]:
+                    pending.remove(name)
+                    future = pool.submit(self._run_stage, self.stages[name], keys[name], resume, t0)
+                    running[future] = name
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                    except BaseException:
+                        logging.exception(f"[pipeline] stage {name} failed")
+                        # Let stages already running finish, start nothing new
+                        wait(running)
+                        raise
+                    done.add(name)
+
+        wall = time.perf_counter() - t0
+        busy = sum(t["seconds"] for t in self.timings.values())
+        resumed = sum(t["resumed"] for t in self.timings.values())
+        logging.info(
+            f"[pipeline] {self.name}: {len(done)} stages ({resumed} resumed) in {wall:.2f}s wall "
+            f"({busy:.2f}s of stage time, {busy / max(wall, 1e-9):.2f}x overlap), "
+            f"{len(self.failures.entries)} item failures skipped"
+        )
+        return self.results
+
+    # --------------------------------------------------
+    # Timings (persisted so the diagram can be redrawn without a rebuild)
+    # --------------------------------------------------
+    def save_timings(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.timings, indent=2), encoding="utf-8")
+
+    def save_failures(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.failures.entries, indent=2), encoding="utf-8")
+
+    def load_timings(self, path):
+        path = Path(path)
+        if path.exists():
+            self.timings = json.loads(path.read_text(encoding="utf-8"))
+        return self.timings
+
+    # --------------------------------------------------
+    # Diagram derived from the registered graph
+    # --------------------------------------------------
+    def digraph(self, timings=None):
+        from graphviz import Digraph
+
+        timings = self.timings if timings is None else timings
+        dot = Digraph(comment=f"{self.name} Pipeline")
+        dot.attr(rankdir="LR")
+        dot.attr("node", shape="box", style="rounded")
+
+        for name in self.order():
+            stage = self.stages[name]
+            label = stage.label
+            if timings.get(name, {}).get("resumed"):
+                label += "\n(resumed)"
+            elif name in timings:
+                label += f"\n{timings[name]['seconds']:.2f} s"
+            dot.node(name, label)
+            for dep in stage.deps:
+                dot.edge(dep, name)
+        return dot
+
+    def render_diagram(self, path, format="png", timings=None):
+        # Graphviz may live outside PATH (e.g. a Windows install);
+        # point GRAPHVIZ_BIN at its bin directory instead of editing code
+        graphviz_bin = os.environ.get("GRAPHVIZ_BIN")
+        if graphviz_bin and graphviz_bin not in os.environ["PATH"].split(os.pathsep):
+            os.environ["PATH"] += os.pathsep + graphviz_bin
+
+        self.digraph(timings).render(str(path), format=format, cleanup=True)
+
+def _atomic_write(path, data):
+    fd, tmp = tempfile.mkstemp(dir=Path(path).parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
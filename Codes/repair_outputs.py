@@ -0,0 +1,354 @@
+# DatasetPaper/code/repair_outputs.py
+
+import os
+import re
+import json
+import time
+import pickle
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from artifact_cache import make_key
+from utils import ensure_dir, setup_logging
+from paths import OUTPUT_DIR, DATA_DIR
+from model_outputs import (
+    MODEL_OUTPUT_ROOT, load_model_outputs, iter_entries, concept_items, triple_items,
+)
+
+REPAIR_CACHE = OUTPUT_DIR / "repair_cache.pkl"
+REPAIRED_FILE = DATA_DIR / "model_outputs_repaired.jsonl"
+REPAIR_VERSION = 1   # bump when the extractor or the schema changes
+
+# Labels offered by the prompts; other labels are kept but counted
+CATEGORIES = {
+    "software", "workflow", "mathematics", "signal_processing", "frequency_domain",
+    "physics", "instrumentation", "data_processing", "reconstruction", "quality_metric",
+    "communication", "modality", "anatomy", "algorithm", "ai_ml",
+}
+PREDICATES = {
+    "uses", "via", "represents", "depends_on", "measures", "produces", "reconstructs_with",
+}
+MODALITIES = {"text", "image"}
+
+# ------------------------------------------------------
+# Tolerant JSON extraction from a raw model response. `raw_output` often
+# echoes the chat prompt (including its JSON template), wraps the answer
+# in a code fence, leaves trailing commas, or stops mid-array when the
+# generation hit its token limit.
+# ------------------------------------------------------
+ASSISTANT_RE = re.compile(r"(?:^|\n)\s*assistant\s*\n")
+FENCE_RE = re.compile(r"```(?:json)?\s*\n?(.*?)(?:```|$)", re.S)
+TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+
+def response_text(raw):
+    try:
+        record = json.loads(raw)
+    except (TypeError, ValueError):
+        record = raw
+    text = (record.get("raw_output") if isinstance(record, dict) else record) or ""
+    # Keep only the model's turn, not the echoed prompt
+    turns = list(ASSISTANT_RE.finditer(text))
+    if turns:
+        text = text[turns[-1].end():]
+    fence = FENCE_RE.search(text)
+    return fence.group(1) if fence else text
+
+def _decode_all(text, decoder=json.JSONDecoder(strict=False)):
+    # Every top-level JSON value in order (some models emit one object per item)
+    values, pos = [], 0
+    while True:
+        starts = [i for i in (text.find("{", pos), text.find("[", pos)) if i >= 0]
+        if not starts:
+            return values, None
+        start = min(starts)
+        try:
+            value, pos = decoder.raw_decode(text, start)
+        except ValueError:
+            return values, text[start:]
+        values.append(value)
+
+def _close_truncated(text, max_attempts=64):
+    # Cut after the last complete value and close the brackets still open
+    stack, in_string, escaped, cuts = [], False, False, []
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            cuts.append((i + 1, "".join(reversed(stack))))
+        elif ch == "," and stack:
+            cuts.append((i, "".join(reversed(stack))))
+
+    for cut, closers in reversed(cuts[-max_attempts:]):
+        try:
+            return json.loads(text[:cut].rstrip().rstrip(",") + closers, strict=False)
+        except ValueError:
+            continue
+    return None
+
+def extract_json(text):
+    # Returns (values, fixes): every JSON value recovered and the fixes needed
+    fixes = []
+    values, rest = _decode_all(text)
+    if rest is not None:
+        fixed = TRAILING_COMMA_RE.sub(r"\1", rest)
+        more, rest = _decode_all(fixed)
+        if more:
+            fixes.append("trailing_commas")
+            values += more
+        if rest is not None:
+            value = _close_truncated(rest)
+            if value is not None:
+                fixes.append("truncated")
+                values.append(value)
+    if len(values) > 1:
+        fixes.append("multiple_values")
+    return values, fixes
+
+# ------------------------------------------------------
+# Schema: every recovered value is normalised to the wrapped shape
+#   concepts: {"concepts": [{term, category}], "evidence": [str]}
+#   triples:  {"triples": [{s, p, o, modalities, confidence, evidence}]}
+# and items that do not validate are dropped (and counted)
+# ------------------------------------------------------
+def _text(value):
+    # Non-empty, and not a template placeholder echoed from the prompt
+    if not isinstance(value, str) or not value.strip():
+        return False
+    value = value.strip()
+    return not (value.startswith("<") and value.endswith(">"))
+
+def valid_concept(item):
+    return isinstance(item, dict) and _text(item.get("term")) and _text(item.get("category"))
+
+def valid_triple(item):
+    if not isinstance(item, dict) or not all(_text(item.get(k)) for k in ("s", "p", "o")):
+        return False
+    if "|" in item["p"]:
+        return False  # the prompt's "uses|via|..." template, not a choice
+    modalities = item.get("modalities", [])
+    if not isinstance(modalities, list) or not set(modalities) <= MODALITIES:
+        return False
+    confidence = item.get("confidence")
+    if confidence is not None:
+        try:
+            if not 0.0 <= float(confidence) <= 1.0:
+                return False
+        except (TypeError, ValueError):
+            return False
+    return item.get("evidence") is None or isinstance(item.get("evidence"), (str, list))
+
+def normalize(task, values):
+    # -> (parsed, valid item count, invalid item count, off-vocabulary labels)
+    items, evidence = [], []
+    for value in values:
+        for part in value if isinstance(value, list) else [value]:
+            if task == "concepts":
+                items += concept_items(part)
+                if isinstance(part, dict):
+                    ev = part.get("evidence")
+                    evidence += [e for e in (ev if isinstance(ev, list) else [ev]) if _text(e)]
+            else:
+                items += triple_items(part)
+
+    check = valid_concept if task == "concepts" else valid_triple
+    valid = [item for item in items if check(item)]
+    invalid = len(items) - len(valid)
+    if task == "concepts":
+        off_vocab = sum(item["category"] not in CATEGORIES for item in valid)
+        parsed = {"concepts": valid, "evidence": evidence}
+    else:
+        off_vocab = sum(item["p"] not in PREDICATES for item in valid)
+        parsed = {"triples": valid}
+    return parsed, len(valid), invalid, off_vocab
+
+def repair_raw(task, raw):
+    text = response_text(raw)
+    if not text.strip():
+        return {"status": "empty", "parsed": None, "items": 0, "invalid": 0,
+                "off_vocab": 0, "fixes": []}
+    values, fixes = extract_json(text)
+    if not values:
+        return {"status": "failed", "parsed": None, "items": 0, "invalid": 0,
+                "off_vocab": 0, "fixes": fixes}
+    parsed, n_valid, n_invalid, off_vocab = normalize(task, values)
+    return {
+        "status": "repaired" if fixes or n_invalid else "ok",
+        "parsed": parsed,
+        "items": n_valid,
+        "invalid": n_invalid,
+        "off_vocab": off_vocab,
+        "fixes": fixes,
+    }
+
+def _repair_job(job):
+    return repair_raw(*job)
+
+# ------------------------------------------------------
+# Results cached by (version, task, raw text) in one pickle, so a re-run
+# only re-parses new or changed responses
+# ------------------------------------------------------
+class RepairCache:
+    def __init__(self, path=REPAIR_CACHE):
+        self.path = Path(path)
+        try:
+            with open(self.path, "rb") as f:
+                self.results = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.results = {}
+        self.new = 0
+
+    @staticmethod
+    def key(task, raw):
+        return make_key(REPAIR_VERSION, task, (raw or "").encode("utf-8"))
+
+    def save(self, keep=None):
+        # keep: keys still in use; results for responses that changed are dropped
+        stale = set(self.results) - keep if keep is not None else ()
+        if stale:
+            self.results = {k: v for k, v in self.results.items() if k not in stale}
+        if not (self.new or stale):
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(self.results, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+        self.new = 0
+
+def repair_entries(outputs, workers=None, cache_path=REPAIR_CACHE):
+    # -> list of (lecture, slide_id, model, task, original parsed, result)
+    entries = list(iter_entries(outputs))
+    cache = RepairCache(cache_path)
+    keys = [cache.key(task, entry.get("raw")) for _, _, _, task, entry in entries]
+
+    cached = sum(key in cache.results for key in keys)
+    todo = {}
+    for key, (_, _, _, task, entry) in zip(keys, entries):
+        if key not in cache.results:
+            todo.setdefault(key, (task, entry.get("raw")))
+    logging.info(f"[repair] {cached} cached, {len(todo)} to parse")
+
+    jobs = list(todo.values())
+    if workers == 1 or len(jobs) < 64:
+        # Not worth starting processes for a handful of responses
+        results = [_repair_job(job) for job in jobs]
+    else:
+        chunksize = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_repair_job, jobs, chunksize=chunksize))
+    cache.results.update(zip(todo, results))
+    cache.new += len(results)
+
+    cache.save(keep=set(keys))
+    return [
+        (lecture, slide_id, model, task, entry.get("parsed"), cache.results[key])
+        for key, (lecture, slide_id, model, task, entry) in zip(keys, entries)
+    ]
+
+# ------------------------------------------------------
+# Reporting and output
+# ------------------------------------------------------
+def _count_items(task, parsed):
+    return len(concept_items(parsed) if task == "concepts" else triple_items(parsed))
+
+REPORT_COLUMNS = ["model", "task", "entries", "parsed_before", "parsed_after", "items_before",
+                  "items_after", "invalid_items", "off_vocab_labels", "repaired", "failed"]
+
+def repair_report(repaired):
+    rows = []
+    for _, _, model, task, original, result in repaired:
+        rows.append({
+            "model": model,
+            "task": task,
+            "entries": 1,
+            "parsed_before": original is not None,
+            "parsed_after": result["parsed"] is not None,
+            "items_before": _count_items(task, original),
+            "items_after": result["items"],
+            "invalid_items": result["invalid"],
+            "off_vocab_labels": result["off_vocab"],
+            "repaired": result["status"] == "repaired",
+            "failed": result["status"] in ("failed", "empty"),
+        })
+    # Columns given explicitly so no entries (an empty output root) gives
+    # an empty report rather than a KeyError
+    df = pd.DataFrame(rows, columns=REPORT_COLUMNS).groupby(["model", "task"], sort=False).sum()
+    df["recovered_items"] = (df["items_after"] - df["items_before"]).clip(lower=0)
+    return df.reset_index()
+
+def write_repaired(repaired, path=REPAIRED_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for lecture, slide_id, model, task, _, result in repaired:
+                f.write(json.dumps({
+                    "lecture": lecture, "slide_id": slide_id, "model": model, "task": task,
+                    "status": result["status"], "fixes": result["fixes"],
+                    "parsed": result["parsed"],
+                }, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def load_repaired(path=REPAIRED_FILE):
+    # {(lecture, slide_id, model, task): parsed} from a previous repair run
+    repaired = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            r = json.loads(line)
+            repaired[(r["lecture"], r["slide_id"], r["model"], r["task"])] = r["parsed"]
+    return repaired
+
+def repair_outputs(root=MODEL_OUTPUT_ROOT, workers=None, out_path=REPAIRED_FILE,
+                   report_path=DATA_DIR / "repair_report.csv"):
+    t0 = time.perf_counter()
+    outputs = load_model_outputs(root)
+    repaired = repair_entries(outputs, workers)
+    report = repair_report(repaired)
+
+    ensure_dir(Path(report_path).parent)
+    write_repaired(repaired, out_path)
+    report.to_csv(report_path, index=False)
+
+    for row in report.itertuples():
+        logging.info(
+            f"[repair] {row.model} {row.task}: {row.parsed_after}/{row.entries} parsed "
+            f"(was {row.parsed_before}), {row.items_after} items (was {row.items_before}), "
+            f"{row.invalid_items} invalid dropped"
+        )
+    logging.info(f"[repair] {len(repaired)} responses in {time.perf_counter() - t0:.2f}s")
+    print(f"✔ {int(report['recovered_items'].sum())} items recovered from raw responses "
+          f"(see {report_path}).")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-parse and repair raw model responses")
+    parser.add_argument("--root", default=str(MODEL_OUTPUT_ROOT), help="model output directory")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parser processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    setup_logging()
+    repair_outputs(args.root, args.workers)
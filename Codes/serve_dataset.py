@@ -0,0 +1,315 @@
+# DatasetPaper/code/serve_dataset.py
+
+import re
+import gzip
+import json
+import asyncio
+import hashlib
+import argparse
+from pathlib import Path
+from collections import OrderedDict
+from email.utils import formatdate
+from urllib.parse import urlsplit, parse_qs
+
+from load_data import load_dataset
+from build_splits import flatten_dataset
+from artifact_cache import get_cache
+from bulk_io import prefer_derivative
+from utils import cached_thumbnail, setup_logging
+from paths import STORE_PATH
+
+THUMB_SIZE = 320
+THUMB_CACHE_ENTRIES = 512
+GZIP_MIN_BYTES = 1024
+MAX_PER_PAGE = 500
+IMAGE_TYPES = {".jpg": "image/jpeg", ".webp": "image/webp", ".png": "image/png"}
+
+STATUS_TEXT = {
+    200: "OK", 206: "Partial Content", 304: "Not Modified", 400: "Bad Request",
+    404: "Not Found", 405: "Method Not Allowed", 416: "Range Not Satisfiable",
+}
+
+# ------------------------------------------------------
+# In-memory LRU for hot thumbnails (in front of the on-disk artifact cache)
+# ------------------------------------------------------
+class LRUCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+# ------------------------------------------------------
+# Response helpers
+# ------------------------------------------------------
+def make_etag(*parts):
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+def etag_matches(header, etag):
+    # If-None-Match: "*" or a comma-separated list of (possibly weak) tags
+    if not header or not etag:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in (t.removeprefix("W/") for t in tags)
+
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+def parse_range(header, size):
+    # Single "bytes=start-end" ranges only; returns (start, end) inclusive.
+    # A malformed or unsupported header (other units, several ranges) is
+    # ignored: None, and the full response goes out (RFC 9110 14.2). A
+    # valid range that misses the body raises ValueError (-> 416).
+    match = RANGE_RE.fullmatch(header.strip())
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+    start, end = match.groups()
+    if start == "":
+        length = int(end)
+        if length == 0 or size == 0:
+            raise ValueError(f"unsatisfiable range {header!r}")
+        return max(0, size - length), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        return None
+    if start >= size:
+        raise ValueError(f"unsatisfiable range {header!r}")
+    return start, min(int(end), size - 1) if end else size - 1
+
+class Response:
+    def __init__(self, status=200, body=b"", content_type="application/json",
+                 etag=None, headers=None):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag
+        self.headers = headers or {}
+
+def json_response(payload, status=200):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return Response(status, body, "application/json; charset=utf-8", make_etag(body))
+
+def error_response(status, message):
+    return json_response({"error": message}, status)
+
+# ------------------------------------------------------
+# Dataset server
+# ------------------------------------------------------
+class DatasetServer:
+    def __init__(self, records, thumb_size=THUMB_SIZE, thumb_cache_entries=THUMB_CACHE_ENTRIES):
+        self.records = records
+        self.by_key = {r["key"]: r for r in records}
+        self.texts = {r["key"]: r["text"].encode("utf-8") for r in records}
+        self.thumb_size = thumb_size
+        self.thumbs = LRUCache(thumb_cache_entries)
+
+    # ---------------- routing ----------------
+    async def route(self, path, query, headers):
+        parts = [p for p in path.split("/") if p]
+
+        if parts == ["manifest"]:
+            return self.manifest_page(query)
+
+        if len(parts) == 3 and parts[0] == "slides":
+            record = self.by_key.get(parts[1])
+            if record is None:
+                return error_response(404, f"unknown slide {parts[1]}")
+            if parts[2] == "text":
+                body = self.texts[record["key"]]
+                return Response(200, body, "text/plain; charset=utf-8", make_etag(body))
+            if parts[2] == "image":
+                return await self.image(record, headers.get("if-none-match"))
+            if parts[2] == "thumb":
+                return await self.thumbnail(record)
+
+        return error_response(404, f"no route for {path}")
+
+    def manifest_page(self, query):
+        try:
+            page = max(1, int(query.get("page", ["1"])[0]))
+            per_page = min(MAX_PER_PAGE, max(1, int(query.get("per_page", ["50"])[0])))
+        except ValueError:
+            return error_response(400, "page and per_page must be integers")
+
+        lecture = query.get("lecture", [None])[0]
+        records = self.records if lecture is None else [
+            r for r in self.records if r["lecture"] == lecture
+        ]
+
+        start = (page - 1) * per_page
+        items = [{
+            "key": r["key"],
+            "lecture": r["lecture"],
+            "slide_id": r["slide_id"],
+            "slide_num": r["slide_num"],
+            "num_tokens": r["num_tokens"],
+            "text_url": f"/slides/{r['key']}/text",
+            "image_url": f"/slides/{r['key']}/image",
+            "thumb_url": f"/slides/{r['key']}/thumb",
+        } for r in records[start:start + per_page]]
+
+        return json_response({
+            "page": page,
+            "per_page": per_page,
+            "total": len(records),
+            "pages": -(-len(records) // per_page),
+            "items": items,
+        })
+
+    def _stat(self, path):
+        st = Path(path).stat()
+        return make_etag(path, st.st_mtime_ns, st.st_size)
+
+    async def image(self, record, if_none_match=None):
+        loop = asyncio.get_running_loop()
+        # The compact derivative (WebP / palette PNG) when one was generated
+        path = await loop.run_in_executor(None, prefer_derivative, record["image_path"])
+        content_type = IMAGE_TYPES.get(Path(path).suffix.lower(), "image/jpeg")
+        etag = await loop.run_in_executor(None, self._stat, path)
+        if etag_matches(if_none_match, etag):
+            # finalize() turns this into a 304 without reading the file
+            return Response(200, b"", content_type, etag)
+        body = await loop.run_in_executor(None, Path(path).read_bytes)
+        return Response(200, body, content_type, etag, {"Accept-Ranges": "bytes"})
+
+    async def thumbnail(self, record):
+        key = record["key"]
+        cached = self.thumbs.get(key)
+        if cached is None:
+            loop = asyncio.get_running_loop()
+            body = await loop.run_in_executor(
+                None, cached_thumbnail, record["image_path"], self.thumb_size
+            )
+            cached = (body, make_etag(body))
+            self.thumbs.put(key, cached)
+        body, etag = cached
+        return Response(200, body, "image/jpeg", etag, {"Accept-Ranges": "bytes"})
+
+    # ---------------- HTTP plumbing ----------------
+    def finalize(self, response, headers, method):
+        # Conditional GET
+        if etag_matches(headers.get("if-none-match"), response.etag):
+            return Response(304, b"", response.content_type, response.etag)
+
+        # Byte ranges
+        if response.status == 200 and "range" in headers and response.headers.get("Accept-Ranges"):
+            size = len(response.body)
+            try:
+                byte_range = parse_range(headers["range"], size)
+            except ValueError:
+                return Response(416, b"", response.content_type, response.etag,
+                                {"Content-Range": f"bytes */{size}"})
+            if byte_range is not None:
+                start, end = byte_range
+                response = Response(206, response.body[start:end + 1], response.content_type,
+                                    response.etag, dict(response.headers))
+                response.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+                return response
+
+        # gzip for text payloads only; JPEGs are already compressed
+        if (response.status == 200 and "gzip" in headers.get("accept-encoding", "")
+                and not response.content_type.startswith("image/")
+                and len(response.body) >= GZIP_MIN_BYTES and method == "GET"):
+            response.body = gzip.compress(response.body, compresslevel=5)
+            response.headers["Content-Encoding"] = "gzip"
+            response.headers["Vary"] = "Accept-Encoding"
+
+        return response
+
+    def encode(self, response, method, keep_alive):
+        lines = [
+            f"HTTP/1.1 {response.status} {STATUS_TEXT.get(response.status, '')}",
+            f"Date: {formatdate(usegmt=True)}",
+            f"Content-Type: {response.content_type}",
+            f"Content-Length: {len(response.body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+            "Cache-Control: no-cache",
+        ]
+        if response.etag:
+            lines.append(f"ETag: {response.etag}")
+        lines.extend(f"{k}: {v}" for k, v in response.headers.items())
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        return head if method == "HEAD" else head + response.body
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    raw = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                request_line, *header_lines = raw.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ")
+                except ValueError:
+                    break
+                headers = {}
+                for line in header_lines:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                if method not in ("GET", "HEAD"):
+                    response = error_response(405, f"{method} not allowed")
+                else:
+                    url = urlsplit(target)
+                    try:
+                        response = await self.route(url.path, parse_qs(url.query), headers)
+                    except OSError as e:
+                        response = error_response(404, str(e))
+                    response = self.finalize(response, headers, method)
+
+                writer.write(self.encode(response, method, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+# ------------------------------------------------------
+# Entry point
+# ------------------------------------------------------
+async def serve(host="127.0.0.1", port=8023, thumb_size=THUMB_SIZE, store=None):
+    records = flatten_dataset(load_dataset(store=store))
+    app = DatasetServer(records, thumb_size=thumb_size)
+
+    server = await asyncio.start_server(app.handle, host, port)
+    print(f"✔ Serving {len(records)} slides on http://{host}:{port}/manifest")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the MEDI-SLATE dataset over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8023)
+    parser.add_argument("--thumb-size", type=int, default=THUMB_SIZE)
+    parser.add_argument("--store", nargs="?", const=str(STORE_PATH), default=None,
+                        help="read the slides from the SQLite store (dataset_store.py build)")
+    args = parser.parse_args()
+
+    setup_logging()
+    try:
+        asyncio.run(serve(args.host, args.port, args.thumb_size, args.store))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        get_cache().log_stats("serve")
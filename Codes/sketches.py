@@ -0,0 +1,163 @@
+# DatasetPaper/code/sketches.py
+
+import math
+import heapq
+import hashlib
+import numpy as np
+
+# ------------------------------------------------------
+# Hashing shared by all sketches (stable across runs and processes,
+# unlike the built-in hash())
+# ------------------------------------------------------
+def hash64(item, seed=0):
+    data = item.encode("utf-8") if isinstance(item, str) else item
+    digest = hashlib.blake2b(data, digest_size=8, salt=seed.to_bytes(8, "little")).digest()
+    return int.from_bytes(digest, "little")
+
+# ------------------------------------------------------
+# HyperLogLog: distinct-count estimate in 2**p bytes
+# ------------------------------------------------------
+class HyperLogLog:
+    def __init__(self, p=12):
+        if not 4 <= p <= 18:
+            raise ValueError("HyperLogLog precision p must be in [4, 18]")
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, item):
+        x = hash64(item)
+        idx = x & (self.m - 1)
+        w = x >> self.p
+        rank = (64 - self.p) - w.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError("cannot merge HyperLogLogs with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return m * math.log(m / zeros)
+        return float(raw)
+
+    def __len__(self):
+        return int(round(self.estimate()))
+
+    @property
+    def relative_error(self):
+        # Standard error of the estimate
+        return 1.04 / math.sqrt(self.m)
+
+# ------------------------------------------------------
+# Count-Min sketch: frequency estimates that never undercount.
+# With width w = ceil(e / epsilon) and depth d = ceil(ln(1 / delta)),
+# estimate <= true count + epsilon * total with probability >= 1 - delta.
+# ------------------------------------------------------
+class CountMinSketch:
+    def __init__(self, width=8192, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int32)
+        self.total = 0
+
+    @classmethod
+    def from_error(cls, epsilon, delta):
+        return cls(int(math.ceil(math.e / epsilon)), int(math.ceil(math.log(1 / delta))))
+
+    def _columns(self, item):
+        # Kirsch-Mitzenmacher double hashing: d indices from one 64-bit hash
+        x = hash64(item)
+        h1, h2 = x & 0xFFFFFFFF, (x >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, item, count=1):
+        cols = self._columns(item)
+        self.table[np.arange(self.depth), cols] += count
+        self.total += count
+
+    def update(self, counts):
+        # counts: Counter / mapping of item -> count, added in one vectorized step
+        if not counts:
+            return
+        items = list(counts)
+        cols = np.array([self._columns(item) for item in items], dtype=np.int64)
+        values = np.fromiter((counts[item] for item in items), dtype=np.int64, count=len(items))
+        for row in range(self.depth):
+            np.add.at(self.table[row], cols[:, row], values.astype(np.int32))
+        self.total += int(values.sum())
+
+    def query(self, item):
+        cols = self._columns(item)
+        return int(self.table[np.arange(self.depth), cols].min())
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("cannot merge Count-Min sketches with different shapes")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    @property
+    def epsilon(self):
+        return math.e / self.width
+
+    @property
+    def delta(self):
+        return math.exp(-self.depth)
+
+    @property
+    def error_bound(self):
+        # Absolute overestimate bound (holds with probability 1 - delta)
+        return self.epsilon * self.total
+
+# ------------------------------------------------------
+# Heavy hitters: top-k candidates ranked by Count-Min estimates,
+# in O(k) memory regardless of vocabulary size
+# ------------------------------------------------------
+class HeavyHitters:
+    def __init__(self, k=200, width=8192, depth=4):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates = {}
+
+    def update(self, counts):
+        self.sketch.update(counts)
+        self._refresh(counts)
+
+    def _refresh(self, items):
+        for item in items:
+            self.candidates[item] = self.sketch.query(item)
+        if len(self.candidates) > 2 * self.k:
+            self._trim()
+
+    def _trim(self):
+        # Estimates only grow, so re-query before ranking
+        for item in self.candidates:
+            self.candidates[item] = self.sketch.query(item)
+        top = heapq.nlargest(self.k, self.candidates.items(), key=lambda kv: (kv[1], kv[0]))
+        self.candidates = dict(top)
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        # Re-rank the union of both candidate lists against the merged sketch
+        self._refresh(list(self.candidates) + list(other.candidates))
+        self._trim()
+        return self
+
+    def most_common(self, n=None):
+        self._trim()
+        ranked = sorted(self.candidates.items(), key=lambda kv: (-kv[1], kv[0]))
+        return ranked[:n or self.k]
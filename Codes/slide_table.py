@@ -0,0 +1,240 @@
+# DatasetPaper/code/slide_table.py
+
+import os
+import numpy as np
+import pandas as pd
+from collections.abc import Mapping, Sequence
+
+# Per-slide fields, same as the old per-slide dicts (plus "ocr_text" when
+# the table was loaded with the OCR layer); records add "lecture" and
+# "lecture_num" on top
+SLIDE_FIELDS = ("slide_id", "slide_num", "image_path", "text_path", "text")
+
+# ------------------------------------------------------
+# Column storage
+# ------------------------------------------------------
+class StringColumn:
+    # All strings in one UTF-8 buffer; row i is buffer[offsets[i]:offsets[i + 1]]
+    __slots__ = ("buffer", "offsets")
+
+    def __init__(self, strings):
+        encoded = [s.encode("utf-8") for s in strings]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=self.offsets[1:])
+        self.buffer = b"".join(encoded)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def byte_lengths(self):
+        return np.diff(self.offsets)
+
+    def find_rows(self, needle, ignore_case=True):
+        # Substring search straight on the shared buffer; match positions
+        # map back to rows through the offsets. bytes.lower() only folds
+        # ASCII, so byte positions stay aligned with the original buffer.
+        needle = needle.encode("utf-8")
+        haystack = self.buffer
+        if ignore_case:
+            needle, haystack = needle.lower(), haystack.lower()
+        if not needle:
+            return np.arange(len(self))
+
+        hits = []
+        pos = haystack.find(needle)
+        while pos != -1:
+            hits.append(pos)
+            pos = haystack.find(needle, pos + 1)
+        if not hits:
+            return np.zeros(0, dtype=np.int64)
+
+        hits = np.asarray(hits, dtype=np.int64)
+        rows = np.searchsorted(self.offsets, hits, side="right") - 1
+        # Drop matches that run across a row boundary
+        rows = rows[hits + len(needle) <= self.offsets[rows + 1]]
+        return np.unique(rows)
+
+    @property
+    def nbytes(self):
+        return len(self.buffer) + self.offsets.nbytes
+
+class PathColumn:
+    # Directory prefixes are interned once; rows keep an int32 prefix index
+    # plus the file name in a StringColumn
+    __slots__ = ("prefixes", "prefix_idx", "names")
+
+    def __init__(self, paths):
+        lookup, idx, names = {}, [], []
+        for p in paths:
+            head, tail = os.path.split(str(p))
+            idx.append(lookup.setdefault(head, len(lookup)))
+            names.append(tail)
+        self.prefixes = list(lookup)
+        self.prefix_idx = np.asarray(idx, dtype=np.int32)
+        self.names = StringColumn(names)
+
+    def __len__(self):
+        return len(self.prefix_idx)
+
+    def __getitem__(self, i):
+        return os.path.join(self.prefixes[self.prefix_idx[i]], self.names[i])
+
+    @property
+    def nbytes(self):
+        return self.prefix_idx.nbytes + self.names.nbytes + sum(len(p) for p in self.prefixes)
+
+# ------------------------------------------------------
+# Row and lecture views (no per-slide dicts are materialised)
+# ------------------------------------------------------
+class SlideRecord(Mapping):
+    # A read-only mapping over one row: keys(), "in", iteration and dict()
+    # all agree with what __getitem__ serves, lecture columns included
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key):
+        return self._table.value(self._row, key)
+
+    def __iter__(self):
+        return iter(self._table.record_keys)
+
+    def __len__(self):
+        return len(self._table.record_keys)
+
+    def __contains__(self, key):
+        return key in self._table.record_keys
+
+    def to_dict(self):
+        return {k: self[k] for k in self._table.record_keys}
+
+    def __repr__(self):
+        return f"SlideRecord({self['lecture']!r}, {self['slide_id']!r})"
+
+class LectureView(Sequence):
+    __slots__ = ("_table", "_start", "_stop")
+
+    def __init__(self, table, start, stop):
+        self._table = table
+        self._start = start
+        self._stop = stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return SlideRecord(self._table, self._start + i)
+
+# ------------------------------------------------------
+# SlideTable: lecture_id -> slides, backed by column arrays
+# ------------------------------------------------------
+class SlideTable(Mapping):
+    def __init__(self, lecture_ids, lecture_nums, lecture_sizes,
+                 slide_ids, slide_nums, image_paths, text_paths, texts, ocr_texts=None):
+        # Rows are stored lecture by lecture, in the order given
+        self.lecture_ids = list(lecture_ids)
+        self._bounds = np.zeros(len(self.lecture_ids) + 1, dtype=np.int64)
+        np.cumsum(lecture_sizes, out=self._bounds[1:])
+        self._lecture_pos = {lid: i for i, lid in enumerate(self.lecture_ids)}
+
+        row_lecture = np.repeat(np.arange(len(self.lecture_ids), dtype=np.int32), lecture_sizes)
+        self.lecture_idx = row_lecture
+        self.lecture_nums = np.asarray(lecture_nums, dtype=np.int32)[row_lecture]
+        self.slide_nums = np.asarray(slide_nums, dtype=np.int32)
+        self.slide_ids = StringColumn(slide_ids)
+        self.image_paths = PathColumn(image_paths)
+        self.text_paths = PathColumn(text_paths)
+        self.texts = StringColumn(texts)
+        # Optional OCR layer (see ocr.py), searchable like the narration
+        self.ocr_texts = StringColumn(ocr_texts) if ocr_texts is not None else None
+        self.fields = SLIDE_FIELDS + (("ocr_text",) if self.ocr_texts is not None else ())
+        # Per-row keys: the slide fields plus the lecture columns
+        self.record_keys = ("lecture", "lecture_num") + self.fields
+
+        self._getters = {
+            "slide_id": self.slide_ids.__getitem__,
+            "slide_num": lambda r: int(self.slide_nums[r]),
+            "image_path": self.image_paths.__getitem__,
+            "text_path": self.text_paths.__getitem__,
+            "text": self.texts.__getitem__,
+            "lecture": lambda r: self.lecture_ids[self.lecture_idx[r]],
+            "lecture_num": lambda r: int(self.lecture_nums[r]),
+        }
+        if self.ocr_texts is not None:
+            self._getters["ocr_text"] = self.ocr_texts.__getitem__
+
+    @classmethod
+    def from_lectures(cls, lectures, parse_lecture_num):
+        # Build from the old {lecture_id: [slide dict, ...]} layout
+        slides = [s for lec in lectures.values() for s in lec]
+        return cls(
+            list(lectures),
+            [parse_lecture_num(lid) for lid in lectures],
+            [len(lec) for lec in lectures.values()],
+            [s["slide_id"] for s in slides],
+            [s["slide_num"] for s in slides],
+            [s["image_path"] for s in slides],
+            [s["text_path"] for s in slides],
+            [s["text"] for s in slides],
+            [s["ocr_text"] for s in slides] if slides and "ocr_text" in slides[0] else None,
+        )
+
+    # ---------------- mapping API ----------------
+    def __getitem__(self, lecture_id):
+        i = self._lecture_pos[lecture_id]
+        return LectureView(self, int(self._bounds[i]), int(self._bounds[i + 1]))
+
+    def __iter__(self):
+        return iter(self.lecture_ids)
+
+    def __len__(self):
+        return len(self.lecture_ids)
+
+    # ---------------- row access ----------------
+    @property
+    def num_slides(self):
+        return len(self.slide_nums)
+
+    def value(self, row, key):
+        return self._getters[key](row)
+
+    def records(self):
+        return (SlideRecord(self, r) for r in range(self.num_slides))
+
+    def search(self, query, column="text", ignore_case=True):
+        # Slides whose narration ("text") or OCR layer ("ocr_text") contains query
+        columns = {"text": self.texts, "ocr_text": self.ocr_texts}
+        if columns.get(column) is None:
+            raise KeyError(f"no searchable column {column!r}")
+        return [SlideRecord(self, int(r)) for r in columns[column].find_rows(query, ignore_case)]
+
+    def to_frame(self, include_text=False):
+        columns = {
+            "lecture": pd.Categorical.from_codes(self.lecture_idx, self.lecture_ids),
+            "lecture_num": self.lecture_nums,
+            "slide_id": [self.slide_ids[r] for r in range(self.num_slides)],
+            "slide_num": self.slide_nums,
+        }
+        if include_text:
+            columns["text"] = [self.texts[r] for r in range(self.num_slides)]
+            if self.ocr_texts is not None:
+                columns["ocr_text"] = [self.ocr_texts[r] for r in range(self.num_slides)]
+        return pd.DataFrame(columns)
+
+    @property
+    def nbytes(self):
+        return (self.lecture_idx.nbytes + self.lecture_nums.nbytes + self.slide_nums.nbytes
+                + self.slide_ids.nbytes + self.image_paths.nbytes
+                + self.text_paths.nbytes + self.texts.nbytes
+                + (self.ocr_texts.nbytes if self.ocr_texts is not None else 0))
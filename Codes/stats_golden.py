@@ -0,0 +1,211 @@
+# DatasetPaper/code/stats_golden.py
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from paths import OUTPUT_DIR, DATA_DIR
+
+GOLDEN_DIR = OUTPUT_DIR / "golden"
+SOURCES = ("builder", "scripts")
+
+# Bump when the snapshot layout changes
+GOLDEN_VERSION = 1
+
+# Per-slide columns kept in clear next to the digest, for the diff report
+SHOWN = {"builder": ["tokens", "sentences"], "scripts": ["num_tokens", "num_sentences"]}
+
+# ------------------------------------------------------
+# Current statistics, as (per-slide frame, per-lecture frame, corpus
+# vocabulary counts). Slides are keyed "<lecture>/<text file stem>".
+# ------------------------------------------------------
+def builder_statistics():
+    # The builder's own load + statistics stages (snapshot-backed, so an
+    # unchanged corpus costs a fingerprint pass)
+    import medi_slate_builder as builder
+    dataset, _ = builder.load_dataset()
+    per_slide, per_lecture, vocabulary, _, _ = builder.compute_statistics(dataset)
+    per_slide = per_slide.assign(
+        slide=[f"{item['lecture']}/{Path(item['text_path']).stem}" for item in dataset]
+    )
+    return per_slide, per_lecture, vocabulary
+
+def script_statistics(data_dir=DATA_DIR):
+    # What compute_statistics.py last wrote to the data directory
+    per_slide = pd.read_csv(Path(data_dir) / "per_slide_stats.csv")
+    per_slide["slide"] = per_slide["lecture"] + "/" + per_slide["slide_id"]
+    per_slide = per_slide.drop(columns=["slide_id", "slide_num", "lecture_num"])
+    per_lecture = pd.read_csv(Path(data_dir) / "per_lecture_stats.csv").drop(
+        columns=["lecture_num"]).set_index("lecture")
+    with open(Path(data_dir) / "vocabulary_stats.json", encoding="utf-8") as f:
+        vocabulary = json.load(f)
+    return per_slide, per_lecture, vocabulary
+
+def current_statistics(source):
+    return builder_statistics() if source == "builder" else script_statistics()
+
+# ------------------------------------------------------
+# Snapshot: per-lecture totals in full, one 16-byte digest per slide over
+# its whole metric vector (plus the headline counts), and a digest of the
+# corpus vocabulary. About 40 bytes per slide.
+# ------------------------------------------------------
+def _row_digests(values):
+    values = np.ascontiguousarray(values, dtype=np.int64)
+    return np.frombuffer(
+        b"".join(hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in values),
+        dtype="V16",
+    )
+
+def _vocabulary_digest(vocabulary):
+    items = sorted((str(k), int(v)) for k, v in dict(vocabulary).items())
+    return hashlib.blake2b(json.dumps(items).encode("utf-8"), digest_size=16).hexdigest()
+
+def make_snapshot(source, per_slide, per_lecture, vocabulary):
+    slide_cols = [c for c in per_slide.columns if c not in ("lecture", "slide")]
+    lecture_cols = list(per_lecture.columns)
+    meta = {
+        "version": GOLDEN_VERSION,
+        "source": source,
+        "slide_columns": slide_cols,
+        "lecture_columns": lecture_cols,
+        "vocabulary": _vocabulary_digest(vocabulary),
+        "vocab_size": len(vocabulary),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    return {
+        "meta": meta,
+        "lectures": per_lecture.index.to_numpy(dtype=str),
+        "lecture_totals": per_lecture.to_numpy(dtype=np.int64),
+        "slides": per_slide["slide"].to_numpy(dtype=str),
+        "slide_digests": _row_digests(per_slide[slide_cols].to_numpy()),
+        "slide_shown": per_slide[SHOWN[source]].to_numpy(dtype=np.int32),
+    }
+
+def golden_path(source, golden_dir=GOLDEN_DIR):
+    return Path(golden_dir) / f"stats_{source}.npz"
+
+def save_snapshot(snapshot, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".npz")
+    with os.fdopen(fd, "wb") as f:
+        np.savez_compressed(f, **{**snapshot, "meta": np.array(json.dumps(snapshot["meta"]))})
+    os.replace(tmp, path)
+
+def load_snapshot(path):
+    with np.load(path, allow_pickle=False) as npz:
+        snapshot = {key: npz[key] for key in npz.files}
+    snapshot["meta"] = json.loads(str(snapshot["meta"]))
+    return snapshot
+
+# ------------------------------------------------------
+# Diff: lecture totals compared as one array, slides matched by key and
+# compared digest-to-digest
+# ------------------------------------------------------
+def diff_snapshots(golden, current):
+    report = {"layout": [], "lectures": [], "slides": [], "corpus": []}
+    g_meta, c_meta = golden["meta"], current["meta"]
+
+    for key in ("slide_columns", "lecture_columns"):
+        if g_meta[key] != c_meta[key]:
+            report["layout"].append(f"{key}: {g_meta[key]} -> {c_meta[key]}")
+    if not len(current["slides"]) and len(golden["slides"]):
+        # Usually a wrong dataset root or slide pattern, not a real change
+        report["corpus"].append(f"0 slides loaded (golden has {len(golden['slides'])})")
+    if g_meta["vocabulary"] != c_meta["vocabulary"]:
+        report["corpus"].append(
+            f"vocabulary changed (size {g_meta['vocab_size']} -> {c_meta['vocab_size']})")
+
+    # Lectures
+    g_lec = dict(zip(golden["lectures"], range(len(golden["lectures"]))))
+    c_lec = dict(zip(current["lectures"], range(len(current["lectures"]))))
+    for lid in g_lec.keys() - c_lec.keys():
+        report["lectures"].append(f"{lid}: removed")
+    for lid in c_lec.keys() - g_lec.keys():
+        report["lectures"].append(f"{lid}: added")
+    if not report["layout"]:
+        common = [lid for lid in current["lectures"] if lid in g_lec]
+        g_tot = golden["lecture_totals"][[g_lec[l] for l in common]]
+        c_tot = current["lecture_totals"][[c_lec[l] for l in common]]
+        for i in np.flatnonzero((g_tot != c_tot).any(axis=1)):
+            changes = [f"{col} {g} -> {c}" for col, g, c in
+                       zip(c_meta["lecture_columns"], g_tot[i], c_tot[i]) if g != c]
+            report["lectures"].append(f"{common[i]}: {', '.join(changes)}")
+
+        g_sum, c_sum = golden["lecture_totals"].sum(axis=0), current["lecture_totals"].sum(axis=0)
+        for col, g, c in zip(c_meta["lecture_columns"], g_sum, c_sum):
+            # Per-lecture vocabulary sizes do not add up; the corpus
+            # vocabulary is compared through its digest above
+            if g != c and col != "vocab_size":
+                report["corpus"].append(f"total {col}: {g} -> {c}")
+
+    # Slides
+    g_idx = pd.Index(golden["slides"])
+    c_idx = pd.Index(current["slides"])
+    removed = g_idx.difference(c_idx, sort=False)
+    added = c_idx.difference(g_idx, sort=False)
+    report["slides"] += [f"{s}: removed" for s in removed]
+    report["slides"] += [f"{s}: added" for s in added]
+    if not report["layout"]:
+        c_pos = np.flatnonzero(c_idx.isin(g_idx))
+        g_pos = g_idx.get_indexer(c_idx[c_pos])
+        changed = np.flatnonzero(golden["slide_digests"][g_pos] != current["slide_digests"][c_pos])
+        shown = SHOWN[c_meta["source"]]
+        for i in changed:
+            g_vals, c_vals = golden["slide_shown"][g_pos[i]], current["slide_shown"][c_pos[i]]
+            detail = [f"{col} {g} -> {c}" for col, g, c in zip(shown, g_vals, c_vals) if g != c]
+            report["slides"].append(
+                f"{c_idx[c_pos[i]]}: " + (", ".join(detail) or "other per-slide metrics changed"))
+    return report
+
+def print_report(report, elapsed):
+    total = sum(len(v) for v in report.values())
+    if not total:
+        print(f"✔ Statistics match the golden snapshot ({elapsed * 1000:.0f} ms).")
+        return
+    for section in ("layout", "corpus", "lectures", "slides"):
+        if report[section]:
+            print(f"{section}: {len(report[section])} difference(s)")
+            for line in report[section]:
+                print(f"  {line}")
+    print(f"✘ {total} difference(s) from the golden snapshot ({elapsed * 1000:.0f} ms).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Golden statistics snapshot: record it, or diff a new build against it"
+    )
+    parser.add_argument("command", choices=("snapshot", "diff"))
+    parser.add_argument("--source", choices=SOURCES, default="builder",
+                        help="builder: medi_slate_builder statistics; "
+                             "scripts: the CSVs compute_statistics.py wrote")
+    parser.add_argument("--golden", default=None, help="snapshot file (default: per source)")
+    args = parser.parse_args()
+
+    path = Path(args.golden) if args.golden else golden_path(args.source)
+    t0 = time.perf_counter()
+    current = make_snapshot(args.source, *current_statistics(args.source))
+    t1 = time.perf_counter()
+
+    if args.command == "snapshot":
+        save_snapshot(current, path)
+        print(f"✔ Golden snapshot written: {len(current['slides'])} slides, "
+              f"{len(current['lectures'])} lectures, "
+              f"vocabulary {current['meta']['vocab_size']} ({path}).")
+    else:
+        if not path.exists():
+            sys.exit(f"No golden snapshot at {path}; run `stats_golden.py snapshot` first")
+        golden = load_snapshot(path)
+        t2 = time.perf_counter()
+        report = diff_snapshots(golden, current)
+        print_report(report, time.perf_counter() - t2)
+        print(f"  (statistics {t1 - t0:.2f}s, load + diff {time.perf_counter() - t1:.3f}s)")
+        sys.exit(1 if any(report.values()) else 0)
@@ -0,0 +1,271 @@
+# DatasetPaper/code/stats_kernel.py
+
+import pandas as pd
+from abc import ABC, abstractmethod
+from collections import Counter
+from sketches import HyperLogLog, HeavyHitters
+
+# ------------------------------------------------------
+# Per-slide context: tokenization and derived views are computed once and
+# shared by every accumulator
+# ------------------------------------------------------
+class SlideContext:
+    __slots__ = ("text", "tokens", "_lower", "_types")
+
+    def __init__(self, text, tokenizer):
+        self.text = text
+        self.tokens = tokenizer(text)
+        self._lower = None
+        self._types = None
+
+    @property
+    def lower(self):
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def types(self):
+        if self._types is None:
+            self._types = set(self.tokens)
+        return self._types
+
+def callable_config(fn):
+    # A function's name and bytecode: editing a tokenizer or splitter body
+    # changes it (code objects among the constants are left out, their
+    # repr holds an address)
+    code = getattr(fn, "__code__", None)
+    consts = tuple(c for c in code.co_consts if not hasattr(c, "co_code")) if code else ()
+    return (getattr(fn, "__module__", None), getattr(fn, "__qualname__", repr(fn)),
+            code.co_code if code else None, consts)
+
+# ------------------------------------------------------
+# Metric accumulators
+#
+# Each accumulator appends its per-slide values to `out` and declares how
+# its columns roll up per lecture (`rollup`, applied with one groupby).
+# Metrics that cannot be rolled up from per-slide values (vocabulary size)
+# keep their own per-lecture state and report it from lecture_columns().
+# state()/merge() expose that state so partial results (e.g. one lecture's
+# snapshot) can be combined without another pass over the text. config()
+# describes everything that affects the output, for cache keys.
+# ------------------------------------------------------
+class Accumulator(ABC):
+    columns = ()
+    rollup = {}
+
+    @abstractmethod
+    def update(self, lecture, ctx, out):
+        pass
+
+    def config(self):
+        return (type(self).__qualname__, tuple(self.columns))
+
+    def lecture_columns(self):
+        return {}
+
+    def state(self):
+        return None
+
+    def merge(self, state):
+        pass
+
+class TokenCount(Accumulator):
+    def __init__(self, column="num_tokens"):
+        self.columns = (column,)
+        self.rollup = {column: "sum"}
+
+    def update(self, lecture, ctx, out):
+        out[self.columns[0]].append(len(ctx.tokens))
+
+class SentenceCount(Accumulator):
+    def __init__(self, splitter, column="num_sentences"):
+        self.splitter = splitter
+        self.columns = (column,)
+        self.rollup = {column: "sum"}
+
+    def update(self, lecture, ctx, out):
+        out[self.columns[0]].append(len(self.splitter(ctx.text)))
+
+    def config(self):
+        return super().config() + (callable_config(self.splitter),)
+
+class TermCounts(Accumulator):
+    # Case-insensitive substring counts, one column per term
+    def __init__(self, terms):
+        self.terms = tuple(terms)
+        self.columns = self.terms
+        self.rollup = {t: "sum" for t in self.terms}
+
+    def update(self, lecture, ctx, out):
+        lower = ctx.lower
+        for term in self.terms:
+            out[term].append(lower.count(term))
+
+class KeywordHits(Accumulator):
+    # Tokens that are in a keyword set: per-slide hit count + corpus Counter
+    def __init__(self, keywords, column="keyword_hits"):
+        self.keywords = frozenset(keywords)
+        self.columns = (column,)
+        self.rollup = {column: "sum"}
+        self.counts = Counter()
+
+    def update(self, lecture, ctx, out):
+        hits = [t for t in ctx.tokens if t in self.keywords]
+        out[self.columns[0]].append(len(hits))
+        self.counts.update(hits)
+
+    def config(self):
+        return super().config() + (tuple(sorted(self.keywords)),)
+
+    def state(self):
+        return self.counts
+
+    def merge(self, state):
+        self.counts.update(state)
+
+class Vocabulary(Accumulator):
+    # Exact mode keeps one token Counter per lecture; approximate mode keeps
+    # one HyperLogLog per lecture. Corpus totals are merges of those.
+    def __init__(self, slide_column=None, lecture_column="vocab_size",
+                 approximate=False, precision=12):
+        self.columns = (slide_column,) if slide_column else ()
+        self.lecture_column = lecture_column
+        self.approximate = approximate
+        self.precision = precision
+        self.lecture_counts = {}
+        self.lecture_sketches = {}
+
+    def update(self, lecture, ctx, out):
+        if self.columns:
+            out[self.columns[0]].append(len(ctx.types))
+        if self.approximate:
+            sketch = self.lecture_sketches.get(lecture)
+            if sketch is None:
+                sketch = self.lecture_sketches[lecture] = HyperLogLog(self.precision)
+            sketch.update(ctx.types)
+        else:
+            counts = self.lecture_counts.get(lecture)
+            if counts is None:
+                counts = self.lecture_counts[lecture] = Counter()
+            counts.update(ctx.tokens)
+
+    def config(self):
+        return super().config() + (self.lecture_column, self.approximate, self.precision)
+
+    def lecture_columns(self):
+        per_lecture = self.lecture_sketches if self.approximate else self.lecture_counts
+        return {self.lecture_column: {lec: len(v) for lec, v in per_lecture.items()}}
+
+    def state(self):
+        return self.lecture_sketches if self.approximate else self.lecture_counts
+
+    def merge(self, state):
+        target = self.lecture_sketches if self.approximate else self.lecture_counts
+        for lecture, part in state.items():
+            if lecture not in target:
+                target[lecture] = part
+            elif self.approximate:
+                target[lecture].merge(part)
+            else:
+                target[lecture].update(part)
+
+    def fold(self, key="(corpus)"):
+        # Collapse the per-lecture state into one corpus entry (bounded-memory
+        # builds: per-lecture sizes are already in the snapshots' rows)
+        target = self.lecture_sketches if self.approximate else self.lecture_counts
+        if len(target) <= 1:
+            return
+        if self.approximate:
+            folded = self.corpus_sketch()
+        else:
+            # Grow the existing corpus Counter in place rather than copying it
+            folded = target.pop(key, None) or Counter()
+            for counts in target.values():
+                folded.update(counts)
+        target.clear()
+        target[key] = folded
+
+    def corpus_counts(self):
+        if self.approximate:
+            raise ValueError("token counts are not kept in approximate mode")
+        total = Counter()
+        for counts in self.lecture_counts.values():
+            total.update(counts)
+        return total
+
+    def corpus_sketch(self):
+        total = HyperLogLog(self.precision)
+        for sketch in self.lecture_sketches.values():
+            total.merge(sketch)
+        return total
+
+    def corpus_size(self):
+        if not self.approximate:
+            return len(self.corpus_counts())
+        return len(self.corpus_sketch())
+
+    @property
+    def relative_error(self):
+        return HyperLogLog(self.precision).relative_error if self.approximate else 0.0
+
+class FrequencySketch(Accumulator):
+    # Approximate token frequencies in bounded memory: a Count-Min sketch
+    # plus a top-k heavy-hitter list (replaces the exact vocabulary Counter)
+    def __init__(self, k=200, width=8192, depth=4):
+        self.params = (k, width, depth)
+        self.heavy = HeavyHitters(k, width, depth)
+
+    def config(self):
+        return super().config() + self.params
+
+    def update(self, lecture, ctx, out):
+        self.heavy.update(Counter(ctx.tokens))
+
+    def state(self):
+        return self.heavy
+
+    def merge(self, state):
+        self.heavy.merge(state)
+
+    def most_common(self, n=None):
+        return self.heavy.most_common(n)
+
+    @property
+    def error_bound(self):
+        return self.heavy.sketch.error_bound
+
+# ------------------------------------------------------
+# Kernel: one pass over the slides fills every accumulator
+# ------------------------------------------------------
+def run_kernel(items, accumulators, tokenizer, lectures=None,
+               lecture_column="lecture", count_column="num_slides"):
+    # items: iterable of (lecture_id, text). Returns (per_slide, per_lecture)
+    # DataFrames; per_lecture is indexed by lecture id in first-seen order
+    # (or in the order of `lectures`, with empty lectures filled with 0).
+    out = {c: [] for acc in accumulators for c in acc.columns}
+    slide_lectures = []
+
+    for lecture, text in items:
+        ctx = SlideContext(text, tokenizer)
+        slide_lectures.append(lecture)
+        for acc in accumulators:
+            acc.update(lecture, ctx, out)
+
+    per_slide = pd.DataFrame({lecture_column: slide_lectures, **out})
+
+    rollup = {}
+    for acc in accumulators:
+        rollup.update(acc.rollup)
+
+    grouped = per_slide.groupby(lecture_column, sort=False)
+    per_lecture = grouped.agg(rollup) if rollup else pd.DataFrame(index=grouped.size().index)
+    per_lecture.insert(0, count_column, grouped.size())
+    for acc in accumulators:
+        for column, values in acc.lecture_columns().items():
+            per_lecture[column] = pd.Series(values)
+
+    if lectures is not None:
+        per_lecture = per_lecture.reindex(list(lectures), fill_value=0)
+    per_lecture.index.name = lecture_column
+    return per_slide, per_lecture
@@ -0,0 +1,183 @@
+# DatasetPaper/code/stats_snapshots.py
+
+import os
+import pickle
+import logging
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from artifact_cache import make_key
+from stats_kernel import run_kernel, callable_config
+from paths import OUTPUT_DIR
+
+SNAPSHOT_DIR = OUTPUT_DIR / "snapshots"
+
+# Bump when the snapshot layout changes so old pickles are recomputed
+SNAPSHOT_VERSION = 1
+
+# ------------------------------------------------------
+# Per-lecture input fingerprint (stat-only, no file reads). The statistics
+# configuration (accumulators, their term lists, the tokenizer) is part of
+# the key, so editing any of them recomputes the snapshots.
+# ------------------------------------------------------
+def config_digest(accumulators, tokenizer):
+    return make_key([acc.config() for acc in accumulators], callable_config(tokenizer))
+
+def lecture_fingerprint(namespace, text_paths, config=None):
+    entries = []
+    for p in text_paths:
+        st = os.stat(p)
+        entries.append((Path(p).name, st.st_size, st.st_mtime_ns))
+    return make_key(namespace, SNAPSHOT_VERSION, config, entries)
+
+def _snapshot_path(snapshot_dir, namespace, lecture_id):
+    return Path(snapshot_dir) / namespace / f"{lecture_id.replace(' ', '_')}.pkl"
+
+def load_snapshot(path, fingerprint):
+    try:
+        with open(path, "rb") as f:
+            snap = pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+    return snap if snap.get("fingerprint") == fingerprint else None
+
+def save_snapshot(path, snap):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(snap, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+# ------------------------------------------------------
+# Snapshot-backed statistics
+#
+# Every lecture's kernel output (per-slide rows, per-lecture row and the
+# accumulators' mergeable state) is pickled under its input fingerprint.
+# Only lectures whose text files changed are read and recomputed; corpus
+# totals are always a merge of the snapshots.
+# ------------------------------------------------------
+def collect_statistics(lectures, namespace, make_accumulators, tokenizer, load_texts,
+                       snapshot_dir=SNAPSHOT_DIR, count_column="num_slides", batch_bytes=None):
+    # lectures: {lecture_id: [text path, ...]} in output order
+    # make_accumulators: () -> fresh accumulator list (same layout every call)
+    # load_texts: [path, ...] -> [cleaned text, ...]; None marks an
+    #   unreadable file (see update_snapshots)
+    # batch_bytes: bounded-memory mode (see below)
+    if batch_bytes is not None:
+        return _collect_in_batches(lectures, namespace, make_accumulators, tokenizer,
+                                   load_texts, snapshot_dir, count_column, batch_bytes)
+    snapshots = update_snapshots(lectures, namespace, make_accumulators, tokenizer,
+                                 load_texts, snapshot_dir, count_column)
+    return merge_snapshots([snapshots[lid] for lid in lectures], make_accumulators, count_column)
+
+# ------------------------------------------------------
+# Bounded memory: lectures go through in batches of at most batch_bytes of
+# text. A batch's snapshots are already on disk when update_snapshots
+# returns, so they are merged, folded into corpus totals and dropped
+# before the next batch is read; only one batch of texts and per-lecture
+# Counters is ever resident.
+# ------------------------------------------------------
+def lecture_batches(lectures, batch_bytes):
+    batch, size = [], 0
+    for lid, paths in lectures.items():
+        lecture_bytes = sum(os.stat(p).st_size for p in paths)
+        if batch and size + lecture_bytes > batch_bytes:
+            yield batch
+            batch, size = [], 0
+        batch.append(lid)
+        size += lecture_bytes
+    if batch:
+        yield batch
+
+def _collect_in_batches(lectures, namespace, make_accumulators, tokenizer, load_texts,
+                        snapshot_dir, count_column, batch_bytes):
+    accumulators = make_accumulators()
+    per_slide, per_lecture = [], []
+    for n, batch in enumerate(lecture_batches(lectures, batch_bytes), start=1):
+        snapshots = update_snapshots({lid: lectures[lid] for lid in batch}, namespace,
+                                     make_accumulators, tokenizer, load_texts,
+                                     snapshot_dir, count_column)
+        for lid in batch:
+            snap = snapshots.pop(lid)
+            _merge_states(accumulators, snap)
+            per_slide.append(snap["per_slide"])
+            per_lecture.append(snap["per_lecture"])
+        for acc in accumulators:
+            fold = getattr(acc, "fold", None)
+            if fold is not None:
+                fold()
+        logging.info(f"[snapshots] {namespace}: batch {n} ({len(batch)} lectures) merged")
+    if not per_slide:
+        return (*_empty_frames(make_accumulators(), count_column), accumulators)
+    return (pd.concat(per_slide, ignore_index=True), pd.concat(per_lecture), accumulators)
+
+def update_snapshots(lectures, namespace, make_accumulators, tokenizer, load_texts,
+                     snapshot_dir=SNAPSHOT_DIR, count_column="num_slides"):
+    # {lecture_id: snapshot} for the given lectures, recomputing stale ones
+    # (a watcher calls this with just the lectures that changed)
+    config = config_digest(make_accumulators(), tokenizer)
+    fingerprints = {lid: lecture_fingerprint(namespace, paths, config)
+                    for lid, paths in lectures.items()}
+
+    snapshots, stale = {}, []
+    for lid in lectures:
+        snap = load_snapshot(_snapshot_path(snapshot_dir, namespace, lid), fingerprints[lid])
+        if snap is None:
+            stale.append(lid)
+        else:
+            snapshots[lid] = snap
+
+    # One bulk read for all stale lectures, then one kernel run per lecture
+    stale_paths = [p for lid in stale for p in lectures[lid]]
+    stale_texts = iter(load_texts(stale_paths))
+
+    for lid in stale:
+        texts = [next(stale_texts) for _ in lectures[lid]]
+        # An unreadable file counts as an empty slide for this run only: the
+        # lecture is not snapshotted, so the next run reads it (and reports
+        # the failure) again
+        unreadable = sum(t is None for t in texts)
+        texts = ["" if t is None else t for t in texts]
+        accumulators = make_accumulators()
+        per_slide, per_lecture = run_kernel(
+            ((lid, t) for t in texts), accumulators, tokenizer,
+            lectures=[lid], count_column=count_column,
+        )
+        snap = {
+            "fingerprint": fingerprints[lid],
+            "per_slide": per_slide,
+            "per_lecture": per_lecture,
+            "states": [acc.state() for acc in accumulators],
+        }
+        if unreadable:
+            logging.info(f"[snapshots] {namespace}: {lid} not snapshotted "
+                         f"({unreadable} unreadable file(s))")
+        else:
+            save_snapshot(_snapshot_path(snapshot_dir, namespace, lid), snap)
+        snapshots[lid] = snap
+
+    logging.info(
+        f"[snapshots] {namespace}: recomputed {len(stale)}/{len(lectures)} lectures"
+    )
+    return snapshots
+
+def _empty_frames(accumulators, count_column):
+    # No lectures: the kernel's frames with every column and no rows
+    return run_kernel((), accumulators, tokenizer=None, lectures=[], count_column=count_column)
+
+def merge_snapshots(snapshots, make_accumulators, count_column="num_slides"):
+    accumulators = make_accumulators()
+    for snap in snapshots:
+        _merge_states(accumulators, snap)
+
+    if not snapshots:
+        return (*_empty_frames(make_accumulators(), count_column), accumulators)
+    per_slide = pd.concat([s["per_slide"] for s in snapshots], ignore_index=True)
+    per_lecture = pd.concat([s["per_lecture"] for s in snapshots])
+    return per_slide, per_lecture, accumulators
+
+def _merge_states(accumulators, snap):
+    for acc, state in zip(accumulators, snap["states"]):
+        if state is not None:
+            acc.merge(state)
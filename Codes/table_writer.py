@@ -0,0 +1,124 @@
+# DatasetPaper/code/table_writer.py
+
+import io
+import os
+import csv
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+
+from artifact_cache import file_digest
+
+# ------------------------------------------------------
+# Declarative table specs
+# ------------------------------------------------------
+class Column:
+    __slots__ = ("key", "header", "fmt", "align", "raw")
+
+    def __init__(self, key, header=None, fmt="{}", align="c", raw=False):
+        self.key = key
+        self.header = header if header is not None else key
+        self.fmt = fmt        # format string or callable(value) -> str
+        self.align = align    # l / c / r
+        self.raw = raw        # cell is already LaTeX, don't escape it
+
+    def render(self, row):
+        value = row[self.key]
+        return self.fmt(value) if callable(self.fmt) else self.fmt.format(value)
+
+class TableSpec:
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = list(columns)
+
+# ------------------------------------------------------
+# Renderers: each yields the table as a stream of text chunks
+# ------------------------------------------------------
+LATEX_SPECIALS = {
+    "\\": r"\textbackslash{}", "&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#",
+    "_": r"\_", "{": r"\{", "}": r"\}", "~": r"\textasciitilde{}", "^": r"\^{}",
+}
+
+def latex_escape(text):
+    return "".join(LATEX_SPECIALS.get(ch, ch) for ch in text)
+
+def render_latex(spec, rows):
+    cols = spec.columns
+    yield "\\begin{tabular}{" + "".join(c.align for c in cols) + "}\n"
+    yield "\\toprule\n" + " & ".join(c.header for c in cols) + " \\\\\n\\midrule\n"
+    for row in rows:
+        cells = (c.render(row) if c.raw else latex_escape(c.render(row)) for c in cols)
+        yield " & ".join(cells) + " \\\\\n"
+    yield "\\bottomrule\n\\end{tabular}"
+
+def render_csv(spec, rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow([c.key for c in spec.columns])
+    for row in rows:
+        writer.writerow([c.render(row) for c in spec.columns])
+        # Flush in ~64 KiB chunks so 100k-row tables never sit in one string
+        if buf.tell() > 65536:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+MARKDOWN_ALIGN = {"l": ":---", "c": ":---:", "r": "---:"}
+
+def render_markdown(spec, rows):
+    cols = spec.columns
+    yield "| " + " | ".join(c.header for c in cols) + " |\n"
+    yield "|" + "|".join(MARKDOWN_ALIGN[c.align] for c in cols) + "|\n"
+    for row in rows:
+        yield "| " + " | ".join(c.render(row).replace("|", "\\|") for c in cols) + " |\n"
+
+RENDERERS = {"tex": render_latex, "csv": render_csv, "md": render_markdown}
+
+# ------------------------------------------------------
+# Writer: stream to a temp file while hashing; only replace the target
+# when the content actually changed (keeps LaTeX/git from rebuilding)
+# ------------------------------------------------------
+def write_if_changed(path, chunks, encoding="utf-8"):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    digest = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                data = chunk.encode(encoding)
+                digest.update(data)
+                f.write(data)
+        if path.exists() and file_digest(path) == digest.hexdigest():
+            os.remove(tmp)
+            return False
+        os.replace(tmp, path)
+        return True
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def write_table(spec, rows, out_dir, formats=("tex",)):
+    # rows: a callable returning a fresh row iterator (streamed once per
+    # format), or any iterable (materialised if several formats need it).
+    # Rows are mappings from column key to value.
+    if not callable(rows):
+        rows = list(rows) if len(formats) > 1 else rows
+        source = (lambda r=rows: r)
+    else:
+        source = rows
+
+    results = {}
+    for fmt in formats:
+        path = Path(out_dir) / f"{spec.name}.{fmt}"
+        results[str(path)] = write_if_changed(path, RENDERERS[fmt](spec, source()))
+
+    changed = sum(results.values())
+    logging.info(
+        f"[tables] {spec.name}: {changed} written, {len(results) - changed} unchanged"
+    )
+    return results
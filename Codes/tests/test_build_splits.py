@@ -0,0 +1,37 @@
+# DatasetPaper/code/tests/test_build_splits.py
+
+import sys
+import json
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import artifact_cache
+from build_splits import export_shards
+
+def make_records(tmp_path, n):
+    image = tmp_path / "slide.jpg"
+    Image.new("RGB", (32, 24), "white").save(image)
+    return [{
+        "key": f"lec001_slide{i:04d}", "lecture": "Lecture 1", "slide_id": f"Slide{i}",
+        "slide_num": i, "image_path": str(image), "text": f"slide {i}", "num_tokens": 2,
+    } for i in range(1, n + 1)]
+
+def test_reexport_leaves_only_listed_shards(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_cache, "_CACHE", artifact_cache.ArtifactCache(tmp_path / "cache"))
+    records = make_records(tmp_path, 10)
+    splits = {"train": records[:8], "val": records[8:9], "test": records[9:]}
+    out_dir = tmp_path / "shards"
+
+    export_shards(splits, out_dir, shard_size=2, image_size=16, workers=1)
+    (out_dir / "train-000009.tar.tmp").write_bytes(b"partial")
+    export_shards(splits, out_dir, shard_size=4, image_size=16, workers=1)
+
+    listed = json.loads((out_dir / "shards.json").read_text(encoding="utf-8"))
+    on_disk = {p.name for p in out_dir.iterdir() if p.name != "shards.json"}
+    assert on_disk == set(listed)
+    assert sorted(listed) == ["test-000000.tar", "train-000000.tar", "train-000001.tar",
+                              "val-000000.tar"]
+    assert sum(listed.values()) == len(records)
@@ -0,0 +1,216 @@
+# DatasetPaper/code/topics.py
+
+import os
+import time
+import pickle
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.decomposition import MiniBatchNMF, LatentDirichletAllocation
+from sklearn.feature_extraction.text import TfidfTransformer
+
+from utils import ensure_dir, setup_logging, RANDOM_SEED
+from load_data import load_dataset
+from doc_term import build_doc_term_matrix
+from figure_data import draw_heatmap
+from paths import DATA_DIR, TABLE_DIR, FIGURE_DIR, OUTPUT_DIR, STORE_PATH
+from table_writer import TableSpec, Column, write_table
+
+TOPIC_MODEL = OUTPUT_DIR / "topics" / "topic_model.pkl"
+
+METHODS = ("nmf", "lda")
+N_TOPICS = 12
+TOP_TERMS = 10
+MIN_DF = 3         # terms in fewer slides are noise for a topic model
+MAX_DF = 0.5       # terms in over half the slides carry no topic
+
+TOPIC_TABLE = TableSpec("table_topics", [
+    Column("topic", "Topic", align="r"),
+    Column("terms", "Top terms", align="l"),
+    Column("weight", "Share", fmt="{:.1%}", align="r"),
+])
+
+# ------------------------------------------------------
+# Models: NMF on TF-IDF rows, or online LDA on raw counts. Both have a
+# partial_fit, so new lectures update the topics without a refit.
+# ------------------------------------------------------
+def make_model(method, n_topics, seed=RANDOM_SEED):
+    if method == "nmf":
+        return MiniBatchNMF(n_components=n_topics, init="nndsvda", beta_loss="frobenius",
+                            batch_size=256, max_iter=200, random_state=seed)
+    if method == "lda":
+        return LatentDirichletAllocation(n_components=n_topics, learning_method="online",
+                                         batch_size=256, max_iter=20, random_state=seed)
+    raise ValueError(f"unknown topic method {method!r} (expected one of {METHODS})")
+
+class TopicState:
+    # Everything a later incremental run needs: the fitted model, its
+    # vocabulary (columns are fixed once fitted) and the slides already seen
+    def __init__(self, method, model, vocabulary, tfidf, seen):
+        self.method = method
+        self.model = model
+        self.vocabulary = vocabulary
+        self.tfidf = tfidf
+        self.seen = seen        # {(lecture, slide_id)}
+
+    def features(self, dtm):
+        # Raw counts for LDA, l2-normalised TF-IDF for NMF (idf frozen at
+        # the first fit, so old and new rows stay comparable)
+        X = dtm.project(self.vocabulary).matrix
+        if self.tfidf is not None:
+            X = self.tfidf.transform(X).astype(np.float32)
+        return X
+
+def load_state(path=TOPIC_MODEL):
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+def save_state(state, path=TOPIC_MODEL):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+def slide_keys(dtm):
+    return [(dtm.lectures[i], s) for i, s in zip(dtm.lecture_idx, dtm.slide_ids)]
+
+def fit_topics(dtm, method="nmf", n_topics=N_TOPICS, min_df=MIN_DF, max_df=MAX_DF,
+               seed=RANDOM_SEED):
+    pruned = dtm.restrict(min_df, max_df)
+    tfidf = TfidfTransformer().fit(pruned.matrix) if method == "nmf" else None
+    state = TopicState(method, make_model(method, n_topics, seed), pruned.vocabulary,
+                       tfidf, set(slide_keys(dtm)))
+    state.model.fit(state.features(pruned))
+    return state
+
+def update_topics(state, dtm):
+    # partial_fit on the slides not seen before. The vocabulary stays the
+    # one of the first fit: words that only appear in new lectures are
+    # dropped until the next full refit.
+    keys = slide_keys(dtm)
+    new_rows = np.array([i for i, k in enumerate(keys) if k not in state.seen], dtype=np.int64)
+    if new_rows.size:
+        X = state.features(dtm)[new_rows]
+        state.model.partial_fit(X)
+        state.seen.update(keys[i] for i in new_rows)
+    return int(new_rows.size)
+
+# ------------------------------------------------------
+# Results
+# ------------------------------------------------------
+def _normalize_rows(W):
+    totals = W.sum(axis=1, keepdims=True)
+    return np.divide(W, totals, out=np.zeros_like(W), where=totals > 0)
+
+def slide_mixtures(state, dtm):
+    return _normalize_rows(np.asarray(state.model.transform(state.features(dtm)), dtype=np.float64))
+
+def lecture_mixtures(mixtures, dtm):
+    # Average topic mixture of each lecture's slides (one sparse product)
+    indicator = sp.csr_matrix(
+        (np.ones(len(dtm.lecture_idx)), (dtm.lecture_idx, np.arange(len(dtm.lecture_idx)))),
+        shape=(len(dtm.lectures), len(dtm.lecture_idx)),
+    )
+    return _normalize_rows(np.asarray(indicator @ mixtures))
+
+def topic_terms(state, top=TOP_TERMS):
+    components = state.model.components_
+    weights = components / components.sum(axis=1, keepdims=True)
+    rows = []
+    for k, row in enumerate(weights):
+        for rank, j in enumerate(np.argsort(row)[::-1][:top], start=1):
+            rows.append((k, rank, state.vocabulary[j], float(row[j])))
+    return pd.DataFrame(rows, columns=["topic", "rank", "term", "weight"])
+
+def topic_label(terms_df, k, n=3):
+    return ", ".join(terms_df.loc[terms_df["topic"] == k, "term"].head(n))
+
+def write_topics(state, dtm, out_dir=DATA_DIR, table_dir=TABLE_DIR,
+                 figure_dir=FIGURE_DIR, top=TOP_TERMS):
+    terms_df = topic_terms(state, top)
+    W = slide_mixtures(state, dtm)
+    L = lecture_mixtures(W, dtm)
+    topic_cols = [f"topic_{k}" for k in range(W.shape[1])]
+
+    ensure_dir(out_dir)
+    terms_df.to_csv(f"{out_dir}/topic_terms.csv", index=False)
+    slides_df = pd.DataFrame(W, columns=topic_cols)
+    slides_df.insert(0, "slide_id", dtm.slide_ids)
+    slides_df.insert(0, "lecture", [dtm.lectures[i] for i in dtm.lecture_idx])
+    slides_df.to_csv(f"{out_dir}/slide_topics.csv", index=False)
+    lectures_df = pd.DataFrame(L, columns=topic_cols)
+    lectures_df.insert(0, "lecture", dtm.lectures)
+    lectures_df.to_csv(f"{out_dir}/lecture_topics.csv", index=False)
+
+    # Share: the topic's part of all slide mixtures in the corpus
+    share = W.sum(axis=0) / max(W.sum(), 1e-12)
+    write_table(TOPIC_TABLE, [
+        {"topic": k, "terms": ", ".join(terms_df.loc[terms_df["topic"] == k, "term"]),
+         "weight": share[k]}
+        for k in range(W.shape[1])
+    ], table_dir, formats=("tex", "md"))
+
+    ensure_dir(figure_dir)
+    draw_heatmap(
+        L.T, [f"{k}: {topic_label(terms_df, k)}" for k in range(W.shape[1])], dtm.lectures,
+        "Topic Mixture per Lecture", f"{figure_dir}/fig_topic_heatmap.png",
+        colorbar_label="Topic share", figsize=(14, 7), dpi=300,
+    )
+    return terms_df, lectures_df
+
+def run_topics(method="nmf", n_topics=N_TOPICS, incremental=False, model_path=TOPIC_MODEL,
+               store=None):
+    t0 = time.perf_counter()
+    dtm = build_doc_term_matrix(load_dataset(store=store))
+    t1 = time.perf_counter()
+
+    state = load_state(model_path) if incremental else None
+    if state is not None and (state.method != method or
+                              state.model.n_components != n_topics):
+        logging.info(f"[topics] saved model is {state.method}/{state.model.n_components} "
+                     f"topics; refitting")
+        state = None
+    if state is None:
+        state = fit_topics(dtm, method, n_topics)
+        logging.info(f"[topics] fitted {method} on {dtm.matrix.shape[0]} slides x "
+                     f"{len(state.vocabulary)} terms")
+    else:
+        added = update_topics(state, dtm)
+        logging.info(f"[topics] partial fit on {added} new slides")
+    save_state(state, model_path)
+    t2 = time.perf_counter()
+
+    terms_df, _ = write_topics(state, dtm)
+    t3 = time.perf_counter()
+    logging.info(f"[topics] matrix {t1 - t0:.2f}s, fit {t2 - t1:.2f}s, outputs {t3 - t2:.2f}s")
+    for k in range(n_topics):
+        logging.info(f"[topics] topic {k}: {topic_label(terms_df, k, n=6)}")
+    print(f"✔ {n_topics} {method.upper()} topics written (see {DATA_DIR / 'lecture_topics.csv'}).")
+    return state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Data-driven topics (NMF / online LDA) over the slide narration"
+    )
+    parser.add_argument("--method", choices=METHODS, default="nmf")
+    parser.add_argument("--topics", type=int, default=N_TOPICS, help="number of topics")
+    parser.add_argument("--incremental", action="store_true",
+                        help="update the saved model with slides it has not seen "
+                             "(partial fit) instead of refitting")
+    parser.add_argument("--store", nargs="?", const=str(STORE_PATH), default=None,
+                        help="read the slides from the SQLite store (dataset_store.py build)")
+    args = parser.parse_args()
+
+    setup_logging()
+    run_topics(args.method, args.topics, args.incremental, store=args.store)
@@ -0,0 +1,264 @@
+# DatasetPaper/code/transcode_images.py
+
+import io
+import os
+import json
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from artifact_cache import make_key
+from bulk_io import list_files, derivative_path, DERIVED_DIR, DERIVED_SUFFIXES
+from paths import DATASET_ROOT, DATA_DIR
+from load_data import parse_lecture_num, parse_slide_num
+from utils import ensure_dir, setup_logging
+
+MANIFEST = DERIVED_DIR / "manifest.json"
+
+MAX_SIDE = 1280        # slides are exported at 1280x720; larger ones shrink
+WEBP_QUALITY = 80
+PALETTE_COLORS = 256
+MIN_SSIM = 0.95        # a derivative below this is not written
+
+# ------------------------------------------------------
+# SSIM (Wang et al. 2004) on the luma channel, NumPy only: local means,
+# variances and covariance over a 7x7 window from integral images, so the
+# cost is a few array passes regardless of the window size. As in the
+# reference implementation, images are first average-pooled by
+# round(min(H, W) / 256) to match a normal viewing distance (3x for 720p).
+# ------------------------------------------------------
+def _box_mean(x, win):
+    s = np.pad(x, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    total = s[win:, win:] - s[:-win, win:] - s[win:, :-win] + s[:-win, :-win]
+    return total / (win * win)
+
+def _pool(x, f):
+    h, w = (x.shape[0] // f) * f, (x.shape[1] // f) * f
+    return x[:h, :w].reshape(h // f, f, w // f, f).mean(axis=(1, 3))
+
+def ssim(a, b, win=7, data_range=255.0, downsample=True):
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    f = max(1, round(min(a.shape) / 256)) if downsample else 1
+    if f > 1:
+        a, b = _pool(a, f), _pool(b, f)
+    c1, c2 = (0.01 * data_range) ** 2, (0.03 * data_range) ** 2
+
+    mu_a, mu_b = _box_mean(a, win), _box_mean(b, win)
+    var_a = _box_mean(a * a, win) - mu_a ** 2
+    var_b = _box_mean(b * b, win) - mu_b ** 2
+    cov = _box_mean(a * b, win) - mu_a * mu_b
+
+    ssim_map = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / (
+        (mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2)
+    )
+    return float(ssim_map.mean())
+
+def _luma(img):
+    return np.asarray(img.convert("L"), dtype=np.float64)
+
+# ------------------------------------------------------
+# Encoders: WebP for photographic slides, an adaptive 256-colour palette
+# PNG for the flat graphics most slides are; "auto" keeps the smaller one
+# that passes the SSIM check
+# ------------------------------------------------------
+def encode_webp(img, quality=WEBP_QUALITY, colors=None):
+    buf = io.BytesIO()
+    img.save(buf, format="WEBP", quality=quality, method=4)
+    return buf.getvalue()
+
+def encode_palette_png(img, quality=None, colors=PALETTE_COLORS):
+    # No dithering: flat fills stay flat and compress far better
+    paletted = img.quantize(colors=colors, method=Image.Quantize.FASTOCTREE,
+                            dither=Image.Dither.NONE)
+    buf = io.BytesIO()
+    paletted.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+ENCODERS = {"webp": (encode_webp, ".webp"), "png": (encode_palette_png, ".png")}
+FORMATS = ("auto", *ENCODERS)
+
+def transcode_image(image_path, fmt="auto", quality=WEBP_QUALITY, colors=PALETTE_COLORS,
+                    max_side=MAX_SIDE, min_ssim=MIN_SSIM, root=DERIVED_DIR):
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+    img.thumbnail((max_side, max_side), Image.LANCZOS)
+    reference = _luma(img)
+    original_bytes = os.path.getsize(image_path)
+
+    candidates = []
+    for name in ENCODERS if fmt == "auto" else [fmt]:
+        encode, suffix = ENCODERS[name]
+        data = encode(img, quality=quality, colors=colors)
+        with Image.open(io.BytesIO(data)) as decoded:
+            score = ssim(reference, _luma(decoded))
+        candidates.append((len(data), name, suffix, data, score))
+
+    passing = [c for c in candidates if c[4] >= min_ssim and c[0] < original_bytes]
+    result = {
+        "image": str(image_path),
+        "original_bytes": original_bytes,
+        "ssim": max(c[4] for c in candidates),
+    }
+
+    # Any older derivative of this slide is stale now
+    for suffix in DERIVED_SUFFIXES:
+        stale = derivative_path(image_path, suffix, root)
+        if stale.exists():
+            stale.unlink()
+
+    if not passing:
+        # Keep reading the original: no candidate was both faithful and smaller
+        return {**result, "status": "rejected", "format": None,
+                "derived_bytes": original_bytes}
+
+    size, name, suffix, data, score = min(passing)
+    out = derivative_path(image_path, suffix, root)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out.parent, prefix=".tmp-", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, out)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return {**result, "status": "ok", "format": name, "derived_bytes": size, "ssim": score}
+
+def _transcode_job(job):
+    image_path, settings = job
+    try:
+        return transcode_image(image_path, **settings)
+    except Exception as exc:
+        return {"image": image_path, "status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+
+# ------------------------------------------------------
+# Manifest: per source image, its (size, mtime) and the settings used, so
+# a re-run only transcodes new or changed slides (or all of them after a
+# settings change)
+# ------------------------------------------------------
+def load_manifest(path=MANIFEST):
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_manifest(manifest, path=MANIFEST):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, path)
+
+def _up_to_date(entry, source, settings_key, root):
+    if entry is None or entry.get("source") != source or entry.get("settings") != settings_key:
+        return False
+    if entry["status"] != "ok":
+        return entry["status"] == "rejected"
+    return derivative_path(entry["image"], ENCODERS[entry["format"]][1], root).exists()
+
+def list_slide_images(root=DATASET_ROOT):
+    images = []
+    for lecture_dir in sorted((d for d in Path(root).iterdir() if d.is_dir()),
+                              key=lambda d: parse_lecture_num(d.name)):
+        found = list_files(lecture_dir / "Images", ".jpg")
+        images += [(lecture_dir.name, str(found[s])) for s in sorted(found, key=parse_slide_num)]
+    return images
+
+def transcode_all(fmt="auto", quality=WEBP_QUALITY, colors=PALETTE_COLORS, max_side=MAX_SIDE,
+                  min_ssim=MIN_SSIM, workers=None, root=DERIVED_DIR, force=False):
+    settings = dict(fmt=fmt, quality=quality, colors=colors, max_side=max_side,
+                    min_ssim=min_ssim, root=root)
+    settings_key = make_key(sorted((k, str(v)) for k, v in settings.items()))
+    images = list_slide_images()
+
+    manifest = load_manifest(Path(root) / MANIFEST.name)
+    results, todo = {}, []
+    for lecture, path in images:
+        st = os.stat(path)
+        source = [st.st_size, st.st_mtime_ns]
+        entry = manifest.get(path)
+        if not force and _up_to_date(entry, source, settings_key, root):
+            results[path] = entry
+        else:
+            todo.append((path, source))
+    logging.info(f"[transcode] {len(results)} up to date, {len(todo)} to transcode")
+
+    if todo:
+        jobs = [(path, settings) for path, _ in todo]
+        chunksize = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for (path, source), result in zip(todo, pool.map(_transcode_job, jobs,
+                                                              chunksize=chunksize)):
+                if result["status"] == "failed":
+                    logging.warning(f"[transcode] skipped {path} ({result['error']})")
+                    continue
+                results[path] = {**result, "source": source, "settings": settings_key}
+
+    # Slides that no longer exist drop out of the manifest
+    save_manifest({path: results[path] for _, path in images if path in results},
+                  Path(root) / MANIFEST.name)
+
+    rows = [{"lecture": lecture, **results[path]} for lecture, path in images if path in results]
+    return pd.DataFrame(rows)
+
+# ------------------------------------------------------
+# Size report
+# ------------------------------------------------------
+def size_report(df):
+    df = df.assign(
+        transcoded=df["status"] == "ok",
+        saved_bytes=df["original_bytes"] - df["derived_bytes"],
+    )
+    report = df.groupby("lecture", sort=False).agg(
+        images=("image", "size"),
+        transcoded=("transcoded", "sum"),
+        original_bytes=("original_bytes", "sum"),
+        derived_bytes=("derived_bytes", "sum"),
+        saved_bytes=("saved_bytes", "sum"),
+        min_ssim=("ssim", "min"),
+        mean_ssim=("ssim", "mean"),
+    )
+    report["saved_pct"] = report["saved_bytes"] / report["original_bytes"]
+    return report.reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write compact, SSIM-verified derivatives of the slide images"
+    )
+    parser.add_argument("--format", choices=FORMATS, default="auto",
+                        help="derivative format (auto: smaller of WebP and palette PNG)")
+    parser.add_argument("--quality", type=int, default=WEBP_QUALITY, help="WebP quality")
+    parser.add_argument("--colors", type=int, default=PALETTE_COLORS, help="palette size")
+    parser.add_argument("--max-side", type=int, default=MAX_SIDE, help="longest side in pixels")
+    parser.add_argument("--min-ssim", type=float, default=MIN_SSIM,
+                        help="derivatives below this SSIM are not written")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="encoder processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="re-transcode every image")
+    args = parser.parse_args()
+
+    setup_logging()
+    df = transcode_all(args.format, args.quality, args.colors, args.max_side,
+                       args.min_ssim, args.workers, force=args.force)
+    report = size_report(df)
+
+    ensure_dir(DATA_DIR)
+    report.to_csv(DATA_DIR / "transcode_report.csv", index=False)
+    for row in report.itertuples():
+        logging.info(
+            f"[transcode] {row.lecture}: {row.transcoded}/{row.images} transcoded, "
+            f"{row.saved_bytes / 1e6:.2f} MB saved ({row.saved_pct:.0%}), min SSIM {row.min_ssim:.3f}"
+        )
+    saved, total = report["saved_bytes"].sum(), report["original_bytes"].sum()
+    print(f"✔ {int(report['transcoded'].sum())}/{len(df)} images transcoded: "
+          f"{saved / 1e6:.1f} of {total / 1e6:.1f} MB saved ({saved / max(total, 1):.0%}).")
@@ -1,13 +1,23 @@
 # DatasetPaper/code/utils.py
 
+import io
 import os
 import json
 import re
+import logging
 import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
+from PIL import Image
 from wordcloud import WordCloud
-import textstat
+from artifact_cache import get_cache, make_key, file_digest
+from bulk_io import prefer_derivative
+from paths import OUTPUT_DIR
+
+# ------------------------------------------------------
+# Fixed seed for every sampling step (gallery, splits)
+# ------------------------------------------------------
+RANDOM_SEED = 42
 
 # ------------------------------------------------------
 # Create directories automatically
@@ -15,6 +25,19 @@ import textstat
 def ensure_dir(path):
     Path(path).mkdir(parents=True, exist_ok=True)
 
+# ------------------------------------------------------
+# Logging (same file and format as medi_slate_builder)
+# ------------------------------------------------------
+LOG_FILE = OUTPUT_DIR / "pipeline.log"
+
+def setup_logging(log_file=LOG_FILE):
+    ensure_dir(Path(log_file).parent)
+    logging.basicConfig(
+        filename=log_file,
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
 # ------------------------------------------------------
 # Text utilities
 # ------------------------------------------------------
@@ -54,11 +77,39 @@ def save_fig(path):
     plt.savefig(path, dpi=300)
     plt.close()
 
+# ------------------------------------------------------
+# Cached image thumbnails
+# ------------------------------------------------------
+def thumbnail_bytes(image_path, size, quality=85):
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+        img.thumbnail((size, size))
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+def cached_thumbnail(image_path, size, quality=85):
+    # Decoded from the compact derivative when there is one
+    image_path = prefer_derivative(image_path)
+    key = make_key(file_digest(image_path), size, quality)
+    return get_cache().get_or_create(
+        "thumbs", key, lambda: thumbnail_bytes(image_path, size, quality)
+    )
+
 # ------------------------------------------------------
 # Wordcloud generator
 # ------------------------------------------------------
+def wordcloud_png(text, width=1600, height=900):
+    # WordCloud layout dominates runtime; reuse it while the text is unchanged
+    def render():
+        wc = WordCloud(width=width, height=height, background_color="white")
+        buf = io.BytesIO()
+        wc.generate(text).to_image().save(buf, format="PNG")
+        return buf.getvalue()
+
+    key = make_key(text, width, height)
+    return get_cache().get_or_create("wordcloud", key, render)
+
 def generate_wordcloud(text, save_path):
-    wc = WordCloud(width=1600, height=900, background_color="white")
-    img = wc.generate(text)
     ensure_dir(Path(save_path).parent)
-    img.to_file(save_path)
+    Path(save_path).write_bytes(wordcloud_png(text))